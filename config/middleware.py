@@ -1,5 +1,8 @@
 import uuid
 
+from django.contrib.auth.middleware import AuthenticationMiddleware
+from django.utils.functional import SimpleLazyObject
+
 
 class RequestIdMiddleware:
     def __init__(self, get_response):
@@ -9,3 +12,14 @@ class RequestIdMiddleware:
         request.META["X_REQUEST_ID"] = str(uuid.uuid4())
 
         return self.get_response(request)
+
+
+class PrincipalAuthenticationMiddleware(AuthenticationMiddleware):
+    """AuthenticationMiddleware resolving request.user from the session's cached principal."""
+
+    def process_request(self, request):
+        from purly.user.principal import get_principal
+
+        super().process_request(request)
+
+        request.user = SimpleLazyObject(lambda: get_principal(request))
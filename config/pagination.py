@@ -1,16 +1,124 @@
-from rest_framework import pagination
+import json
+from datetime import date
+from decimal import Decimal
+
+from django.conf import settings
+from django.core import signing
+from django.core.paginator import Paginator
+from django.db import connections
+from django.db.models import Q, QuerySet
+from django.utils.functional import cached_property
+from rest_framework import exceptions, filters, pagination
 from rest_framework.response import Response
+from rest_framework.utils.urls import remove_query_param, replace_query_param
+
+
+def explain(queryset):
+    """Return the Postgres planner's top plan node for a queryset, None without a planner."""
+    if not isinstance(queryset, QuerySet):
+        return None
+
+    connection = connections[queryset.db]
+
+    if connection.vendor != "postgresql":
+        return None
+
+    sql, params = queryset.query.sql_with_params()
+
+    with connection.cursor() as cursor:
+        cursor.execute(f"EXPLAIN (FORMAT JSON) {sql}", params)
+
+        plan = cursor.fetchone()[0]
+
+    if isinstance(plan, str):
+        plan = json.loads(plan)
+
+    return plan[0]["Plan"]
+
+
+def planner_estimate(queryset):
+    """Return the Postgres planner's row estimate for a queryset, None without a planner."""
+    if not isinstance(queryset, QuerySet):
+        return None
+
+    plan = explain(queryset.order_by())
+
+    return None if plan is None else plan["Plan Rows"]
+
+
+class EstimatedCountPaginator(Paginator):
+    """Paginator counting exactly only when the planner expects a small result set.
+
+    A caller that already counted or estimated the rows passes `known_count` or
+    `known_estimate`, which spares the paginator its own EXPLAIN and COUNT. With `estimate`
+    off the paginator always counts, for tables too small for an EXPLAIN to pay for itself.
+    """
+
+    count_exact = True
+
+    def __init__(
+        self,
+        object_list,
+        per_page,
+        *args,
+        known_count=None,
+        known_estimate=None,
+        estimate=True,
+        **kwargs,
+    ):
+        super().__init__(object_list, per_page, *args, **kwargs)
+
+        self.known_count = known_count
+        self.known_estimate = known_estimate
+        self.estimate = estimate
+
+    @cached_property
+    def count(self):
+        if self.known_count is not None:
+            return self.known_count
+
+        estimate = self.known_estimate
+
+        if estimate is None and self.estimate:
+            estimate = planner_estimate(self.object_list)
+
+        if estimate is None or estimate < settings.PAGINATION_ESTIMATED_COUNT_THRESHOLD:
+            return super().count
+
+        self.count_exact = False
+
+        return estimate
 
 
 class CustomPagination(pagination.PageNumberPagination):
     page_size_query_param = "page_size"
     page_size = 100
     max_page_size = 100
+    # Whether list counts may be planner estimates; set on paginations of large tables.
+    estimate_count = False
+
+    def paginate_queryset(self, queryset, request, view=None):
+        # ConditionalGetMixin leaves the count or estimate it took for its validators.
+        self.known_counts = {
+            "known_count": getattr(view, "list_count", None),
+            "known_estimate": getattr(view, "list_estimate", None),
+        }
+
+        return super().paginate_queryset(queryset, request, view)
+
+    def django_paginator_class(self, object_list, per_page):
+        return EstimatedCountPaginator(
+            object_list,
+            per_page,
+            estimate=self.estimate_count,
+            **getattr(self, "known_counts", {}),
+        )
 
     def get_paginated_response(self, data):
         return Response(
             {
                 "count": self.page.paginator.count,
+                "count_exact": self.page.paginator.count_exact,
                 "next": self.get_next_link(),
                 "previous": self.get_previous_link(),
                 "pages": self.page.paginator.num_pages,
@@ -27,6 +135,10 @@ class CustomPagination(pagination.PageNumberPagination):
                     "type": "integer",
                     "example": 123,
                 },
+                "count_exact": {
+                    "type": "boolean",
+                    "example": True,
+                },
                 "next": {
                     "type": "string",
                     "nullable": True,
@@ -46,3 +158,167 @@ class CustomPagination(pagination.PageNumberPagination):
                 "results": schema,
             },
         }
+
+
+def cursor_value(value):
+    if isinstance(value, date):
+        return value.isoformat()
+
+    if isinstance(value, Decimal):
+        return str(value)
+
+    return value
+
+
+def keyset_condition(ordering, values):
+    """Rows strictly after values in ordering, with NULLs placed like Postgres places them."""
+    condition = Q(pk__in=[])
+    equal = Q()
+
+    for term, value in zip(ordering, values, strict=True):
+        field = term.lstrip("-")
+        descending = term.startswith("-")
+
+        # Ascending sorts NULLs last and descending sorts them first.
+        if value is None:
+            after = Q(**{f"{field}__isnull": False}) if descending else None
+        elif descending:
+            after = Q(**{f"{field}__lt": value})
+        else:
+            after = Q(**{f"{field}__gt": value}) | Q(**{f"{field}__isnull": True})
+
+        if after is not None:
+            condition |= equal & after
+
+        equal &= Q(**{f"{field}__isnull": True}) if value is None else Q(**{field: value})
+
+    return condition
+
+
+class KeysetPagination(CustomPagination):
+    """CustomPagination with an opt-in `?cursor=` mode that never counts or offsets.
+
+    Cursor pages are keyed on the requested ordering (limited to the view's ordering_fields)
+    plus id as a tiebreaker. Cursors are signed and opaque, and `count`/`pages` are null.
+    """
+
+    cursor_query_param = "cursor"
+    cursor_salt = "config.pagination.keyset"
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.cursor_mode = self.cursor_query_param in request.query_params
+
+        if not self.cursor_mode:
+            return super().paginate_queryset(queryset, request, view)
+
+        self.request = request
+        self.ordering = self.get_keyset_ordering(request, queryset, view)
+
+        page_size = self.get_page_size(request)
+        values, reverse = self.decode_cursor(request.query_params[self.cursor_query_param])
+        ordering = [self.invert(term) for term in self.ordering] if reverse else self.ordering
+
+        queryset = queryset.order_by(*ordering)
+
+        if values is not None:
+            queryset = queryset.filter(keyset_condition(ordering, values))
+
+        rows = list(queryset[: page_size + 1])
+        has_more = len(rows) > page_size
+        rows = rows[:page_size]
+
+        if reverse:
+            rows.reverse()
+
+        # Coming back from a previous page always leaves a next one, and vice versa.
+        has_next = has_more if not reverse else values is not None
+        has_previous = has_more if reverse else values is not None
+
+        self.next_cursor = (
+            self.encode_cursor(rows[-1], reverse=False) if rows and has_next else None
+        )
+        self.previous_cursor = (
+            self.encode_cursor(rows[0], reverse=True) if rows and has_previous else None
+        )
+
+        return rows
+
+    def get_keyset_ordering(self, request, queryset, view):
+        ordering_fields = getattr(view, "ordering_fields", None) or []
+        ordering = [
+            term
+            for term in filters.OrderingFilter().get_ordering(request, queryset, view) or []
+            if term.lstrip("-") in ordering_fields
+        ]
+        descending = ordering[-1].startswith("-") if ordering else True
+
+        return [*ordering, "-id" if descending else "id"]
+
+    @staticmethod
+    def invert(term):
+        return term[1:] if term.startswith("-") else f"-{term}"
+
+    def encode_cursor(self, row, *, reverse):
+        values = [
+            cursor_value(row[field] if isinstance(row, dict) else getattr(row, field))
+            for field in (term.lstrip("-") for term in self.ordering)
+        ]
+        cursor = signing.dumps(
+            {"ordering": self.ordering, "values": values, "reverse": reverse},
+            salt=self.cursor_salt,
+            compress=True,
+        )
+
+        url = self.request.build_absolute_uri()
+        url = remove_query_param(url, self.page_query_param)
+
+        return replace_query_param(url, self.cursor_query_param, cursor)
+
+    def decode_cursor(self, cursor):
+        if not cursor:
+            return None, False
+
+        try:
+            payload = signing.loads(cursor, salt=self.cursor_salt)
+        except signing.BadSignature as exc:
+            raise exceptions.NotFound(detail="This cursor is not valid.") from exc
+
+        if payload.get("ordering") != self.ordering:
+            raise exceptions.NotFound(detail="This cursor does not match the requested ordering.")
+
+        return payload["values"], payload["reverse"]
+
+    def get_paginated_response(self, data):
+        if not self.cursor_mode:
+            return super().get_paginated_response(data)
+
+        return Response(
+            {
+                "count": None,
+                "count_exact": None,
+                "next": self.next_cursor,
+                "previous": self.previous_cursor,
+                "pages": None,
+                "results": data,
+            }
+        )
+
+    def get_paginated_response_schema(self, schema):
+        response_schema = super().get_paginated_response_schema(schema)
+
+        for name in ("count", "count_exact", "pages"):
+            response_schema["properties"][name]["nullable"] = True
+
+        return response_schema
+
+    def get_schema_operation_parameters(self, view):
+        return [
+            *super().get_schema_operation_parameters(view),
+            {
+                "name": self.cursor_query_param,
+                "required": False,
+                "in": "query",
+                "description": "Opaque cursor; pass it empty to start keyset pagination.",
+                "schema": {"type": "string"},
+            },
+        ]
@@ -69,7 +69,7 @@ MIDDLEWARE = [
     "django.contrib.sessions.middleware.SessionMiddleware",
     "django.middleware.common.CommonMiddleware",
     "django.middleware.csrf.CsrfViewMiddleware",
-    "django.contrib.auth.middleware.AuthenticationMiddleware",
+    "config.middleware.PrincipalAuthenticationMiddleware",
     "django.contrib.messages.middleware.MessageMiddleware",
     "django.middleware.clickjacking.XFrameOptionsMiddleware",
     "allauth.account.middleware.AccountMiddleware",
@@ -170,6 +170,34 @@ APP_EMAIL_SUBJECT_PREFIX = "[Purly] "
 
 MAX_REQUISITION_LINES = 250
 MAX_SEQUENCE_NUMBER = 1000
+PAGINATION_ESTIMATED_COUNT_THRESHOLD = 100_000  # Planner estimates above this replace COUNT(*)
+SEARCH_CONFIG = "english"  # Postgres text search configuration of the search vectors
+
+QUERY_GUARD_STATEMENT_TIMEOUT = 5000  # Milliseconds list queries may run, views may override
+QUERY_GUARD_MAX_COST = None  # Planner cost above which list queries are refused, None skips it
+QUERY_GUARD_MAX_IN_VALUES = 500  # Values accepted by a single `__in` filter
+QUERY_GUARD_MAX_REGEX_LENGTH = 200  # Characters accepted by a `__regex`/`__iregex` filter
+QUERY_GUARD_SLOW_SECONDS = 1.0  # List requests slower than this are counted as slow
+RESPONSE_CACHE_TIMEOUT = 300  # Seconds a cached list response lives unless a write retires it
+REFERENCE_CACHE_CHANNEL = "purly:reference-cache"  # Pub/sub channel of invalidated rows
+REFERENCE_CACHE_LOCAL_SIZE = 1024  # Rows kept in each process's LRU, per cached model
+REFERENCE_CACHE_LOCAL_TTL = 60  # Seconds a local row is trusted should a broadcast be missed
+REFERENCE_CACHE_TIMEOUT = 60 * 60  # Seconds a row lives in the shared cache
+REFERENCE_CACHE_METRICS_BATCH = 100  # Counter events buffered per process before recording
+PRINCIPAL_CACHE_TIMEOUT = 60 * 15  # Seconds a session user's cached principal lives
+API_TOKEN_LIFETIME = 60 * 60  # Seconds an API token is valid unless asked otherwise
+API_TOKEN_MAX_LIFETIME = 60 * 60 * 24  # Longest validity an API token can be issued with
+API_TOKEN_DENYLIST_REFRESH = 5  # Seconds each process reuses a token's denylist lookup
+
+APPROVAL_REGEX_CACHE_SIZE = 512  # Compiled regex rule patterns kept per process
+APPROVAL_REGEX_TIME_BUDGET = 0.05  # Seconds of regex matching allowed per routing evaluation
+APPROVAL_REGEX_TIMEOUT_FALLBACK = "no_match"  # Either "no_match" or "fail" the submit
+APPROVAL_SIMULATION_BATCH_SIZE = 2000  # Requisitions loaded per batch in routing simulations
+APPROVAL_SIMULATION_WORKERS = 4  # Processes routing simulation batches, 1 runs them inline
+APPROVAL_SIMULATION_INLINE_ROWS = 20000  # Requisitions below which simulations route inline
+APPROVAL_ROUTING_TRACE_SAMPLE_RATE = 0.0  # Share of submits traced into the routing metrics
+APPROVAL_ROUTING_TRACE_TOP_CHAINS = 25  # Slowest traced chains listed by the routing metrics
+APPROVAL_BULK_ACTION_LIMIT = 5000  # Approvals accepted per bulk approve/reject/skip request
 
 # ---------------------------------------------------------------------
 # Logging
@@ -220,6 +248,7 @@ CELERY_WORKER_HIJACK_ROOT_LOGGER = False  # Prevent Celery from overriding Djang
 
 REST_FRAMEWORK = {
     "DEFAULT_AUTHENTICATION_CLASSES": [
+        "purly.user.authentication.SignedTokenAuthentication",
         "rest_framework.authentication.SessionAuthentication",
     ],
     "DEFAULT_PERMISSION_CLASSES": [
@@ -1,12 +1,13 @@
 from django.conf import settings
 from django.db import models
 
-from purly.base import ModelBase
+from purly.base import ModelBase, TrackedFieldsMixin
+from purly.filtering import trigram_index
 
 from .managers import AddressManager
 
 
-class Address(ModelBase):
+class Address(TrackedFieldsMixin, ModelBase):
     owner = models.ForeignKey(
         settings.AUTH_USER_MODEL, on_delete=models.PROTECT, related_name="addresses_owned"
     )
@@ -25,11 +26,15 @@ class Address(ModelBase):
 
     objects = AddressManager()
 
+    # A reassignment retires the previous owner's cached lists too.
+    tracked_fields = ("owner_id",)
+
     class Meta(ModelBase.Meta):
         db_table = "address"
         verbose_name = "address"
         verbose_name_plural = "addresses"
         ordering = ["-created_at"]
+        indexes = [trigram_index("name", "address_name_trgm")]
 
     def __str__(self):
         return f"{self.pk} - {self.name}"
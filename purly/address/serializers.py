@@ -1,12 +1,14 @@
 from rest_framework import serializers
 
-from purly.base import CustomToRepresentation
+from purly.base import CustomToRepresentation, SparseFieldsSerializerMixin
 from purly.user.serializers import UserSimpleDetailSerializer
 
 from .models import Address
 
 
-class AddressListSerializer(CustomToRepresentation, serializers.ModelSerializer):
+class AddressListSerializer(
+    SparseFieldsSerializerMixin, CustomToRepresentation, serializers.ModelSerializer
+):
     owner = UserSimpleDetailSerializer(read_only=True)
     created_by = UserSimpleDetailSerializer(read_only=True)
     updated_by = UserSimpleDetailSerializer(read_only=True)
@@ -51,6 +53,27 @@ class AddressSimpleDetailSerializer(CustomToRepresentation, serializers.ModelSer
         ]
 
 
+class AddressIncludedSerializer(CustomToRepresentation, serializers.ModelSerializer):
+    class Meta:
+        model = Address
+        fields = [
+            "id",
+            "owner",
+            "name",
+            "address_code",
+            "description",
+            "attention",
+            "phone",
+            "street1",
+            "street2",
+            "city",
+            "state",
+            "zip_code",
+            "country",
+            "delivery_instructions",
+        ]
+
+
 class AddressCreateSerializer(serializers.ModelSerializer):
     class Meta:
         model = Address
@@ -1,11 +1,17 @@
 from django.http import Http404
-from django_filters.rest_framework import DjangoFilterBackend
 from drf_spectacular.utils import extend_schema
 from rest_framework import exceptions, filters, generics, status, viewsets
 from rest_framework.permissions import IsAuthenticated
 from rest_framework.response import Response
 
+from purly.base import SparseFieldsViewMixin
+from purly.caching import CachedListMixin
+from purly.conditional import ConditionalGetMixin
+from purly.filtering import IndexedFilterBackend
+from purly.guard import QueryGuardMixin
 from purly.permissions import IsOwnerOrAdmin
+from purly.readers import CompiledListMixin
+from purly.user.models import CustomUser
 
 from .filters import ADDRESS_FILTER_FIELDS
 from .models import Address
@@ -18,15 +24,23 @@ from .serializers import (
 )
 
 
-class AddressViewSet(viewsets.ModelViewSet):
+class AddressViewSet(
+    CachedListMixin,
+    QueryGuardMixin,
+    ConditionalGetMixin,
+    CompiledListMixin,
+    SparseFieldsViewMixin,
+    viewsets.ModelViewSet,
+):
     http_method_names = ["get", "post", "put"]
     permission_classes = [IsOwnerOrAdmin]
     queryset = Address.objects.active().select_related("owner", "created_by", "updated_by")  # type: ignore
     serializer_class = AddressListSerializer
     pagination_class = AddressPagination
-    filter_backends = [DjangoFilterBackend, filters.OrderingFilter]
+    filter_backends = [IndexedFilterBackend, filters.OrderingFilter]
     filterset_fields = ADDRESS_FILTER_FIELDS
     ordering_fields = ["created_at", "updated_at"]
+    cache_models = (Address, CustomUser)
 
     def get_queryset(self):
         user = self.request.user
@@ -44,17 +58,7 @@ class AddressViewSet(viewsets.ModelViewSet):
 
     @extend_schema(summary="List addresses", request=None, responses=AddressListSerializer)
     def list(self, request, *args, **kwargs):
-        queryset = self.filter_queryset(self.get_queryset())
-        page = self.paginate_queryset(queryset)
-
-        if page is not None:
-            serializer = AddressListSerializer(page, many=True)
-
-            return self.get_paginated_response(serializer.data)
-
-        serializer = self.get_serializer(queryset, many=True)
-
-        return Response(serializer.data)
+        return super().list(request, *args, **kwargs)
 
     @extend_schema(
         summary="Create address", request=AddressCreateSerializer, responses=AddressDetailSerializer
@@ -73,6 +77,11 @@ class AddressViewSet(viewsets.ModelViewSet):
 
     @extend_schema(summary="Retrieve address", request=None, responses=AddressDetailSerializer)
     def retrieve(self, request, *args, **kwargs):
+        not_modified = self.not_modified()
+
+        if not_modified is not None:
+            return not_modified
+
         address = self.get_object()
         serializer = AddressDetailSerializer(address)
 
@@ -98,14 +107,25 @@ class AddressViewSet(viewsets.ModelViewSet):
     request=None,
     responses=AddressListSerializer,
 )
-class AddressMineListView(generics.ListAPIView):
+class AddressMineListView(
+    CachedListMixin,
+    QueryGuardMixin,
+    ConditionalGetMixin,
+    CompiledListMixin,
+    SparseFieldsViewMixin,
+    generics.ListAPIView,
+):
     http_method_names = ["get"]
     permission_classes = [IsAuthenticated]
     serializer_class = AddressListSerializer
     pagination_class = AddressPagination
-    filter_backends = [filters.OrderingFilter, DjangoFilterBackend]
+    filter_backends = [filters.OrderingFilter, IndexedFilterBackend]
     filterset_fields = ADDRESS_FILTER_FIELDS
     ordering_fields = ["created_at", "updated_at"]
+    cache_models = (Address, CustomUser)
+
+    def cache_owner_scoped(self):
+        return True
 
     def get_queryset(self):
         return (
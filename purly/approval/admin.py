@@ -2,6 +2,7 @@ from django.contrib import admin, messages
 from django.db import transaction
 from django.http import HttpResponseRedirect
 
+from config.pagination import EstimatedCountPaginator
 from purly.base import AdminBase
 from purly.requisition.models import Requisition
 from purly.user.models import CustomUser
@@ -23,14 +24,16 @@ from .models import (
     ApprovalStatusChoices,
 )
 from .services import (
-    check_fully_approved,
+    APPROVAL_SEQUENCE_FIELDS,
+    bulk_transition_approvals,
     check_if_current_approver,
-    notify_current_sequence,
     on_approve_skip,
     on_reject,
-    on_reject_requisition,
     retrieve_sequence_max,
+    sync_approval_sequence,
+    sync_approval_sequences,
 )
+from .simulation import simulate_routing
 
 
 def admin_action_results(self, request, action, changed):
@@ -47,16 +50,6 @@ def admin_action_results(self, request, action, changed):
             )
 
 
-def is_actionable(approval):
-    if (  # noqa: SIM103
-        check_if_current_approver(approval) is False
-        or approval.status != ApprovalStatusChoices.PENDING
-    ):
-        return False
-
-    return True
-
-
 class ApprovalChainHeaderRuleInline(admin.StackedInline):
     form = ApprovalChainHeaderRuleForm
     model = ApprovalChainHeaderRule
@@ -80,6 +73,8 @@ class ApprovalAdmin(AdminBase):
     autocomplete_fields = ["approver", "requisition"]
     change_form_template = "admin/approval/change_form.html"
     form = ApprovalForm
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
     fieldsets = (
         (
             "Basic Settings",
@@ -151,106 +146,29 @@ class ApprovalAdmin(AdminBase):
 
         return queryset.select_related("approver", "requisition", "created_by", "updated_by")
 
-    @transaction.atomic
     @admin.action(description="Set approved (only if current approver) for selected approvals")
     def approve(self, request, queryset):
-        changed = 0
-        requisitions = set()
-
-        for approval in queryset:
-            if not is_actionable(approval):
-                continue
-
-            on_approve_skip(
-                approval,
-                approval.requisition,
-                "approve",
-                request_user=request.user,
-                send_email=False,
-            )
-
-            changed += 1
-
-            requisitions.add(approval.requisition_id)
-
-        for requisition_id in requisitions:
-            transaction.on_commit(
-                lambda requisition_id=requisition_id: notify_current_sequence(
-                    Requisition.objects.get(pk=requisition_id)
-                )
-            )
-            transaction.on_commit(
-                lambda requisition_id=requisition_id: check_fully_approved(
-                    Requisition.objects.get(pk=requisition_id)
-                )
-            )
+        changed = bulk_transition_approvals(
+            list(queryset.values_list("id", flat=True)), "approve", request.user
+        )
 
-        admin_action_results(self, request, "approved", changed)
+        admin_action_results(self, request, "approved", len(changed))
 
-    @transaction.atomic
     @admin.action(description="Set rejected (only if current approver) for selected approvals")
     def reject(self, request, queryset):
-        changed = 0
-        requisitions = set()
-
-        for approval in queryset:
-            if not is_actionable(approval):
-                continue
-
-            on_reject(
-                approval, approval.requisition, request_user=request.user, update_requisition=False
-            )
-
-            changed += 1
+        changed = bulk_transition_approvals(
+            list(queryset.values_list("id", flat=True)), "reject", request.user
+        )
 
-            requisition_id = approval.requisition.id
+        admin_action_results(self, request, "rejected", len(changed))
 
-            if requisition_id not in requisitions:
-                transaction.on_commit(
-                    lambda approval=approval, requisition_id=requisition_id: on_reject_requisition(
-                        approval, Requisition.objects.get(pk=requisition_id)
-                    )
-                )
-
-                requisitions.add(requisition_id)
-
-        admin_action_results(self, request, "rejected", changed)
-
-    @transaction.atomic
     @admin.action(description="Set skipped (only if current approver) for selected approvals")
     def skip(self, request, queryset):
-        changed = 0
-        requisitions = set()
-
-        for approval in queryset:
-            if not is_actionable(approval):
-                continue
-
-            on_approve_skip(
-                approval,
-                approval.requisition,
-                "skip",
-                request_user=request.user,
-                send_email=False,
-            )
-
-            changed += 1
+        changed = bulk_transition_approvals(
+            list(queryset.values_list("id", flat=True)), "skip", request.user
+        )
 
-            requisitions.add(approval.requisition_id)
-
-        for requisition_id in requisitions:
-            transaction.on_commit(
-                lambda requisition_id=requisition_id: notify_current_sequence(
-                    Requisition.objects.get(pk=requisition_id)
-                )
-            )
-            transaction.on_commit(
-                lambda requisition_id=requisition_id: check_fully_approved(
-                    Requisition.objects.get(pk=requisition_id)
-                )
-            )
-
-        admin_action_results(self, request, "skipped", changed)
+        admin_action_results(self, request, "skipped", len(changed))
 
     @admin.action(description="Soft delete selected approvals")
     def delete(self, request, queryset):
@@ -312,6 +230,18 @@ class ApprovalAdmin(AdminBase):
 
         super().save_model(request, obj, form, change)
 
+        if change and not set(form.changed_data) & set(APPROVAL_SEQUENCE_FIELDS):
+            return
+
+        if obj.requisition_id:
+            sync_approval_sequence(obj.requisition)
+
+        # Moving an approval to another requisition changes the previous one's sequence too.
+        previous_requisition_id = form.initial.get("requisition")
+
+        if change and previous_requisition_id not in (None, obj.requisition_id):
+            sync_approval_sequences([previous_requisition_id])
+
     @transaction.atomic
     def response_change(self, request, obj):
         if "_approve" in request.POST or "_reject" in request.POST or "_skip" in request.POST:
@@ -365,7 +295,7 @@ class ApprovalAdmin(AdminBase):
 
 
 class ApprovalChainAdmin(AdminBase):
-    actions = ["activate", "deactivate", "delete"]
+    actions = ["activate", "deactivate", "simulate", "delete"]
     autocomplete_fields = ["approver", "approver_group"]
     form = ApprovalChainForm
     inlines = [ApprovalChainHeaderRuleInline, ApprovalChainLineRuleInline]
@@ -513,6 +443,42 @@ class ApprovalChainAdmin(AdminBase):
                     level=messages.SUCCESS,
                 )
 
+    @admin.action(description="Simulate routing with selected approval chains active")
+    def simulate(self, request, queryset):
+        chain_ids = [approval_chain.id for approval_chain in queryset if not approval_chain.deleted]
+
+        if not chain_ids:
+            self.message_user(request, "No approval chains were eligible.", level=messages.WARNING)
+
+            return
+
+        *_, summary = simulate_routing(Requisition.objects.active(), chain_ids)  # type: ignore
+
+        self.message_user(
+            request,
+            f"Simulated {summary['requisitions']} requisitions: {summary['changed']} would route "
+            f"differently ({summary['errors']} could not be routed).",
+            level=messages.SUCCESS,
+        )
+
+        for approval_chain in summary["chains"]:
+            if approval_chain["id"] in chain_ids:
+                self.message_user(
+                    request,
+                    f"Approval chain {approval_chain['name']}: {approval_chain['baseline']} -> "
+                    f"{approval_chain['proposed']} requisitions.",
+                    level=messages.INFO,
+                )
+
+        for approver in summary["approvers"]:
+            if approver["baseline"] != approver["proposed"]:
+                self.message_user(
+                    request,
+                    f"Approver {approver['username']}: {approver['baseline']} -> "
+                    f"{approver['proposed']} approvals.",
+                    level=messages.INFO,
+                )
+
     @admin.action(description="Soft delete selected approval chains")
     def delete(self, request, queryset):
         admin_action_delete(self, request, queryset, "approval chains")
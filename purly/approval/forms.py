@@ -6,6 +6,7 @@ from django.conf import settings
 from django.contrib.postgres.forms import SimpleArrayField
 from django.core.exceptions import ValidationError
 
+from purly.approval.routing import compile_pattern
 from purly.approval.services import retrieve_sequence_max
 from purly.requisition.models import RequisitionStatusChoices
 
@@ -230,7 +231,7 @@ class ApprovalChainRuleForm(forms.ModelForm):
         if lookup == LookupStringChoices.REGEX and value:
             for pattern in value:
                 try:
-                    re.compile(pattern)
+                    compile_pattern(pattern)
                 except re.error as e:
                     raise ValidationError(
                         {"value": f"There was an error with regex pattern: {e}."}
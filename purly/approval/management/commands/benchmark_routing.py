@@ -0,0 +1,354 @@
+import random
+import time
+from datetime import date
+from decimal import Decimal
+from types import SimpleNamespace
+
+from django.core.management.base import BaseCommand, CommandError
+
+from purly.approval.models import OperatorChoices
+from purly.approval.routing import (
+    LINE_FIELD_GETTERS,
+    CompiledChain,
+    CompiledHeaderRule,
+    CompiledLineRule,
+    LineColumns,
+    RoutingPlan,
+    combine,
+)
+
+SUPPLIERS = [f"Supplier {i}" for i in range(2000)]
+PROJECT_CODES = [f"PRJ-{i}" for i in range(500)]
+CATEGORIES = [f"Category {i}" for i in range(300)]
+COUNTRIES = ["US", "CA", "MX", "GB", "DE", "FR", "JP"]
+WORDS = [f"part{i:04d}" for i in range(5000)]
+
+# Share of generated chains per shape, as cumulative thresholds over random() in [0, 1).
+UNBOUNDED_SHARE = 0.3
+SUPPLIER_SHARE = 0.5
+PROJECT_SHARE = 0.65
+LINE_SHARE = 0.8
+SUBSTRING_SHARE = 0.9
+
+
+def random_amount_range(rng):
+    min_amount = Decimal(rng.randint(1, 50_000))
+    max_amount = (
+        None if rng.random() < UNBOUNDED_SHARE else min_amount + Decimal(rng.randint(1, 50_000))
+    )
+
+    return min_amount, max_amount
+
+
+def build_chain(rng, chain_id):
+    min_amount, max_amount = random_amount_range(rng)
+    shape = rng.random()
+
+    header_rules = []
+    line_rules = []
+    header_rule_logic = OperatorChoices.AND
+
+    if shape < SUPPLIER_SHARE:
+        header_rules.append(CompiledHeaderRule("supplier", "exact", [rng.choice(SUPPLIERS)]))
+    elif shape < PROJECT_SHARE:
+        header_rules.append(CompiledHeaderRule("currency", "iexact", ["USD"]))
+        header_rules.append(
+            CompiledHeaderRule("project_code", "exact", rng.sample(PROJECT_CODES, 2))
+        )
+    elif shape < LINE_SHARE:
+        line_rules.append(CompiledLineRule("any", "category", "iexact", [rng.choice(CATEGORIES)]))
+        line_rules.append(CompiledLineRule("all", "ship_to_country", "exact", COUNTRIES[:3]))
+    elif shape < SUBSTRING_SHARE:
+        header_rule_logic = OperatorChoices.OR
+        header_rules.append(CompiledHeaderRule("justification", "icontains", ["urgent"]))
+        header_rules.append(CompiledHeaderRule("name", "istartswith", ["capex"]))
+    else:
+        min_amount = Decimal(rng.randint(1, 100_000))
+        max_amount = min_amount + Decimal(rng.randint(1, 500))
+
+    return CompiledChain(
+        id=chain_id,
+        name=f"Chain {chain_id}",
+        sequence_number=rng.randint(1, 1000),
+        min_amount=min_amount,
+        max_amount=max_amount,
+        header_rules=header_rules,
+        line_rules=line_rules,
+        header_rule_logic=header_rule_logic,
+        approver_id=1,
+    )
+
+
+def build_requisition(rng, number_of_lines):
+    header = {
+        "supplier": rng.choice(SUPPLIERS),
+        "currency": "usd",
+        "project_code": rng.choice(PROJECT_CODES),
+        "justification": rng.choice(["Urgent replacement", "Quarterly restock"]),
+        "name": rng.choice(["Capex laptops", "Office supplies"]),
+    }
+    lines = [
+        {"category": rng.choice(CATEGORIES), "ship_to_country": rng.choice(COUNTRIES)}
+        for _ in range(number_of_lines)
+    ]
+
+    return header, lines, Decimal(rng.randint(1, 100_000))
+
+
+def build_substring_chain(rng, chain_id):
+    return CompiledChain(
+        id=chain_id,
+        name=f"Chain {chain_id}",
+        sequence_number=rng.randint(1, 1000),
+        min_amount=Decimal(1),
+        header_rules=[CompiledHeaderRule("supplier", "istartswith", rng.sample(SUPPLIERS, 2))],
+        line_rules=[
+            CompiledLineRule("any", "description", "icontains", rng.sample(WORDS, 3)),
+            CompiledLineRule("any", "manufacturer", "endswith", [f"{chain_id} Inc"]),
+        ],
+        header_rule_logic=OperatorChoices.OR,
+        line_rule_logic=OperatorChoices.OR,
+        cross_rule_logic=OperatorChoices.OR,
+        approver_id=1,
+    )
+
+
+def build_substring_requisition(rng, number_of_lines):
+    header = {"supplier": rng.choice(SUPPLIERS)}
+    lines = [
+        {
+            "description": " ".join(rng.sample(WORDS, 12)).upper(),
+            "manufacturer": f"Maker {rng.randint(1, 20_000)} Inc",
+        }
+        for _ in range(number_of_lines)
+    ]
+
+    return header, lines, Decimal(rng.randint(1, 100_000))
+
+
+def build_line_rule_chain(rng, chain_id):
+    line_rules = [
+        CompiledLineRule("any", "category", "iexact", rng.sample(CATEGORIES, 3)),
+        CompiledLineRule("all", "ship_to_country", "exact", rng.sample(COUNTRIES, 5)),
+        CompiledLineRule("any", "line_total", "gt", [str(rng.randint(1, 5_000))]),
+        CompiledLineRule("all", "unit_price", "lte", [str(rng.randint(500, 5_000))]),
+        CompiledLineRule("any", "manufacturer", "isnull", []),
+        CompiledLineRule("any", "description", "icontains", rng.sample(WORDS, 2)),
+    ]
+
+    return CompiledChain(
+        id=chain_id,
+        name=f"Chain {chain_id}",
+        sequence_number=chain_id,
+        min_amount=Decimal(1),
+        line_rules=rng.sample(line_rules, 3),
+        line_rule_logic=rng.choice([OperatorChoices.AND, OperatorChoices.OR]),
+        approver_id=1,
+    )
+
+
+def build_line_objects(rng, number_of_lines):
+    return [
+        SimpleNamespace(
+            category=rng.choice(CATEGORIES),
+            description=" ".join(rng.sample(WORDS, 6)),
+            line_total=Decimal(rng.randint(1, 5_000)),
+            manufacturer=rng.choice(["", "Acme", "Globex"]),
+            manufacturer_part_number="MPN-1",
+            payment_term="net_30",
+            unit_of_measure="each",
+            unit_price=Decimal(rng.randint(1, 5_000)),
+            ship_to=SimpleNamespace(
+                address_code="HQ",
+                attention="Receiving",
+                city="Austin",
+                country=rng.choice(COUNTRIES),
+                delivery_instructions="",
+                description="",
+                name="Headquarters",
+                phone="",
+                state="TX",
+                street1="1 Main St",
+                street2="",
+                zip_code="78701",
+            ),
+        )
+        for _ in range(number_of_lines)
+    ]
+
+
+def row_wise_evaluation(plan, lines, total_amount, today):
+    """Evaluate each line rule against each line through a full field map, as routing used to."""
+    matched = []
+
+    for chain in plan.chains:
+        if not chain.is_current(today) or not chain.in_amount_range(total_amount):
+            continue
+
+        results = []
+
+        for rule in chain.line_rules:
+            values = (
+                rule.lookup(
+                    {field: getter(line) for field, getter in LINE_FIELD_GETTERS.items()}.get(
+                        rule.field
+                    )
+                )
+                for line in lines
+            )
+
+            results.append(all(values) if rule.match_mode == "all" else any(values))
+
+        if combine(chain.line_rule_logic, results):
+            matched.append(chain.id)
+
+    return matched
+
+
+def time_evaluation(plan, requisitions, today, *, use_index):
+    results = []
+
+    start = time.perf_counter()
+
+    for header, lines, total_amount in requisitions:
+        matched = plan.evaluate(header, lines, total_amount, today, use_index=use_index)
+
+        results.append([chain.id for chain in matched])
+
+    return time.perf_counter() - start, results
+
+
+class Command(BaseCommand):
+    help = "Benchmark indexed and automaton approval routing against plain synthetic scans."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--chains", default="100,1000,10000")
+        parser.add_argument("--requisitions", type=int, default=200)
+        parser.add_argument("--lines", type=int, default=20)
+        parser.add_argument("--substring-chains", default="1000")
+        parser.add_argument("--substring-lines", type=int, default=250)
+        parser.add_argument("--line-rule-chains", type=int, default=20)
+        parser.add_argument("--seed", type=int, default=42)
+
+    def handle(self, *args, **kwargs):
+        rng = random.Random(kwargs["seed"])
+        today = date.today()  # noqa: DTZ011
+
+        requisitions = [
+            build_requisition(rng, kwargs["lines"]) for _ in range(kwargs["requisitions"])
+        ]
+
+        for size in [int(value) for value in kwargs["chains"].split(",")]:
+            plan = RoutingPlan(
+                "benchmark", [build_chain(rng, chain_id) for chain_id in range(1, size + 1)]
+            )
+
+            linear_seconds, linear_results = time_evaluation(
+                plan, requisitions, today, use_index=False
+            )
+            indexed_seconds, indexed_results = time_evaluation(
+                plan, requisitions, today, use_index=True
+            )
+
+            if linear_results != indexed_results:
+                raise CommandError(f"Indexed routing diverged from the linear scan ({size}).")
+
+            candidates = sum(
+                len(
+                    plan.index.candidates(
+                        header, LineColumns.from_dicts(lines, plan.line_fields), total_amount
+                    )
+                )
+                for header, lines, total_amount in requisitions
+            ) / len(requisitions)
+
+            self.stdout.write(
+                f"chains={size} linear={linear_seconds / len(requisitions) * 1000:.3f}ms "
+                f"indexed={indexed_seconds / len(requisitions) * 1000:.3f}ms "
+                f"candidates={candidates:.1f} "
+                f"speedup={linear_seconds / indexed_seconds:.1f}x"
+            )
+
+        self.stdout.write(self.style.SUCCESS("Indexed results matched the linear scan."))
+
+        self.benchmark_substrings(rng, today, kwargs)
+        self.benchmark_line_columns(rng, today, kwargs)
+
+    def benchmark_substrings(self, rng, today, kwargs):
+        requisitions = [
+            build_substring_requisition(rng, kwargs["substring_lines"]) for _ in range(10)
+        ]
+
+        for size in [int(value) for value in kwargs["substring_chains"].split(",") if value]:
+            chain_seed = rng.random()
+
+            def build_chains(size=size, chain_seed=chain_seed):
+                chain_rng = random.Random(chain_seed)
+
+                return [
+                    build_substring_chain(chain_rng, chain_id) for chain_id in range(1, size + 1)
+                ]
+
+            scan_plan = RoutingPlan("benchmark", build_chains(), substring_automata=False)
+            automaton_plan = RoutingPlan("benchmark", build_chains())
+
+            scan_seconds, scan_results = time_evaluation(
+                scan_plan, requisitions, today, use_index=False
+            )
+            automaton_seconds, automaton_results = time_evaluation(
+                automaton_plan, requisitions, today, use_index=False
+            )
+
+            if scan_results != automaton_results:
+                raise CommandError(f"Substring automata diverged from the per-rule scan ({size}).")
+
+            self.stdout.write(
+                f"substring chains={size} lines={kwargs['substring_lines']} "
+                f"scan={scan_seconds / len(requisitions) * 1000:.3f}ms "
+                f"automaton={automaton_seconds / len(requisitions) * 1000:.3f}ms "
+                f"speedup={scan_seconds / automaton_seconds:.1f}x"
+            )
+
+        self.stdout.write(self.style.SUCCESS("Substring automata matched the per-rule scan."))
+
+    def benchmark_line_columns(self, rng, today, kwargs):
+        plan = RoutingPlan(
+            "benchmark",
+            [
+                build_line_rule_chain(rng, chain_id)
+                for chain_id in range(1, kwargs["line_rule_chains"] + 1)
+            ],
+        )
+        requisitions = [build_line_objects(rng, kwargs["substring_lines"]) for _ in range(10)]
+        total_amount = Decimal(100)
+        rule_count = sum(len(chain.line_rules) for chain in plan.chains)
+
+        start = time.perf_counter()
+        row_results = [
+            row_wise_evaluation(plan, lines, total_amount, today) for lines in requisitions
+        ]
+        row_seconds = time.perf_counter() - start
+
+        start = time.perf_counter()
+        column_results = [
+            [
+                chain.id
+                for chain in plan.evaluate(
+                    {}, plan.line_columns(lines), total_amount, today, use_index=False
+                )
+            ]
+            for lines in requisitions
+        ]
+        column_seconds = time.perf_counter() - start
+
+        if row_results != column_results:
+            raise CommandError("Columnar line evaluation diverged from the row-wise scan.")
+
+        self.stdout.write(
+            f"line rules={rule_count} lines={kwargs['substring_lines']} "
+            f"row-wise={row_seconds / len(requisitions) * 1000:.3f}ms "
+            f"columnar={column_seconds / len(requisitions) * 1000:.3f}ms "
+            f"speedup={row_seconds / column_seconds:.1f}x"
+        )
+
+        self.stdout.write(self.style.SUCCESS("Columnar results matched the row-wise scan."))
@@ -0,0 +1,71 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+
+from purly.approval.services import pending_approval_summary
+from purly.requisition.models import Requisition
+
+
+class Command(BaseCommand):
+    help = "Backfill or verify the current approval sequence and pending count of requisitions."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--verify", action="store_true", help="Report drift, write nothing.")
+        parser.add_argument("--batch-size", type=int, default=2000)
+
+    def handle(self, *args, **kwargs):
+        batch_size = kwargs["batch_size"]
+        last_id = 0
+        checked = drifted = 0
+
+        while True:
+            requisitions = list(
+                Requisition.objects.filter(id__gt=last_id)
+                .order_by("id")
+                .only("id", "current_sequence_number", "pending_approval_count")[:batch_size]
+            )
+
+            if not requisitions:
+                break
+
+            last_id = requisitions[-1].id
+            summary = pending_approval_summary([requisition.id for requisition in requisitions])
+            changed = []
+
+            for requisition in requisitions:
+                expected = summary.get(requisition.id, (None, 0))
+
+                if (requisition.current_sequence_number, requisition.pending_approval_count) == (
+                    expected
+                ):
+                    continue
+
+                if kwargs["verify"]:
+                    self.stdout.write(
+                        f"requisition={requisition.id} "
+                        f"stored={requisition.current_sequence_number},"
+                        f"{requisition.pending_approval_count} "
+                        f"expected={expected[0]},{expected[1]}"
+                    )
+
+                requisition.current_sequence_number, requisition.pending_approval_count = expected
+
+                changed.append(requisition)
+
+            checked += len(requisitions)
+            drifted += len(changed)
+
+            if changed and not kwargs["verify"]:
+                with transaction.atomic():
+                    Requisition.objects.bulk_update(
+                        changed, ["current_sequence_number", "pending_approval_count"]
+                    )
+
+        if kwargs["verify"]:
+            if drifted:
+                raise CommandError(f"{drifted} of {checked} requisitions have drifted sequences.")
+
+            self.stdout.write(self.style.SUCCESS(f"Checked {checked} requisitions, none drifted."))
+
+            return
+
+        self.stdout.write(self.style.SUCCESS(f"Checked {checked} requisitions, {drifted} updated."))
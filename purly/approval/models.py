@@ -3,9 +3,11 @@ from decimal import Decimal
 from django.conf import settings
 from django.contrib.postgres.fields import ArrayField
 from django.core.validators import MaxValueValidator, MinValueValidator
-from django.db import models
+from django.db import models, transaction
+from django.db.models.signals import m2m_changed, post_delete, post_save
+from django.dispatch import receiver
 
-from purly.base import ModelBase
+from purly.base import ModelBase, TrackedFieldsMixin
 from purly.requisition.models import Requisition
 
 from .managers import (
@@ -104,7 +106,7 @@ class ApprovalChainModeChoices(models.TextChoices):
     GROUP = ("group", "group")
 
 
-class Approval(ModelBase):
+class Approval(TrackedFieldsMixin, ModelBase):
     requisition = models.ForeignKey(Requisition, on_delete=models.PROTECT, related_name="approvals")
     approver = models.ForeignKey(
         settings.AUTH_USER_MODEL, on_delete=models.PROTECT, related_name="approvals_as_approver"
@@ -125,6 +127,9 @@ class Approval(ModelBase):
 
     objects = ApprovalManager()
 
+    # A reassignment retires the previous owner's cached lists too.
+    tracked_fields = ("approver_id",)
+
     class Meta(ModelBase.Meta):
         db_table = "approval"
         verbose_name = "approval"
@@ -307,3 +312,17 @@ class ApprovalChainLineRule(ModelBase):
             return f"For {self.match_mode} line, {field} field {lookup} {value}"
 
         return f"For {self.match_mode} lines, {field} field {lookup} {value}"
+
+
+@receiver([post_save, post_delete], sender=ApprovalChain)
+@receiver([post_save, post_delete], sender=ApprovalChainHeaderRule)
+@receiver([post_save, post_delete], sender=ApprovalChainLineRule)
+@receiver([post_save, post_delete], sender=ApprovalGroup)
+@receiver(m2m_changed, sender=ApprovalGroup.approver.through)
+def invalidate_routing_plan(sender, **kwargs):
+    from .routing import bump_routing_version
+
+    bump_routing_version()
+
+    # Bump again once committed so no worker keeps a plan compiled from uncommitted rows.
+    transaction.on_commit(bump_routing_version)
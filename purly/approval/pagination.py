@@ -1,5 +1,6 @@
-from config.pagination import CustomPagination
+from config.pagination import KeysetPagination
 
 
-class ApprovalPagination(CustomPagination):
+class ApprovalPagination(KeysetPagination):
     page_size = 50
+    estimate_count = True
@@ -0,0 +1,1428 @@
+import contextlib
+import contextvars
+import functools
+import operator
+import random
+import re
+import signal
+import threading
+import time
+import uuid
+from collections import deque
+from decimal import Decimal, InvalidOperation
+
+from django.conf import settings
+from django.core.cache import cache
+from django.utils import timezone
+
+from purly.metrics import increment, read_counters
+
+from .models import (
+    ApprovalChain,
+    ApprovalChainModeChoices,
+    HeaderFieldStringChoices,
+    LineFieldNumberChoices,
+    LineFieldStringChoices,
+    LookupNumberChoices,
+    LookupStringChoices,
+    MatchModeChoices,
+    OperatorChoices,
+)
+
+ROUTING_VERSION_CACHE_KEY = "approval:routing_version"
+
+REGEX_BUDGET_EXCEEDED_METRIC = "approval.routing.regex_budget_exceeded"
+REGEX_FALLBACK_FAIL = "fail"
+
+ROUTING_TRACES_METRIC = "approval.routing.traces"
+
+ROUTING_METRICS = [REGEX_BUDGET_EXCEEDED_METRIC, ROUTING_TRACES_METRIC]
+
+# Per chain counters recorded by routing traces, see chain_metric().
+CHAIN_TRACE_COUNTERS = ("evaluations", "matches", "microseconds")
+
+
+def project_attribute(requisition, name):
+    return getattr(requisition.project, name) if requisition.project else None
+
+
+HEADER_FIELD_GETTERS = {
+    HeaderFieldStringChoices.CURRENCY: operator.attrgetter("currency"),
+    HeaderFieldStringChoices.EXTERNAL_REFERENCE: operator.attrgetter("external_reference"),
+    HeaderFieldStringChoices.JUSTIFICATION: operator.attrgetter("justification"),
+    HeaderFieldStringChoices.NAME: operator.attrgetter("name"),
+    HeaderFieldStringChoices.OWNER: operator.attrgetter("owner.username"),
+    HeaderFieldStringChoices.OWNER_EMAIL: operator.attrgetter("owner.email"),
+    HeaderFieldStringChoices.OWNER_FIRST_NAME: operator.attrgetter("owner.first_name"),
+    HeaderFieldStringChoices.OWNER_LAST_NAME: operator.attrgetter("owner.last_name"),
+    HeaderFieldStringChoices.PROJECT_NAME: lambda obj: project_attribute(obj, "name"),
+    HeaderFieldStringChoices.PROJECT_CODE: lambda obj: project_attribute(obj, "project_code"),
+    HeaderFieldStringChoices.PROJECT_DESCRIPTION: lambda obj: project_attribute(obj, "description"),
+    HeaderFieldStringChoices.SUPPLIER: operator.attrgetter("supplier"),
+}
+
+LINE_FIELD_GETTERS = {
+    LineFieldStringChoices.CATEGORY: operator.attrgetter("category"),
+    LineFieldStringChoices.DESCRIPTION: operator.attrgetter("description"),
+    LineFieldNumberChoices.LINE_TOTAL: operator.attrgetter("line_total"),
+    LineFieldStringChoices.MANUFACTURER: operator.attrgetter("manufacturer"),
+    LineFieldStringChoices.MANUFACTURER_PART_NUMBER: operator.attrgetter(
+        "manufacturer_part_number"
+    ),
+    LineFieldStringChoices.PAYMENT_TERM: operator.attrgetter("payment_term"),
+    LineFieldStringChoices.SHIP_TO_ATTENTION: operator.attrgetter("ship_to.attention"),
+    LineFieldStringChoices.SHIP_TO_CITY: operator.attrgetter("ship_to.city"),
+    LineFieldStringChoices.SHIP_TO_CODE: operator.attrgetter("ship_to.address_code"),
+    LineFieldStringChoices.SHIP_TO_COUNTRY: operator.attrgetter("ship_to.country"),
+    LineFieldStringChoices.SHIP_TO_DELIVERY_INSTRUCTIONS: operator.attrgetter(
+        "ship_to.delivery_instructions"
+    ),
+    LineFieldStringChoices.SHIP_TO_DESCRIPTION: operator.attrgetter("ship_to.description"),
+    LineFieldStringChoices.SHIP_TO_NAME: operator.attrgetter("ship_to.name"),
+    LineFieldStringChoices.SHIP_TO_PHONE: operator.attrgetter("ship_to.phone"),
+    LineFieldStringChoices.SHIP_TO_STATE: operator.attrgetter("ship_to.state"),
+    LineFieldStringChoices.SHIP_TO_STREET1: operator.attrgetter("ship_to.street1"),
+    LineFieldStringChoices.SHIP_TO_STREET2: operator.attrgetter("ship_to.street2"),
+    LineFieldStringChoices.SHIP_TO_ZIP_CODE: operator.attrgetter("ship_to.zip_code"),
+    LineFieldStringChoices.UNIT_OF_MEASURE: operator.attrgetter("unit_of_measure"),
+    LineFieldNumberChoices.UNIT_PRICE: operator.attrgetter("unit_price"),
+}
+
+
+# ORM paths of the same fields, for loading snapshots straight from values() rows.
+HEADER_FIELD_PATHS = {
+    HeaderFieldStringChoices.CURRENCY: "currency",
+    HeaderFieldStringChoices.EXTERNAL_REFERENCE: "external_reference",
+    HeaderFieldStringChoices.JUSTIFICATION: "justification",
+    HeaderFieldStringChoices.NAME: "name",
+    HeaderFieldStringChoices.OWNER: "owner__username",
+    HeaderFieldStringChoices.OWNER_EMAIL: "owner__email",
+    HeaderFieldStringChoices.OWNER_FIRST_NAME: "owner__first_name",
+    HeaderFieldStringChoices.OWNER_LAST_NAME: "owner__last_name",
+    HeaderFieldStringChoices.PROJECT_NAME: "project__name",
+    HeaderFieldStringChoices.PROJECT_CODE: "project__project_code",
+    HeaderFieldStringChoices.PROJECT_DESCRIPTION: "project__description",
+    HeaderFieldStringChoices.SUPPLIER: "supplier",
+}
+
+LINE_FIELD_PATHS = {
+    LineFieldStringChoices.CATEGORY: "category",
+    LineFieldStringChoices.DESCRIPTION: "description",
+    LineFieldNumberChoices.LINE_TOTAL: "line_total",
+    LineFieldStringChoices.MANUFACTURER: "manufacturer",
+    LineFieldStringChoices.MANUFACTURER_PART_NUMBER: "manufacturer_part_number",
+    LineFieldStringChoices.PAYMENT_TERM: "payment_term",
+    LineFieldStringChoices.SHIP_TO_ATTENTION: "ship_to__attention",
+    LineFieldStringChoices.SHIP_TO_CITY: "ship_to__city",
+    LineFieldStringChoices.SHIP_TO_CODE: "ship_to__address_code",
+    LineFieldStringChoices.SHIP_TO_COUNTRY: "ship_to__country",
+    LineFieldStringChoices.SHIP_TO_DELIVERY_INSTRUCTIONS: "ship_to__delivery_instructions",
+    LineFieldStringChoices.SHIP_TO_DESCRIPTION: "ship_to__description",
+    LineFieldStringChoices.SHIP_TO_NAME: "ship_to__name",
+    LineFieldStringChoices.SHIP_TO_PHONE: "ship_to__phone",
+    LineFieldStringChoices.SHIP_TO_STATE: "ship_to__state",
+    LineFieldStringChoices.SHIP_TO_STREET1: "ship_to__street1",
+    LineFieldStringChoices.SHIP_TO_STREET2: "ship_to__street2",
+    LineFieldStringChoices.SHIP_TO_ZIP_CODE: "ship_to__zip_code",
+    LineFieldStringChoices.UNIT_OF_MEASURE: "unit_of_measure",
+    LineFieldNumberChoices.UNIT_PRICE: "unit_price",
+}
+
+
+class Lookup:
+    """A rule lookup with its rule values parsed once, called with a field value."""
+
+    __slots__ = ("values",)
+
+    def __init__(self, values):
+        self.values = values
+
+    def __call__(self, value):
+        if value is None:
+            return False
+
+        return self.test(value)
+
+    def test(self, value):
+        return False
+
+    def any_of(self, column):
+        return any(self(value) for value in column.values)
+
+    def all_of(self, column):
+        return all(self(value) for value in column.values)
+
+
+class ExactLookup(Lookup):
+    __slots__ = ()
+
+    def test(self, value):
+        return value in self.values
+
+    def any_of(self, column):
+        return not self.values.isdisjoint(column.values)
+
+    def all_of(self, column):
+        return column.values <= self.values
+
+
+class IExactLookup(Lookup):
+    __slots__ = ()
+
+    def test(self, value):
+        return isinstance(value, str) and value.lower() in self.values
+
+    def any_of(self, column):
+        return not self.values.isdisjoint(column.lowered)
+
+    def all_of(self, column):
+        return not column.has_non_strings and column.lowered <= self.values
+
+
+SEPARATOR = "\x00"
+
+
+class SubstringLookup(Lookup):
+    """Substring lookups, answering ANY over a column with one search of its joined values."""
+
+    __slots__ = ()
+
+    fold_case = False
+    anchor_start = False
+    anchor_end = False
+
+    def any_of(self, column):
+        if column.others or any(SEPARATOR in val for val in self.values):
+            return super().any_of(column)
+
+        if not column.strings:
+            return False
+
+        text = column.joined_lowered if self.fold_case else column.joined
+        start = SEPARATOR if self.anchor_start else ""
+        end = SEPARATOR if self.anchor_end else ""
+
+        return any(f"{start}{val}{end}" in text for val in self.values)
+
+
+class ContainsLookup(SubstringLookup):
+    __slots__ = ()
+
+    def test(self, value):
+        return any(val in value for val in self.values)
+
+
+class IContainsLookup(SubstringLookup):
+    __slots__ = ()
+
+    fold_case = True
+
+    def test(self, value):
+        if not isinstance(value, str):
+            return False
+
+        value = value.lower()
+
+        return any(val in value for val in self.values)
+
+
+class StartsWithLookup(SubstringLookup):
+    __slots__ = ()
+
+    anchor_start = True
+
+    def test(self, value):
+        return isinstance(value, str) and value.startswith(self.values)
+
+
+class IStartsWithLookup(SubstringLookup):
+    __slots__ = ()
+
+    fold_case = True
+    anchor_start = True
+
+    def test(self, value):
+        return isinstance(value, str) and value.lower().startswith(self.values)
+
+
+class EndsWithLookup(SubstringLookup):
+    __slots__ = ()
+
+    anchor_end = True
+
+    def test(self, value):
+        return isinstance(value, str) and value.endswith(self.values)
+
+
+class IEndsWithLookup(SubstringLookup):
+    __slots__ = ()
+
+    fold_case = True
+    anchor_end = True
+
+    def test(self, value):
+        return isinstance(value, str) and value.lower().endswith(self.values)
+
+
+@functools.lru_cache(maxsize=settings.APPROVAL_REGEX_CACHE_SIZE)
+def compile_pattern(pattern):
+    return re.compile(pattern)
+
+
+class RegexBudgetExceededError(Exception):
+    pass
+
+
+class RegexTimeoutError(Exception):
+    pass
+
+
+def raise_regex_timeout(signum, frame):
+    raise RegexTimeoutError
+
+
+class RegexBudget:
+    """Regex matching time left for one routing evaluation.
+
+    On the main thread the budget is enforced with a SIGALRM timer that interrupts
+    the match; elsewhere it is only checked once each match returns.
+    """
+
+    def __init__(self, seconds, fallback):
+        self.remaining = seconds
+        self.fallback = fallback
+        self.exceeded = False
+
+    def search(self, pattern, value):
+        if not self.exceeded:
+            start = time.perf_counter()
+
+            try:
+                found = self.timed_search(pattern, value)
+            except RegexTimeoutError:
+                found = False
+                self.remaining = 0
+            else:
+                self.remaining -= time.perf_counter() - start
+
+            if self.remaining > 0:
+                return found
+
+            self.exceeded = True
+
+            increment(REGEX_BUDGET_EXCEEDED_METRIC)
+
+        if self.fallback == REGEX_FALLBACK_FAIL:
+            raise RegexBudgetExceededError
+
+        return False
+
+    def timed_search(self, pattern, value):
+        if threading.current_thread() is not threading.main_thread():
+            return pattern.search(value) is not None
+
+        handler = signal.signal(signal.SIGALRM, raise_regex_timeout)
+
+        signal.setitimer(signal.ITIMER_REAL, self.remaining)
+
+        try:
+            return pattern.search(value) is not None
+        finally:
+            signal.setitimer(signal.ITIMER_REAL, 0)
+            signal.signal(signal.SIGALRM, handler)
+
+
+regex_budget = contextvars.ContextVar("regex_budget", default=None)
+
+
+class RegexLookup(Lookup):
+    __slots__ = ()
+
+    def test(self, value):
+        budget = regex_budget.get()
+
+        if budget is None:
+            return any(pattern.search(value) for pattern in self.values)
+
+        return any(budget.search(pattern, value) for pattern in self.values)
+
+
+NULL_VALUES = frozenset((None, ""))
+
+
+class IsNullLookup(Lookup):
+    __slots__ = ()
+
+    def __call__(self, value):
+        return value in NULL_VALUES
+
+    def any_of(self, column):
+        return not column.values.isdisjoint(NULL_VALUES)
+
+    def all_of(self, column):
+        return column.values <= NULL_VALUES
+
+
+class NumberLookup(Lookup):
+    __slots__ = ("compare",)
+
+    def __init__(self, values, compare):
+        super().__init__(values)
+
+        self.compare = compare
+
+    def test(self, value):
+        return self.compare(value, self.values)
+
+    def any_of(self, column):
+        if self.compare not in ORDERING_EXTREMES or not column.numbers:
+            return super().any_of(column)
+
+        extreme, _ = ORDERING_EXTREMES[self.compare]
+
+        return self.compare(extreme(column.numbers), self.values)
+
+    def all_of(self, column):
+        if self.compare not in ORDERING_EXTREMES or not column.numbers:
+            return super().all_of(column)
+
+        _, extreme = ORDERING_EXTREMES[self.compare]
+
+        return None not in column.values and self.compare(extreme(column.numbers), self.values)
+
+
+# The value deciding ANY and ALL for each ordering comparison, e.g. ANY line > x iff max > x.
+ORDERING_EXTREMES = {
+    operator.gt: (max, min),
+    operator.ge: (max, min),
+    operator.lt: (min, max),
+    operator.le: (min, max),
+}
+
+NUMBER_COMPARISONS = {
+    LookupNumberChoices.EQUAL: operator.eq,
+    LookupNumberChoices.NOT_EQUAL: operator.ne,
+    LookupNumberChoices.GT: operator.gt,
+    LookupNumberChoices.GTE: operator.ge,
+    LookupNumberChoices.LT: operator.lt,
+    LookupNumberChoices.LTE: operator.le,
+}
+
+
+def compile_lookup(rule_lookup, rule_value):  # noqa: PLR0911, PLR0912
+    match rule_lookup:
+        case LookupStringChoices.EXACT:
+            return ExactLookup(frozenset(rule_value))
+        case LookupStringChoices.IEXACT:
+            return IExactLookup(frozenset(val.lower() for val in rule_value))
+        case LookupStringChoices.CONTAINS:
+            return ContainsLookup(tuple(rule_value))
+        case LookupStringChoices.ICONTAINS:
+            return IContainsLookup(tuple(val.lower() for val in rule_value))
+        case LookupStringChoices.STARTS_WITH:
+            return StartsWithLookup(tuple(rule_value))
+        case LookupStringChoices.ISTARTS_WITH:
+            return IStartsWithLookup(tuple(val.lower() for val in rule_value))
+        case LookupStringChoices.ENDS_WITH:
+            return EndsWithLookup(tuple(rule_value))
+        case LookupStringChoices.IENDS_WITH:
+            return IEndsWithLookup(tuple(val.lower() for val in rule_value))
+        case LookupStringChoices.REGEX:
+            try:
+                return RegexLookup(tuple(compile_pattern(val) for val in rule_value))
+            except re.error:
+                return Lookup(())
+        case LookupStringChoices.IS_NULL:
+            return IsNullLookup(())
+
+    if rule_lookup in NUMBER_COMPARISONS and rule_value:
+        try:
+            threshold = Decimal(rule_value[0])
+        except InvalidOperation:
+            return Lookup(())
+
+        return NumberLookup(threshold, NUMBER_COMPARISONS[rule_lookup])
+
+    return Lookup(())
+
+
+class SubstringAutomaton:
+    """Aho-Corasick automaton reporting every pattern found in a value in a single pass.
+
+    A scan returns the ids of patterns found anywhere, at the start and at the end of
+    the value, so contains, startswith and endswith rules all share one pass.
+    """
+
+    MEMO_SIZE = 4096
+
+    def __init__(self, patterns):
+        self.patterns = list(patterns)
+        self.lengths = [len(pattern) for pattern in self.patterns]
+        self.goto = [{}]
+        self.outputs = [[]]
+        self.memo = {}
+
+        for pattern_id, pattern in enumerate(self.patterns):
+            state = 0
+
+            for char in pattern:
+                next_state = self.goto[state].get(char)
+
+                if next_state is None:
+                    next_state = len(self.goto)
+
+                    self.goto[state][char] = next_state
+                    self.goto.append({})
+                    self.outputs.append([])
+
+                state = next_state
+
+            self.outputs[state].append(pattern_id)
+
+        self.fail = [0] * len(self.goto)
+
+        queue = deque([0])
+
+        while queue:
+            state = queue.popleft()
+
+            for char, next_state in self.goto[state].items():
+                fallback = self.fail[state]
+
+                while fallback and char not in self.goto[fallback]:
+                    fallback = self.fail[fallback]
+
+                self.fail[next_state] = self.goto[fallback].get(char, 0) if state else 0
+                self.outputs[next_state] = (
+                    self.outputs[next_state] + self.outputs[self.fail[next_state]]
+                )
+
+                queue.append(next_state)
+
+    def search(self, text):
+        goto = self.goto
+        fail = self.fail
+        outputs = self.outputs
+        lengths = self.lengths
+
+        found = set(outputs[0])
+        prefixes = set(outputs[0])
+        state = 0
+
+        for position, char in enumerate(text, 1):
+            next_state = goto[state].get(char)
+
+            if next_state is None:
+                fallback = state
+
+                while fallback and char not in goto[fallback]:
+                    fallback = fail[fallback]
+
+                # Remember the resolved transition so later scans skip the failure walk.
+                next_state = goto[state][char] = goto[fallback].get(char, 0)
+
+            state = next_state
+
+            for pattern_id in outputs[state]:
+                found.add(pattern_id)
+
+                if lengths[pattern_id] == position:
+                    prefixes.add(pattern_id)
+
+        return frozenset(found), frozenset(prefixes), frozenset(outputs[state])
+
+    def scan(self, text):
+        hits = self.memo.get(text)
+
+        if hits is None:
+            if len(self.memo) >= self.MEMO_SIZE:
+                self.memo.clear()
+
+            hits = self.memo[text] = self.search(text)
+
+        return hits
+
+    def __getstate__(self):
+        return {**self.__dict__, "memo": {}}
+
+
+FOUND, PREFIX, SUFFIX = range(3)
+
+# Below this many patterns per field, searching each pattern in C beats a Python-level scan.
+# benchmark_routing puts the crossover between 100 and 400 patterns, depending on line count.
+SUBSTRING_AUTOMATON_MIN_PATTERNS = 200
+
+SUBSTRING_LOOKUPS = {
+    LookupStringChoices.CONTAINS: (FOUND, False),
+    LookupStringChoices.ICONTAINS: (FOUND, True),
+    LookupStringChoices.STARTS_WITH: (PREFIX, False),
+    LookupStringChoices.ISTARTS_WITH: (PREFIX, True),
+    LookupStringChoices.ENDS_WITH: (SUFFIX, False),
+    LookupStringChoices.IENDS_WITH: (SUFFIX, True),
+}
+
+
+class AutomatonLookup(Lookup):
+    """A substring lookup answered from a shared automaton scan of the field value."""
+
+    __slots__ = ("automaton", "fallback", "fold_case", "position")
+
+    def __init__(self, values, automaton, position, fold_case, fallback):
+        super().__init__(values)
+
+        self.automaton = automaton
+        self.position = position
+        self.fold_case = fold_case
+        self.fallback = fallback
+
+    def test(self, value):
+        if not isinstance(value, str):
+            return self.fallback(value)
+
+        if self.fold_case:
+            value = value.lower()
+
+        return not self.values.isdisjoint(self.automaton.scan(value)[self.position])
+
+    def any_of(self, column):
+        scan = column.automaton_scan(self)
+
+        while self.values.isdisjoint(scan.hits[self.position]):
+            if not scan.advance():
+                return any(self.fallback(value) for value in scan.others)
+
+        return True
+
+
+def attach_substring_automata(chains):
+    """Swap substring rule lookups for lookups sharing one automaton per field and case."""
+    rules = [
+        rule
+        for chain in chains
+        for rule in (*chain.header_rules, *chain.line_rules)
+        if rule.lookup_name in SUBSTRING_LOOKUPS
+    ]
+    patterns = {}
+
+    for rule in rules:
+        _, fold_case = SUBSTRING_LOOKUPS[rule.lookup_name]
+        pattern_ids = patterns.setdefault((rule.field, fold_case), {})
+
+        for val in rule.value:
+            pattern_ids.setdefault(val.lower() if fold_case else val, len(pattern_ids))
+
+    automata = {
+        key: SubstringAutomaton(pattern_ids)
+        for key, pattern_ids in patterns.items()
+        if len(pattern_ids) >= SUBSTRING_AUTOMATON_MIN_PATTERNS
+    }
+
+    for rule in rules:
+        position, fold_case = SUBSTRING_LOOKUPS[rule.lookup_name]
+
+        if (rule.field, fold_case) not in automata:
+            continue
+
+        pattern_ids = patterns[rule.field, fold_case]
+
+        rule.lookup = AutomatonLookup(
+            frozenset(pattern_ids[val.lower() if fold_case else val] for val in rule.value),
+            automata[rule.field, fold_case],
+            position,
+            fold_case,
+            compile_lookup(rule.lookup_name, rule.value),
+        )
+
+    return automata
+
+
+class LineColumn:
+    """Distinct values of one line field across a requisition, with derived views cached."""
+
+    def __init__(self, values):
+        self.values = frozenset(values)
+        self.scans = {}
+
+    @functools.cached_property
+    def lowered(self):
+        return frozenset(value.lower() for value in self.values if isinstance(value, str))
+
+    @functools.cached_property
+    def has_non_strings(self):
+        return any(not isinstance(value, str) for value in self.values)
+
+    @functools.cached_property
+    def strings(self):
+        return [value for value in self.values if isinstance(value, str)]
+
+    @functools.cached_property
+    def others(self):
+        return [value for value in self.values if value is not None and not isinstance(value, str)]
+
+    @functools.cached_property
+    def joined(self):
+        return f"{SEPARATOR}{SEPARATOR.join(self.strings)}{SEPARATOR}"
+
+    @functools.cached_property
+    def joined_lowered(self):
+        return self.joined.lower()
+
+    @functools.cached_property
+    def numbers(self):
+        return [value for value in self.values if value is not None]
+
+    def automaton_scan(self, lookup):
+        scan = self.scans.get(lookup.fold_case)
+
+        if scan is None:
+            scan = self.scans[lookup.fold_case] = ColumnScan(
+                lookup.automaton, self.values, lookup.fold_case
+            )
+
+        return scan
+
+
+class ColumnScan:
+    """Automaton hits over a column's values, accumulated lazily so ANY rules can stop early."""
+
+    def __init__(self, automaton, values, fold_case):
+        self.automaton = automaton
+        self.fold_case = fold_case
+        self.pending = iter(values)
+        self.hits = (set(), set(), set())
+        self.others = []
+
+    def advance(self):
+        for value in self.pending:
+            if isinstance(value, str):
+                value_hits = self.automaton.scan(value.lower() if self.fold_case else value)
+
+                for hits, found in zip(self.hits, value_hits, strict=True):
+                    hits.update(found)
+
+                return True
+
+            if value is not None:
+                self.others.append(value)
+
+        return False
+
+
+class LineColumns:
+    """Line values of one requisition held as one array per field, built once per submit."""
+
+    def __init__(self, arrays, size):
+        self.arrays = arrays
+        self.size = size
+        self.columns = {}
+
+    @classmethod
+    def from_dicts(cls, lines, fields):
+        lines = list(lines)
+
+        return cls({field: [line.get(field) for line in lines] for field in fields}, len(lines))
+
+    def column(self, field):
+        column = self.columns.get(field)
+
+        if column is None:
+            array = self.arrays.get(field)
+
+            column = self.columns[field] = LineColumn(
+                [None] * self.size if array is None else array
+            )
+
+        return column
+
+
+class CompiledHeaderRule:
+    __slots__ = ("field", "lookup", "lookup_name", "value")
+
+    def __init__(self, field, lookup, value):
+        self.field = field
+        self.lookup_name = lookup
+        self.value = value
+        self.lookup = compile_lookup(lookup, value)
+
+    def matches(self, header):
+        return self.lookup(header.get(self.field))
+
+    def describe(self):
+        return {
+            "type": "header",
+            "field": self.field,
+            "lookup": self.lookup_name,
+            "value": self.value,
+        }
+
+
+class CompiledLineRule:
+    __slots__ = ("field", "lookup", "lookup_name", "match_mode", "value")
+
+    def __init__(self, match_mode, field, lookup, value):
+        self.match_mode = match_mode
+        self.field = field
+        self.lookup_name = lookup
+        self.value = value
+        self.lookup = compile_lookup(lookup, value)
+
+    def matches(self, lines):
+        if self.match_mode == MatchModeChoices.ALL:
+            return self.lookup.all_of(lines.column(self.field))
+
+        if self.match_mode == MatchModeChoices.ANY:
+            return self.lookup.any_of(lines.column(self.field))
+
+        return False
+
+    def describe(self):
+        return {
+            "type": "line",
+            "match_mode": self.match_mode,
+            "field": self.field,
+            "lookup": self.lookup_name,
+            "value": self.value,
+        }
+
+
+def combine(logic, results):
+    if logic == OperatorChoices.AND:
+        return all(results)
+
+    if logic == OperatorChoices.OR:
+        return any(results)
+
+    return False
+
+
+def explain_combine(logic, rules, test):
+    """Combine like combine(), also returning the rule whose result decided the outcome."""
+    if logic not in (OperatorChoices.AND, OperatorChoices.OR):
+        return False, None
+
+    rule = None
+
+    for rule in rules:
+        result = test(rule)
+
+        if logic == OperatorChoices.AND and not result:
+            return False, rule
+
+        if logic == OperatorChoices.OR and result:
+            return True, rule
+
+    return logic == OperatorChoices.AND, rule
+
+
+def fetch_rule_metadata(approval_chain, header_rules, line_rules):
+    header_rules_metadata = []
+    line_rules_metadata = []
+
+    for rule in header_rules:
+        header_rule = {"field": rule.field, "lookup": rule.lookup, "value": rule.value}
+
+        header_rules_metadata.append(header_rule)
+
+    for rule in line_rules:
+        line_rule = {
+            "match_mode": rule.match_mode,
+            "field": rule.field,
+            "lookup": rule.lookup,
+            "value": rule.value,
+        }
+
+        line_rules_metadata.append(line_rule)
+
+    approver_data = None
+
+    if approval_chain.approver:
+        approver_data = {
+            "id": approval_chain.approver.id,
+            "username": approval_chain.approver.username,
+        }
+
+    approver_group_data = None
+
+    if approval_chain.approver_group:
+        approver_group_data = {
+            "id": approval_chain.approver_group.id,
+            "name": approval_chain.approver_group.name,
+            "group_mode": approval_chain.group_mode,
+        }
+
+    return {
+        "id": approval_chain.id,
+        "name": approval_chain.name,
+        "approver_mode": approval_chain.approver_mode,
+        "approver": approver_data,
+        "approver_group": approver_group_data,
+        "sequence_number": approval_chain.sequence_number,
+        "min_amount": str(Decimal(approval_chain.min_amount)),
+        "max_amount": str(Decimal(approval_chain.max_amount))
+        if approval_chain.max_amount
+        else None,
+        "header_rule_logic": approval_chain.header_rule_logic,
+        "line_rule_logic": approval_chain.line_rule_logic,
+        "cross_rule_logic": approval_chain.cross_rule_logic,
+        "valid_from": str(approval_chain.valid_from) if approval_chain.valid_from else None,
+        "valid_to": str(approval_chain.valid_to) if approval_chain.valid_to else None,
+        "header_rules": header_rules_metadata if len(header_rules_metadata) > 0 else None,
+        "line_rules": line_rules_metadata if len(line_rules_metadata) > 0 else None,
+    }
+
+
+class CompiledChain:
+    """An approval chain and its rules, flattened into plain attributes and lookups."""
+
+    def __init__(  # noqa: PLR0913
+        self,
+        *,
+        id,  # noqa: A002
+        name,
+        sequence_number,
+        min_amount,
+        max_amount=None,
+        header_rules=(),
+        line_rules=(),
+        header_rule_logic=OperatorChoices.AND,
+        line_rule_logic=OperatorChoices.AND,
+        cross_rule_logic=OperatorChoices.AND,
+        valid_from=None,
+        valid_to=None,
+        active=True,
+        approver_mode=ApprovalChainModeChoices.INDIVIDUAL,
+        approver_id=None,
+        approver_group_name=None,
+        group_approver_ids=(),
+        rule_metadata=None,
+    ):
+        self.id = id
+        self.name = name
+        self.sequence_number = sequence_number
+        self.min_amount = min_amount
+        self.max_amount = max_amount
+        self.header_rules = list(header_rules)
+        self.line_rules = list(line_rules)
+        self.header_rule_logic = header_rule_logic
+        self.line_rule_logic = line_rule_logic
+        self.cross_rule_logic = cross_rule_logic
+        self.valid_from = valid_from
+        self.valid_to = valid_to
+        self.active = active
+        self.approver_mode = approver_mode
+        self.approver_id = approver_id
+        self.approver_group_name = approver_group_name
+        self.group_approver_ids = list(group_approver_ids)
+        self.rule_metadata = rule_metadata
+
+    @classmethod
+    def from_approval_chain(cls, approval_chain):
+        header_rules = approval_chain.approval_chain_header_rules.all()
+        line_rules = approval_chain.approval_chain_line_rules.all()
+        approver_group = approval_chain.approver_group
+
+        return cls(
+            id=approval_chain.id,
+            name=approval_chain.name,
+            sequence_number=approval_chain.sequence_number,
+            min_amount=approval_chain.min_amount,
+            max_amount=approval_chain.max_amount,
+            header_rules=[
+                CompiledHeaderRule(rule.field, rule.lookup, rule.value) for rule in header_rules
+            ],
+            line_rules=[
+                CompiledLineRule(rule.match_mode, rule.field, rule.lookup, rule.value)
+                for rule in line_rules
+            ],
+            header_rule_logic=approval_chain.header_rule_logic,
+            line_rule_logic=approval_chain.line_rule_logic,
+            cross_rule_logic=approval_chain.cross_rule_logic,
+            valid_from=approval_chain.valid_from,
+            valid_to=approval_chain.valid_to,
+            active=approval_chain.active,
+            approver_mode=approval_chain.approver_mode,
+            approver_id=approval_chain.approver_id,
+            approver_group_name=approver_group.name if approver_group else None,
+            group_approver_ids=[approver.id for approver in approver_group.approver.all()]
+            if approver_group
+            else [],
+            rule_metadata=fetch_rule_metadata(approval_chain, header_rules, line_rules),
+        )
+
+    def __str__(self):
+        return self.name if self.active else f"{self.name} (deactivated)"
+
+    @property
+    def approver_ids(self):
+        if self.approver_mode == ApprovalChainModeChoices.INDIVIDUAL:
+            return [self.approver_id] if self.approver_id else []
+
+        return self.group_approver_ids
+
+    def is_current(self, today):
+        return (self.valid_from is None or self.valid_from <= today) and (
+            self.valid_to is None or self.valid_to >= today
+        )
+
+    def in_amount_range(self, total_amount):
+        return self.min_amount <= total_amount and (
+            self.max_amount is None or self.max_amount >= total_amount
+        )
+
+    def header_check(self, header):
+        if len(self.header_rules) == 0:
+            return True
+
+        return combine(self.header_rule_logic, (rule.matches(header) for rule in self.header_rules))
+
+    def line_check(self, lines):
+        if len(self.line_rules) == 0:
+            return True
+
+        return combine(self.line_rule_logic, (rule.matches(lines) for rule in self.line_rules))
+
+    def matches(self, header, lines):
+        if self.cross_rule_logic == OperatorChoices.AND:
+            return self.header_check(header) and self.line_check(lines)
+
+        return self.header_check(header) or self.line_check(lines)
+
+    def explain(self, header, lines, total_amount, today):
+        """Match like the checks above, returning what decided the outcome alongside it."""
+        if not self.is_current(today):
+            return False, {"type": "valid_dates"}
+
+        if not self.in_amount_range(total_amount):
+            return False, {"type": "amount_range"}
+
+        result, rule = True, None
+
+        if self.header_rules:
+            result, rule = explain_combine(
+                self.header_rule_logic, self.header_rules, lambda rule: rule.matches(header)
+            )
+
+        if (self.cross_rule_logic == OperatorChoices.AND) != result:
+            return result, rule.describe() if rule else None
+
+        if self.line_rules:
+            result, rule = explain_combine(
+                self.line_rule_logic, self.line_rules, lambda rule: rule.matches(lines)
+            )
+        else:
+            result, rule = True, None
+
+        return result, rule.describe() if rule else None
+
+
+class IntervalIndex:
+    """Centered interval tree answering which amount ranges contain a given total."""
+
+    __slots__ = ("by_high", "by_low", "center", "left", "right")
+
+    def __init__(self, intervals):
+        endpoints = sorted(point for low, high, _ in intervals for point in (low, high))
+
+        self.center = endpoints[len(endpoints) // 2]
+
+        overlapping = [
+            interval for interval in intervals if interval[0] <= self.center <= interval[1]
+        ]
+        left = [interval for interval in intervals if interval[1] < self.center]
+        right = [interval for interval in intervals if interval[0] > self.center]
+
+        self.by_low = sorted(overlapping, key=lambda interval: interval[0])
+        self.by_high = sorted(overlapping, key=lambda interval: interval[1], reverse=True)
+        self.left = IntervalIndex(left) if left else None
+        self.right = IntervalIndex(right) if right else None
+
+    def query(self, point):
+        items = []
+        node = self
+
+        while node is not None:
+            if point < node.center:
+                for low, _, item in node.by_low:
+                    if low > point:
+                        break
+
+                    items.append(item)
+
+                node = node.left
+            elif point > node.center:
+                for _, high, item in node.by_high:
+                    if high < point:
+                        break
+
+                    items.append(item)
+
+                node = node.right
+            else:
+                items.extend(item for _, _, item in node.by_low)
+
+                break
+
+        return items
+
+
+INDEXABLE_LOOKUPS = (LookupStringChoices.EXACT, LookupStringChoices.IEXACT)
+
+
+def required_rules(chain):
+    """Rules that must hold for the chain to match at all, given its AND/OR logic."""
+    if chain.cross_rule_logic != OperatorChoices.AND:
+        return [], []
+
+    header_rules = []
+    line_rules = []
+
+    if chain.header_rule_logic == OperatorChoices.AND or len(chain.header_rules) == 1:
+        header_rules = chain.header_rules
+
+    if chain.line_rule_logic == OperatorChoices.AND or len(chain.line_rules) == 1:
+        line_rules = [
+            rule for rule in chain.line_rules if rule.match_mode in MatchModeChoices.values
+        ]
+
+    return header_rules, line_rules
+
+
+class ChainIndex:
+    """Discrimination index narrowing the chains a requisition could possibly match.
+
+    Each chain is bucketed under the values of one exact/iexact rule it cannot match
+    without; chains with no such rule are kept in an interval index on their amount range.
+    """
+
+    UNBOUNDED = Decimal("Infinity")
+
+    def __init__(self, chains):
+        self.chains = chains
+        self.header_buckets = {}
+        self.line_buckets = {}
+        self.line_all_positions = []
+
+        unkeyed = []
+
+        for position, chain in enumerate(chains):
+            header_rules, line_rules = required_rules(chain)
+
+            header_keys = [rule for rule in header_rules if rule.lookup_name in INDEXABLE_LOOKUPS]
+            line_keys = [rule for rule in line_rules if rule.lookup_name in INDEXABLE_LOOKUPS]
+
+            if header_keys:
+                rule = min(header_keys, key=lambda rule: len(rule.value))
+
+                self.add_to_bucket(self.header_buckets, rule, position)
+            elif line_keys:
+                rule = min(line_keys, key=lambda rule: len(rule.value))
+
+                self.add_to_bucket(self.line_buckets, rule, position)
+
+                if rule.match_mode == MatchModeChoices.ALL:
+                    self.line_all_positions.append(position)
+            else:
+                max_amount = self.UNBOUNDED if chain.max_amount is None else chain.max_amount
+
+                unkeyed.append((chain.min_amount, max_amount, position))
+
+        self.unkeyed = IntervalIndex(unkeyed) if unkeyed else None
+
+    @staticmethod
+    def add_to_bucket(buckets, rule, position):
+        bucket = buckets.setdefault((rule.field, rule.lookup_name), {})
+
+        for value in rule.lookup.values:
+            bucket.setdefault(value, []).append(position)
+
+    @staticmethod
+    def bucket_hits(buckets, field_values, positions):
+        for (field, lookup_name), bucket in buckets.items():
+            for value in field_values(field):
+                key = value
+
+                if lookup_name == LookupStringChoices.IEXACT:
+                    if not isinstance(value, str):
+                        continue
+
+                    key = value.lower()
+
+                try:
+                    positions.update(bucket.get(key, ()))
+                except TypeError:
+                    continue
+
+    def candidates(self, header, lines, total_amount):
+        positions = set()
+
+        self.bucket_hits(self.header_buckets, lambda field: (header.get(field),), positions)
+        self.bucket_hits(self.line_buckets, lambda field: lines.column(field).values, positions)
+
+        if not lines.size:
+            positions.update(self.line_all_positions)
+
+        chains = self.chains
+
+        positions = {
+            position for position in positions if chains[position].in_amount_range(total_amount)
+        }
+
+        if self.unkeyed is not None:
+            positions.update(self.unkeyed.query(total_amount))
+
+        return [chains[position] for position in sorted(positions)]
+
+
+def header_snapshot(requisition, fields):
+    return {
+        field: HEADER_FIELD_GETTERS[field](requisition)
+        for field in fields
+        if field in HEADER_FIELD_GETTERS
+    }
+
+
+def line_columns(lines, fields):
+    arrays = {
+        field: [LINE_FIELD_GETTERS[field](line) for line in lines]
+        for field in fields
+        if field in LINE_FIELD_GETTERS
+    }
+
+    return LineColumns(arrays, len(lines))
+
+
+def chain_metric(chain_id, counter):
+    return f"approval.routing.chain.{chain_id}.{counter}"
+
+
+class RoutingTrace:
+    """Outcome, deciding rule and evaluation time of each chain considered for a requisition."""
+
+    def __init__(self):
+        self.chains = []
+        self.total_chains = 0
+        self.microseconds = 0
+
+    def evaluate(self, chains, header, lines, total_amount, today):
+        matched = []
+
+        for chain in chains:
+            start = time.perf_counter()
+
+            try:
+                result, decided_by = chain.explain(header, lines, total_amount, today)
+            except RegexBudgetExceededError:
+                self.record(chain, None, {"type": "regex_budget_exceeded"}, start)
+
+                raise
+
+            self.record(chain, result, decided_by, start)
+
+            if result:
+                matched.append(chain)
+
+        return matched
+
+    def record(self, chain, matched, decided_by, start):
+        microseconds = round((time.perf_counter() - start) * 1_000_000)
+
+        self.microseconds += microseconds
+        self.chains.append(
+            {
+                "id": chain.id,
+                "name": chain.name,
+                "sequence_number": chain.sequence_number,
+                "matched": matched,
+                "decided_by": decided_by,
+                "microseconds": microseconds,
+            }
+        )
+
+    def publish(self):
+        increment(ROUTING_TRACES_METRIC)
+
+        for entry in self.chains:
+            increment(chain_metric(entry["id"], "evaluations"))
+            increment(chain_metric(entry["id"], "microseconds"), entry["microseconds"])
+
+            if entry["matched"]:
+                increment(chain_metric(entry["id"], "matches"))
+
+    def as_dict(self):
+        return {
+            "total_chains": self.total_chains,
+            "candidate_chains": len(self.chains),
+            "matched_chains": [entry["id"] for entry in self.chains if entry["matched"]],
+            "microseconds": self.microseconds,
+            "chains": self.chains,
+        }
+
+
+routing_trace = contextvars.ContextVar("routing_trace", default=None)
+
+
+@contextlib.contextmanager
+def trace_routing(enabled=True):
+    """Record a RoutingTrace of any routing evaluated within the block."""
+    if not enabled:
+        yield None
+
+        return
+
+    trace = RoutingTrace()
+    token = routing_trace.set(trace)
+
+    try:
+        yield trace
+    finally:
+        routing_trace.reset(token)
+
+
+def read_chain_metrics(chains, limit=None):
+    """Per chain trace counters, slowest chains (by total evaluation time) first."""
+    names = [
+        chain_metric(chain.id, counter) for chain in chains for counter in CHAIN_TRACE_COUNTERS
+    ]
+    values = read_counters(names)
+    results = []
+
+    for chain in chains:
+        counters = {
+            counter: values[chain_metric(chain.id, counter)] for counter in CHAIN_TRACE_COUNTERS
+        }
+
+        if not counters["evaluations"]:
+            continue
+
+        results.append(
+            {
+                "id": chain.id,
+                "name": chain.name,
+                **counters,
+                "mean_microseconds": round(counters["microseconds"] / counters["evaluations"]),
+            }
+        )
+
+    results.sort(key=lambda result: result["microseconds"], reverse=True)
+
+    return results[:limit]
+
+
+class RoutingPlan:
+    """All active approval chains compiled once, ready to be matched against requisitions."""
+
+    def __init__(self, version, chains, *, substring_automata=True):
+        self.version = version
+        self.chains = sorted(chains, key=lambda chain: (chain.sequence_number, chain.id))
+        self.index = ChainIndex(self.chains)
+        self.automata = attach_substring_automata(self.chains) if substring_automata else {}
+        self.header_fields = {rule.field for chain in self.chains for rule in chain.header_rules}
+        self.line_fields = {rule.field for chain in self.chains for rule in chain.line_rules}
+
+    def header_snapshot(self, requisition):
+        return header_snapshot(requisition, self.header_fields)
+
+    def line_columns(self, lines):
+        return line_columns(lines, self.line_fields)
+
+    def evaluate(self, header, lines, total_amount, today, use_index=True):
+        if not isinstance(lines, LineColumns):
+            lines = LineColumns.from_dicts(lines, self.line_fields)
+
+        chains = self.index.candidates(header, lines, total_amount) if use_index else self.chains
+
+        token = regex_budget.set(
+            RegexBudget(
+                settings.APPROVAL_REGEX_TIME_BUDGET, settings.APPROVAL_REGEX_TIMEOUT_FALLBACK
+            )
+        )
+
+        trace = routing_trace.get()
+
+        try:
+            if trace is not None:
+                trace.total_chains = len(self.chains)
+
+                return trace.evaluate(chains, header, lines, total_amount, today)
+
+            return [
+                chain
+                for chain in chains
+                if chain.is_current(today)
+                and chain.in_amount_range(total_amount)
+                and chain.matches(header, lines)
+            ]
+        finally:
+            regex_budget.reset(token)
+
+    def match(self, requisition, lines):
+        trace = routing_trace.get()
+        token = None
+
+        if trace is None and random.random() < settings.APPROVAL_ROUTING_TRACE_SAMPLE_RATE:
+            trace = RoutingTrace()
+            token = routing_trace.set(trace)
+
+        try:
+            return self.evaluate(
+                self.header_snapshot(requisition),
+                self.line_columns(lines),
+                requisition.total_amount,
+                timezone.now().date(),
+            )
+        finally:
+            if token is not None:
+                routing_trace.reset(token)
+
+            if trace is not None:
+                trace.publish()
+
+
+def compile_routing_plan(version, approval_chains=None):
+    if approval_chains is None:
+        approval_chains = ApprovalChain.objects.active().filter(active=True)  # type: ignore
+
+    approval_chains = approval_chains.select_related("approver", "approver_group").prefetch_related(
+        "approval_chain_header_rules", "approval_chain_line_rules", "approver_group__approver"
+    )
+
+    return RoutingPlan(
+        version,
+        [CompiledChain.from_approval_chain(approval_chain) for approval_chain in approval_chains],
+    )
+
+
+def get_routing_version():
+    version = cache.get(ROUTING_VERSION_CACHE_KEY)
+
+    if version is None:
+        cache.add(ROUTING_VERSION_CACHE_KEY, uuid.uuid4().hex, timeout=None)
+
+        version = cache.get(ROUTING_VERSION_CACHE_KEY)
+
+    return version
+
+
+def bump_routing_version():
+    cache.set(ROUTING_VERSION_CACHE_KEY, uuid.uuid4().hex, timeout=None)
+
+
+class RoutingPlanCache:
+    """Per-process holder of the compiled plan, rebuilt whenever the shared version changes."""
+
+    def __init__(self):
+        self.plan = None
+
+    def get(self):
+        version = get_routing_version()
+
+        if self.plan is None or self.plan.version != version:
+            self.plan = compile_routing_plan(version)
+
+        return self.plan
+
+    def clear(self):
+        self.plan = None
+
+
+routing_plan_cache = RoutingPlanCache()
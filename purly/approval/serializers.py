@@ -1,12 +1,16 @@
+from django.conf import settings
 from rest_framework import serializers
 
-from purly.base import CustomToRepresentation
+from purly.base import CustomToRepresentation, SparseFieldsSerializerMixin
 from purly.user.serializers import UserSimpleDetailSerializer
 
 from .models import Approval
+from .services import BULK_ACTIONS
 
 
-class ApprovalListSerializer(CustomToRepresentation, serializers.ModelSerializer):
+class ApprovalListSerializer(
+    SparseFieldsSerializerMixin, CustomToRepresentation, serializers.ModelSerializer
+):
     approver = UserSimpleDetailSerializer(read_only=True)
     created_by = UserSimpleDetailSerializer(read_only=True)
     updated_by = UserSimpleDetailSerializer(read_only=True)
@@ -58,9 +62,45 @@ class ApprovalDetailSerializer(CustomToRepresentation, serializers.ModelSerializ
         ]
 
 
+class ApprovalIncludedSerializer(CustomToRepresentation, serializers.ModelSerializer):
+    class Meta:
+        model = Approval
+        fields = [
+            "id",
+            "requisition",
+            "approver",
+            "sequence_number",
+            "status",
+            "comment",
+            "notified_at",
+            "approved_at",
+            "rejected_at",
+            "skipped_at",
+            "created_at",
+            "updated_at",
+        ]
+
+
 class ApprovalRequestSerializer(serializers.ModelSerializer):
     comment = serializers.CharField(allow_blank=True, required=False)
 
     class Meta:
         model = Approval
         fields = ["comment"]
+
+
+class ApprovalSimulationSerializer(serializers.Serializer):
+    include_chains = serializers.ListField(child=serializers.IntegerField(), default=list)
+    exclude_chains = serializers.ListField(child=serializers.IntegerField(), default=list)
+    as_of = serializers.DateField(required=False)
+    changed_only = serializers.BooleanField(default=True)
+
+
+class ApprovalBulkActionSerializer(serializers.Serializer):
+    action = serializers.ChoiceField(choices=list(BULK_ACTIONS))
+    approvals = serializers.ListField(
+        child=serializers.IntegerField(),
+        allow_empty=False,
+        max_length=settings.APPROVAL_BULK_ACTION_LIMIT,
+    )
+    comment = serializers.CharField(allow_blank=True, required=False)
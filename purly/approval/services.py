@@ -1,251 +1,25 @@
-import re
-from decimal import Decimal
+from functools import reduce
+from operator import or_
 
 from django.db import transaction
-from django.db.models import Max, Min, Q
+from django.db.models import Count, F, Max, Min, Q, Window
 from django.utils import timezone
 from rest_framework import exceptions
 
 from config.exceptions import BadRequest
+from purly.caching import invalidate_responses
 from purly.requisition.models import Requisition, RequisitionStatusChoices
-from purly.requisition.services import on_reject_requisition
+from purly.requisition.services import on_reject_requisition, reject_requisitions
+from purly.user.models import CustomUser
 
 from .emails import send_approval_email, send_fully_approved_email
 from .models import (
     Approval,
-    ApprovalChain,
     ApprovalChainModeChoices,
     ApprovalStatusChoices,
-    HeaderFieldStringChoices,
-    LineFieldNumberChoices,
-    LineFieldStringChoices,
-    LookupNumberChoices,
-    LookupStringChoices,
     MatchModeChoices,
-    OperatorChoices,
 )
-
-
-def perform_lookup(value, rule_lookup, rule_value):  # noqa: PLR0911, PLR0912
-    if rule_lookup != LookupStringChoices.IS_NULL and value is None:
-        return False
-
-    match rule_lookup:
-        case LookupStringChoices.EXACT:
-            if value not in rule_value:
-                return False
-        case LookupStringChoices.IEXACT:
-            if not isinstance(value, str):
-                return False
-            if value.lower() not in [val.lower() for val in rule_value]:
-                return False
-        case LookupStringChoices.CONTAINS:
-            if not any(val in value for val in rule_value):
-                return False
-        case LookupStringChoices.ICONTAINS:
-            if not isinstance(value, str):
-                return False
-            if not any(val.lower() in value.lower() for val in rule_value):
-                return False
-        case LookupStringChoices.STARTS_WITH:
-            if not isinstance(value, str):
-                return False
-            if not any(value.startswith(val) for val in rule_value):
-                return False
-        case LookupStringChoices.ISTARTS_WITH:
-            if not isinstance(value, str):
-                return False
-            if not any(value.lower().startswith(val.lower()) for val in rule_value):
-                return False
-        case LookupStringChoices.ENDS_WITH:
-            if not isinstance(value, str):
-                return False
-            if not any(value.endswith(val) for val in rule_value):
-                return False
-        case LookupStringChoices.IENDS_WITH:
-            if not isinstance(value, str):
-                return False
-            if not any(value.lower().endswith(val.lower()) for val in rule_value):
-                return False
-        case LookupStringChoices.REGEX:
-            if not any(re.search(val, value) for val in rule_value):
-                return False
-        case LookupStringChoices.IS_NULL:
-            if value not in (None, ""):
-                return False
-        case LookupNumberChoices.EQUAL:
-            if value != Decimal(rule_value[0]):
-                return False
-        case LookupNumberChoices.NOT_EQUAL:
-            if value == Decimal(rule_value[0]):
-                return False
-        case LookupNumberChoices.GT:
-            if not value > Decimal(rule_value[0]):
-                return False
-        case LookupNumberChoices.GTE:
-            if not value >= Decimal(rule_value[0]):
-                return False
-        case LookupNumberChoices.LT:
-            if not value < Decimal(rule_value[0]):
-                return False
-        case LookupNumberChoices.LTE:
-            if not value <= Decimal(rule_value[0]):
-                return False
-        case _:
-            return False
-
-    return True
-
-
-def header_rule_matching(requisition, rule):
-    field_map = {
-        HeaderFieldStringChoices.CURRENCY: requisition.currency,
-        HeaderFieldStringChoices.EXTERNAL_REFERENCE: requisition.external_reference,
-        HeaderFieldStringChoices.JUSTIFICATION: requisition.justification,
-        HeaderFieldStringChoices.NAME: requisition.name,
-        HeaderFieldStringChoices.OWNER: requisition.owner.username,
-        HeaderFieldStringChoices.OWNER_EMAIL: requisition.owner.email,
-        HeaderFieldStringChoices.OWNER_FIRST_NAME: requisition.owner.first_name,
-        HeaderFieldStringChoices.OWNER_LAST_NAME: requisition.owner.last_name,
-        HeaderFieldStringChoices.PROJECT_NAME: requisition.project.name
-        if requisition.project
-        else None,
-        HeaderFieldStringChoices.PROJECT_CODE: requisition.project.project_code
-        if requisition.project
-        else None,
-        HeaderFieldStringChoices.PROJECT_DESCRIPTION: requisition.project.description
-        if requisition.project
-        else None,
-        HeaderFieldStringChoices.SUPPLIER: requisition.supplier,
-    }
-
-    header_value = field_map.get(rule.field)
-
-    return perform_lookup(header_value, rule.lookup, rule.value)
-
-
-def line_rule_matching(line, rule):
-    field_map = {
-        LineFieldStringChoices.CATEGORY: line.category,
-        LineFieldStringChoices.DESCRIPTION: line.description,
-        LineFieldNumberChoices.LINE_TOTAL: line.line_total,
-        LineFieldStringChoices.MANUFACTURER: line.manufacturer,
-        LineFieldStringChoices.MANUFACTURER_PART_NUMBER: line.manufacturer_part_number,
-        LineFieldStringChoices.PAYMENT_TERM: line.payment_term,
-        LineFieldStringChoices.SHIP_TO_ATTENTION: line.ship_to.attention,
-        LineFieldStringChoices.SHIP_TO_CITY: line.ship_to.city,
-        LineFieldStringChoices.SHIP_TO_CODE: line.ship_to.address_code,
-        LineFieldStringChoices.SHIP_TO_COUNTRY: line.ship_to.country,
-        LineFieldStringChoices.SHIP_TO_DELIVERY_INSTRUCTIONS: line.ship_to.delivery_instructions,
-        LineFieldStringChoices.SHIP_TO_DESCRIPTION: line.ship_to.description,
-        LineFieldStringChoices.SHIP_TO_NAME: line.ship_to.name,
-        LineFieldStringChoices.SHIP_TO_PHONE: line.ship_to.phone,
-        LineFieldStringChoices.SHIP_TO_STATE: line.ship_to.state,
-        LineFieldStringChoices.SHIP_TO_STREET1: line.ship_to.street1,
-        LineFieldStringChoices.SHIP_TO_STREET2: line.ship_to.street2,
-        LineFieldStringChoices.SHIP_TO_ZIP_CODE: line.ship_to.zip_code,
-        LineFieldStringChoices.UNIT_OF_MEASURE: line.unit_of_measure,
-        LineFieldNumberChoices.UNIT_PRICE: line.unit_price,
-    }
-
-    line_value = field_map.get(rule.field)
-
-    return perform_lookup(line_value, rule.lookup, rule.value)
-
-
-def fetch_rule_metadata(approval_chain, header_rules, line_rules):
-    header_rules_metadata = []
-    line_rules_metadata = []
-
-    for rule in header_rules:
-        header_rule = {"field": rule.field, "lookup": rule.lookup, "value": rule.value}
-
-        header_rules_metadata.append(header_rule)
-
-    for rule in line_rules:
-        line_rule = {
-            "match_mode": rule.match_mode,
-            "field": rule.field,
-            "lookup": rule.lookup,
-            "value": rule.value,
-        }
-
-        line_rules_metadata.append(line_rule)
-
-    approver_data = None
-
-    if approval_chain.approver:
-        approver_data = {
-            "id": approval_chain.approver.id,
-            "username": approval_chain.approver.username,
-        }
-
-    approver_group_data = None
-
-    if approval_chain.approver_group:
-        approver_group_data = {
-            "id": approval_chain.approver_group.id,
-            "name": approval_chain.approver_group.name,
-            "group_mode": approval_chain.group_mode,
-        }
-
-    return {
-        "id": approval_chain.id,
-        "name": approval_chain.name,
-        "approver_mode": approval_chain.approver_mode,
-        "approver": approver_data,
-        "approver_group": approver_group_data,
-        "sequence_number": approval_chain.sequence_number,
-        "min_amount": str(Decimal(approval_chain.min_amount)),
-        "max_amount": str(Decimal(approval_chain.max_amount))
-        if approval_chain.max_amount
-        else None,
-        "header_rule_logic": approval_chain.header_rule_logic,
-        "line_rule_logic": approval_chain.line_rule_logic,
-        "cross_rule_logic": approval_chain.cross_rule_logic,
-        "valid_from": str(approval_chain.valid_from) if approval_chain.valid_from else None,
-        "valid_to": str(approval_chain.valid_to) if approval_chain.valid_to else None,
-        "header_rules": header_rules_metadata if len(header_rules_metadata) > 0 else None,
-        "line_rules": line_rules_metadata if len(line_rules_metadata) > 0 else None,
-    }
-
-
-def header_check(requisition, approval_chain, header_rules):
-    if len(header_rules) == 0:
-        return True
-
-    if approval_chain.header_rule_logic == OperatorChoices.AND:
-        return all(header_rule_matching(requisition, rule) for rule in header_rules)
-
-    if approval_chain.header_rule_logic == OperatorChoices.OR:
-        return any(header_rule_matching(requisition, rule) for rule in header_rules)
-
-    return False
-
-
-def line_check(lines, approval_chain, line_rules):
-    line_rule_results = []
-
-    if len(line_rules) == 0:
-        return True
-
-    for rule in line_rules:
-        if rule.match_mode == MatchModeChoices.ALL:
-            result = all(line_rule_matching(line, rule) for line in lines)
-        elif rule.match_mode == MatchModeChoices.ANY:
-            result = any(line_rule_matching(line, rule) for line in lines)
-        else:
-            result = False
-
-        line_rule_results.append(result)
-
-    if approval_chain.line_rule_logic == OperatorChoices.AND:
-        return all(line_rule_results)
-
-    if approval_chain.line_rule_logic == OperatorChoices.OR:
-        return any(line_rule_results)
-
-    return False
+from .routing import RegexBudgetExceededError, routing_plan_cache
 
 
 def generate_approvals(requisition):
@@ -253,34 +27,33 @@ def generate_approvals(requisition):
 
     lines = list(requisition.lines.select_related("ship_to"))
 
-    approval_chains = (
-        ApprovalChain.objects.current()  # type: ignore
-        .filter(min_amount__lte=requisition.total_amount)
-        .filter(Q(max_amount__gte=requisition.total_amount) | Q(max_amount__isnull=True))
-        .order_by("sequence_number")
-        .select_related("approver", "approver_group")
-        .prefetch_related(
-            "approval_chain_header_rules", "approval_chain_line_rules", "approver_group__approver"
+    try:
+        approval_chains = routing_plan_cache.get().match(requisition, lines)
+    except RegexBudgetExceededError:
+        return (
+            False,
+            "This requisition cannot be submitted because approval routing ran out of time on a regex rule.",  # noqa: E501
         )
-    )
-
-    for approval_chain in approval_chains:
-        header_rules = approval_chain.approval_chain_header_rules.all()
-        line_rules = approval_chain.approval_chain_line_rules.all()
 
-        header_result = header_check(requisition, approval_chain, header_rules)
-        line_result = line_check(lines, approval_chain, line_rules)
-
-        if approval_chain.cross_rule_logic == OperatorChoices.AND:
-            if not all([header_result, line_result]):
-                continue
-        elif not any([header_result, line_result]):
-            continue
+    approver_ids = {
+        approver_id
+        for approval_chain in approval_chains
+        for approver_id in approval_chain.approver_ids
+    }
+    approvers = {
+        approver.id: approver
+        for approver in CustomUser.objects.filter(id__in=approver_ids).only(
+            "id", "username", "is_active"
+        )
+    }
 
-        rule_metadata = fetch_rule_metadata(approval_chain, header_rules, line_rules)
+    for approval_chain in approval_chains:
+        rule_metadata = approval_chain.rule_metadata
 
         if approval_chain.approver_mode == ApprovalChainModeChoices.INDIVIDUAL:
-            if not approval_chain.approver.is_active:
+            approver = approvers.get(approval_chain.approver_id)
+
+            if approver is None or not approver.is_active:
                 return (
                     False,
                     f"This requisition cannot be submitted because the approval chain {approval_chain} contains an inactive approver.",  # noqa: E501
@@ -288,24 +61,31 @@ def generate_approvals(requisition):
 
             approval = Approval(
                 requisition=requisition,
-                approver=approval_chain.approver,
+                approver=approver,
                 sequence_number=approval_chain.sequence_number,
-                rule_metadata=rule_metadata,
+                rule_metadata={
+                    **rule_metadata,
+                    "approver": {"id": approver.id, "username": approver.username},
+                },
                 status=ApprovalStatusChoices.PENDING,
                 system_generated=True,
             )
 
             approvals.append(approval)
         else:
-            approvers = approval_chain.approver_group.approver.filter(is_active=True)
+            group_approvers = [
+                approvers[approver_id]
+                for approver_id in approval_chain.group_approver_ids
+                if approver_id in approvers and approvers[approver_id].is_active
+            ]
 
-            if len(approvers) == 0:
+            if len(group_approvers) == 0:
                 return (
                     False,
-                    f"This requisition cannot be submitted because the approval group {approval_chain.approver_group} contains no active approvers.",  # noqa: E501
+                    f"This requisition cannot be submitted because the approval group {approval_chain.approver_group_name} contains no active approvers.",  # noqa: E501
                 )
 
-            for approver in approvers:
+            for approver in group_approvers:
                 approval = Approval(
                     requisition=requisition,
                     approver=approver,
@@ -322,6 +102,10 @@ def generate_approvals(requisition):
 
     Approval.objects.bulk_create(approvals)
 
+    invalidate_responses(Approval, [approval.approver_id for approval in approvals])
+
+    sync_approval_sequence(requisition)
+
     return (True, "")
 
 
@@ -340,6 +124,10 @@ def cancel_approvals(requisition):
 
     Approval.objects.bulk_update(approvals, ["status", "updated_at"])
 
+    invalidate_responses(Approval, [approval.approver_id for approval in approvals])
+
+    sync_approval_sequence(requisition)
+
 
 @transaction.atomic
 def cancel_user_approvals(user):
@@ -360,8 +148,10 @@ def cancel_user_approvals(user):
 
     Approval.objects.bulk_update(approvals, ["status", "updated_at"])
 
+    invalidate_responses(Approval, [user.id])
+
     for requisition_id in requisitions:
-        requisition = Requisition.objects.get(pk=requisition_id)
+        requisition = sync_approval_sequence(Requisition.objects.get(pk=requisition_id))
 
         transaction.on_commit(lambda requisition=requisition: notify_current_sequence(requisition))
         transaction.on_commit(lambda requisition=requisition: check_fully_approved(requisition))
@@ -384,6 +174,10 @@ def cancel_group_approvals(approval):
 
     Approval.objects.bulk_update(approvals, ["status", "updated_at"])
 
+    invalidate_responses(Approval, [related.approver_id for related in approvals])
+
+    sync_approval_sequence(approval.requisition)
+
 
 def bypass_approvals(requisition, request_user):
     approvals = []
@@ -401,9 +195,21 @@ def bypass_approvals(requisition, request_user):
 
     Approval.objects.bulk_update(approvals, ["status", "skipped_at", "updated_at", "updated_by"])
 
+    invalidate_responses(Approval, [approval.approver_id for approval in approvals])
+
+    sync_approval_sequence(requisition)
+
     transaction.on_commit(lambda: check_fully_approved(requisition))
 
 
+def is_any_group_approval(rule_metadata):
+    return (
+        rule_metadata is not None
+        and rule_metadata["approver_mode"] == "group"
+        and rule_metadata["approver_group"]["group_mode"] == MatchModeChoices.ANY
+    )
+
+
 def on_approve_skip(approval, requisition, action, **kwargs):
     if action == "approve":
         approval.status = ApprovalStatusChoices.APPROVED
@@ -420,11 +226,10 @@ def on_approve_skip(approval, requisition, action, **kwargs):
 
     approval.save()
 
-    if approval.rule_metadata is not None and approval.rule_metadata["approver_mode"] == "group":
-        group_mode = approval.rule_metadata["approver_group"]["group_mode"]
+    if is_any_group_approval(approval.rule_metadata):
+        cancel_group_approvals(approval)
 
-        if group_mode == MatchModeChoices.ANY:
-            cancel_group_approvals(approval)
+    sync_approval_sequence(requisition)
 
     send_email = kwargs.get("send_email", True)
 
@@ -456,14 +261,80 @@ def on_reject(approval, requisition, **kwargs):
     return approval
 
 
+def pending_approval_summary(requisition_ids):
+    return {
+        row["requisition_id"]: (row["current_sequence_number"], row["pending_approval_count"])
+        for row in Approval.objects.active()  # type: ignore
+        .filter(requisition_id__in=requisition_ids, status=ApprovalStatusChoices.PENDING)
+        .order_by()
+        .values("requisition_id")
+        .annotate(
+            current_sequence_number=Min("sequence_number"), pending_approval_count=Count("id")
+        )
+    }
+
+
+# Approval fields whose changes can move a requisition's current sequence or pending count.
+APPROVAL_SEQUENCE_FIELDS = ("requisition", "sequence_number", "status", "deleted")
+
+
+def sync_approval_sequences(requisition_ids):
+    """Recompute the denormalized current sequence and pending count of requisitions.
+
+    Each call locks the requisition rows and runs one MIN/COUNT aggregate over their pending
+    approvals. Callers only sync after writes touching APPROVAL_SEQUENCE_FIELDS, so reads
+    never pay for it.
+    """
+    requisition_ids = sorted(requisition_ids)
+
+    with transaction.atomic():
+        # Row locks (taken in id order) serialize concurrent approvals of the same requisition.
+        list(
+            Requisition.objects.select_for_update()
+            .filter(pk__in=requisition_ids)
+            .order_by("pk")
+            .values_list("pk")
+        )
+
+        summary = pending_approval_summary(requisition_ids)
+        requisitions = []
+
+        for requisition_id in requisition_ids:
+            current_sequence_number, pending_approval_count = summary.setdefault(
+                requisition_id, (None, 0)
+            )
+
+            requisitions.append(
+                Requisition(
+                    pk=requisition_id,
+                    current_sequence_number=current_sequence_number,
+                    pending_approval_count=pending_approval_count,
+                )
+            )
+
+        Requisition.objects.bulk_update(
+            requisitions, ["current_sequence_number", "pending_approval_count"]
+        )
+
+    return summary
+
+
+def sync_approval_sequence(requisition):
+    current_sequence_number, pending_approval_count = sync_approval_sequences([requisition.pk])[
+        requisition.pk
+    ]
+
+    requisition.current_sequence_number = current_sequence_number
+    requisition.pending_approval_count = pending_approval_count
+
+    return requisition
+
+
 def retrieve_sequence_min(requisition):
-    value = (
-        Approval.objects.active()  # type: ignore
-        .filter(requisition=requisition, status=ApprovalStatusChoices.PENDING)
-        .aggregate(Min("sequence_number"))
-    )
+    if requisition.pending_approval_count is None:
+        sync_approval_sequence(requisition)
 
-    return value["sequence_number__min"]
+    return requisition.current_sequence_number
 
 
 def retrieve_sequence_max(requisition):
@@ -483,8 +354,11 @@ def check_if_current_approver(approval):
 
 
 def check_fully_approved(requisition):
+    if requisition.pending_approval_count is None:
+        sync_approval_sequence(requisition)
+
     if (
-        retrieve_sequence_min(requisition) is None
+        requisition.pending_approval_count == 0
         and requisition.status == RequisitionStatusChoices.PENDING_APPROVAL
         and requisition.approved_at is None
     ):
@@ -535,3 +409,163 @@ def notify_current_sequence(requisition):
             approval.save()
 
             send_approval_email.delay(requisition.id, approval.id)  # type: ignore
+
+
+BULK_ACTIONS = {
+    "approve": (ApprovalStatusChoices.APPROVED, "approved_at"),
+    "reject": (ApprovalStatusChoices.REJECTED, "rejected_at"),
+    "skip": (ApprovalStatusChoices.SKIPPED, "skipped_at"),
+}
+
+
+def retrieve_actionable_approvals(approval_ids):
+    """Pending approvals among approval_ids that are in their requisition's current sequence."""
+    rows = (
+        Approval.objects.active()  # type: ignore
+        .filter(
+            status=ApprovalStatusChoices.PENDING,
+            requisition_id__in=Approval.objects.filter(id__in=approval_ids).values(
+                "requisition_id"
+            ),
+        )
+        .annotate(sequence_min=Window(Min("sequence_number"), partition_by=[F("requisition_id")]))
+        .filter(sequence_number=F("sequence_min"))
+        .order_by("id")
+        .values("id", "requisition_id", "approver_id", "sequence_number", "rule_metadata")
+    )
+
+    # The window has to see every pending approval, so the selection is applied afterwards.
+    return [row for row in rows if row["id"] in approval_ids]
+
+
+def cancel_pending_approvals(timestamp, *conditions, **filters):
+    approvals = Approval.objects.active().filter(  # type: ignore
+        *conditions, status=ApprovalStatusChoices.PENDING, **filters
+    )
+    approver_ids = list(approvals.values_list("approver_id", flat=True))
+
+    approvals.update(status=ApprovalStatusChoices.CANCELLED, updated_at=timestamp)
+
+    invalidate_responses(Approval, approver_ids)
+
+
+def notify_current_sequences(requisition_ids):
+    timestamp = timezone.now()
+
+    approvals = list(
+        Approval.objects.active()  # type: ignore
+        .filter(
+            requisition_id__in=requisition_ids,
+            sequence_number=F("requisition__current_sequence_number"),
+            status=ApprovalStatusChoices.PENDING,
+            notified_at=None,
+        )
+        .values_list("id", "requisition_id", "approver_id")
+    )
+
+    Approval.objects.filter(id__in=[approval_id for approval_id, _, _ in approvals]).update(
+        notified_at=timestamp, updated_at=timestamp
+    )
+
+    invalidate_responses(Approval, [approver_id for _, _, approver_id in approvals])
+
+    for approval_id, requisition_id, _ in approvals:
+        send_approval_email.delay(requisition_id, approval_id)  # type: ignore
+
+
+def complete_requisitions(requisition_ids, timestamp):
+    completed = list(
+        Requisition.objects.filter(
+            id__in=requisition_ids,
+            pending_approval_count=0,
+            status=RequisitionStatusChoices.PENDING_APPROVAL,
+            approved_at=None,
+        ).values_list("id", flat=True)
+    )
+
+    Requisition.objects.filter(id__in=completed).update(
+        status=RequisitionStatusChoices.APPROVED, approved_at=timestamp, updated_at=timestamp
+    )
+
+    for requisition_id in completed:
+        transaction.on_commit(
+            lambda requisition_id=requisition_id: send_fully_approved_email.delay(requisition_id)  # type: ignore
+        )
+
+
+@transaction.atomic
+def bulk_transition_approvals(approval_ids, action, request_user, comment=None):
+    """Approve, reject or skip approvals with set-based updates, returning the changed ids.
+
+    Approvals that are not pending in their requisition's current sequence are left alone;
+    approving or skipping a whole sequence makes the next selected sequence actionable.
+    """
+    status, timestamp_field = BULK_ACTIONS[action]
+    remaining = set(approval_ids)
+    changed = []
+    rejected = {}
+    requisition_ids = set()
+
+    timestamp = timezone.now()
+
+    while remaining:
+        actionable = retrieve_actionable_approvals(remaining)
+
+        if action == "reject":
+            # Only one rejection per requisition, it cancels every other pending approval.
+            first = {}
+
+            for row in actionable:
+                first.setdefault(row["requisition_id"], row)
+
+            actionable = list(first.values())
+
+        if not actionable:
+            break
+
+        ids = [row["id"] for row in actionable]
+        updates = {
+            "status": status,
+            timestamp_field: timestamp,
+            "updated_at": timestamp,
+            "updated_by": request_user,
+        }
+
+        if comment is not None:
+            updates["comment"] = comment
+
+        Approval.objects.filter(id__in=ids).update(**updates)
+
+        invalidate_responses(Approval, [row["approver_id"] for row in actionable])
+
+        if action == "reject":
+            rejected.update({row["requisition_id"]: row["id"] for row in actionable})
+
+            cancel_pending_approvals(timestamp, requisition_id__in=list(rejected))
+        else:
+            groups = [
+                Q(requisition_id=row["requisition_id"], sequence_number=row["sequence_number"])
+                for row in actionable
+                if is_any_group_approval(row["rule_metadata"])
+            ]
+
+            if groups:
+                cancel_pending_approvals(timestamp, reduce(or_, groups))
+
+        changed.extend(ids)
+        remaining.difference_update(ids)
+        requisition_ids.update(row["requisition_id"] for row in actionable)
+
+    if not requisition_ids:
+        return changed
+
+    sync_approval_sequences(requisition_ids)
+
+    if rejected:
+        reject_requisitions(rejected, timestamp)
+    else:
+        complete_requisitions(requisition_ids, timestamp)
+
+        transaction.on_commit(lambda: notify_current_sequences(requisition_ids))
+
+    return changed
@@ -0,0 +1,315 @@
+import multiprocessing
+import pickle
+import threading
+import uuid
+from collections import Counter, deque
+from concurrent.futures import Future, ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from contextlib import contextmanager
+from itertools import batched
+
+from django.conf import settings
+from django.db.models import Q
+from django.utils import timezone
+
+from config.pagination import planner_estimate
+from purly.requisition.models import RequisitionLine
+from purly.user.models import CustomUser
+
+from .models import ApprovalChain
+from .routing import (
+    HEADER_FIELD_PATHS,
+    LINE_FIELD_PATHS,
+    LineColumns,
+    RegexBudgetExceededError,
+    compile_routing_plan,
+    routing_plan_cache,
+)
+
+# Plans a pool worker last unpickled, so each simulation's plans load once per worker.
+worker_state = {}
+
+
+def route(plan, snapshot, today):
+    _, header, lines, total_amount = snapshot
+
+    try:
+        return [chain.id for chain in plan.evaluate(header, lines, total_amount, today)]
+    except RegexBudgetExceededError:
+        return None
+
+
+def route_chunk(chunk, today, plans):
+    baseline, proposed = plans
+
+    return [
+        (snapshot[0], route(baseline, snapshot, today), route(proposed, snapshot, today))
+        for snapshot in chunk
+    ]
+
+
+def route_pooled_chunk(key, payload, chunk, today):
+    if worker_state.get("key") != key:
+        worker_state["plans"] = pickle.loads(payload)  # noqa: S301
+        worker_state["key"] = key
+
+    return route_chunk(chunk, today, worker_state["plans"])
+
+
+class InlineExecutor:
+    def __init__(self, plans):
+        self.plans = plans
+
+    def submit_chunk(self, chunk, today):
+        future = Future()
+
+        future.set_result(route_chunk(chunk, today, self.plans))
+
+        return future
+
+
+class PooledExecutor:
+    """Submits chunks to the shared pool with the plans pickled once for the simulation."""
+
+    def __init__(self, executor, plans):
+        self.executor = executor
+        self.key = uuid.uuid4().hex
+        self.payload = pickle.dumps(plans)
+
+    def submit_chunk(self, chunk, today):
+        return self.executor.submit(route_pooled_chunk, self.key, self.payload, chunk, today)
+
+
+class SimulationPool:
+    """One pool of spawned workers per process, started by the first simulation needing it.
+
+    Requests run next to other threads (pub/sub listeners, gthread workers), and a fork
+    would copy their held locks, so workers are spawned and set Django up once each; the
+    pool then serves every later simulation in the process.
+    """
+
+    def __init__(self):
+        self.executor = None
+        self.lock = threading.Lock()
+
+    def get(self, workers):
+        from .workers import init_simulation_worker
+
+        with self.lock:
+            if self.executor is None:
+                self.executor = ProcessPoolExecutor(
+                    max_workers=workers,
+                    mp_context=multiprocessing.get_context("spawn"),
+                    initializer=init_simulation_worker,
+                )
+
+            return self.executor
+
+    def reset(self):
+        with self.lock:
+            if self.executor is not None:
+                self.executor.shutdown(wait=False, cancel_futures=True)
+
+            self.executor = None
+
+
+simulation_pool = SimulationPool()
+
+
+@contextmanager
+def simulation_executor(plans, workers, rows):
+    """Route inline for small or single-worker simulations, else on the shared pool."""
+    if workers <= 1 or rows < settings.APPROVAL_SIMULATION_INLINE_ROWS:
+        yield InlineExecutor(plans)
+
+        return
+
+    try:
+        yield PooledExecutor(simulation_pool.get(workers), plans)
+    except BrokenProcessPool:
+        simulation_pool.reset()
+
+        raise
+
+
+def iter_snapshots(queryset, header_fields, line_fields, batch_size):
+    """Snapshot requisitions in id order, a batch and its lines per two values() queries."""
+    header_paths = {
+        field: HEADER_FIELD_PATHS[field] for field in header_fields if field in HEADER_FIELD_PATHS
+    }
+    line_paths = [
+        (field, LINE_FIELD_PATHS[field]) for field in line_fields if field in LINE_FIELD_PATHS
+    ]
+    last_id = 0
+
+    while True:
+        rows = list(
+            queryset.filter(id__gt=last_id)
+            .order_by("id")
+            .values("id", "total_amount", *set(header_paths.values()))[:batch_size]
+        )
+
+        if not rows:
+            return
+
+        last_id = rows[-1]["id"]
+        lines = {row["id"]: [] for row in rows}
+
+        # A range scan keeps the query small; lines of filtered out requisitions are skipped.
+        for requisition_id, *values in (
+            RequisitionLine.objects.filter(
+                requisition_id__gte=rows[0]["id"], requisition_id__lte=last_id
+            )
+            .order_by("requisition_id", "line_number")
+            .values_list("requisition_id", *(path for _, path in line_paths))
+        ):
+            if requisition_id in lines:
+                lines[requisition_id].append(values)
+
+        yield [
+            (
+                row["id"],
+                {field: row[path] for field, path in header_paths.items()},
+                LineColumns(
+                    {
+                        field: [values[position] for values in lines[row["id"]]]
+                        for position, (field, _) in enumerate(line_paths)
+                    },
+                    len(lines[row["id"]]),
+                ),
+                row["total_amount"],
+            )
+            for row in rows
+        ]
+
+
+def compile_proposed_plan(include_chain_ids, exclude_chain_ids):
+    approval_chains = (
+        ApprovalChain.objects.active()  # type: ignore
+        .filter(Q(active=True) | Q(id__in=include_chain_ids))
+        .exclude(id__in=exclude_chain_ids)
+    )
+
+    return compile_routing_plan("simulation", approval_chains)
+
+
+class RoutingSimulation:
+    """Route requisitions against the live and a proposed set of chains, writing nothing."""
+
+    def __init__(self, include_chain_ids=(), exclude_chain_ids=(), as_of=None):
+        self.today = as_of or timezone.now().date()
+        self.baseline = routing_plan_cache.get()
+        self.proposed = compile_proposed_plan(include_chain_ids, exclude_chain_ids)
+        self.chains = {chain.id: chain for chain in (*self.baseline.chains, *self.proposed.chains)}
+        self.totals = {"requisitions": 0, "changed": 0, "errors": 0}
+        self.chain_counts = {"baseline": Counter(), "proposed": Counter()}
+        self.approver_counts = {"baseline": Counter(), "proposed": Counter()}
+
+    def run(self, queryset, *, changed_only=True):
+        """Yield one item per requisition whose routing would change (or every requisition)."""
+        workers = settings.APPROVAL_SIMULATION_WORKERS
+        rows = planner_estimate(queryset)
+        batches = iter_snapshots(
+            queryset,
+            self.baseline.header_fields | self.proposed.header_fields,
+            self.baseline.line_fields | self.proposed.line_fields,
+            settings.APPROVAL_SIMULATION_BATCH_SIZE,
+        )
+        pending = deque()
+
+        if rows is None:
+            rows = queryset.count()
+
+        with simulation_executor((self.baseline, self.proposed), workers, rows) as executor:
+            try:
+                for snapshots in batches:
+                    chunk_size = max(1, len(snapshots) // max(workers, 1))
+
+                    pending.append(
+                        [
+                            executor.submit_chunk(chunk, self.today)
+                            for chunk in batched(snapshots, chunk_size, strict=False)
+                        ]
+                    )
+
+                    # Keep one batch in flight while the next one is read from the database.
+                    if len(pending) > 1:
+                        yield from self.record(pending.popleft(), changed_only=changed_only)
+
+                while pending:
+                    yield from self.record(pending.popleft(), changed_only=changed_only)
+            finally:
+                # A closed stream leaves its queued chunks to the shared pool otherwise.
+                for futures in pending:
+                    for future in futures:
+                        future.cancel()
+
+    def record(self, futures, *, changed_only):
+        for future in futures:
+            for requisition_id, baseline_ids, proposed_ids in future.result():
+                self.totals["requisitions"] += 1
+
+                if baseline_ids is None or proposed_ids is None:
+                    self.totals["errors"] += 1
+
+                    continue
+
+                for name, chain_ids in (("baseline", baseline_ids), ("proposed", proposed_ids)):
+                    self.chain_counts[name].update(chain_ids)
+
+                    for chain_id in chain_ids:
+                        self.approver_counts[name].update(self.chains[chain_id].approver_ids)
+
+                changed = baseline_ids != proposed_ids
+
+                if changed:
+                    self.totals["changed"] += 1
+
+                if changed or not changed_only:
+                    yield {
+                        "type": "requisition",
+                        "id": requisition_id,
+                        "baseline": baseline_ids,
+                        "proposed": proposed_ids,
+                    }
+
+    def summary(self):
+        chain_ids = set(self.chain_counts["baseline"]) | set(self.chain_counts["proposed"])
+        approver_ids = set(self.approver_counts["baseline"]) | set(self.approver_counts["proposed"])
+        usernames = dict(
+            CustomUser.objects.filter(id__in=approver_ids).values_list("id", "username")
+        )
+
+        return {
+            "type": "summary",
+            **self.totals,
+            "chains": [
+                {
+                    "id": chain_id,
+                    "name": self.chains[chain_id].name,
+                    "baseline": self.chain_counts["baseline"][chain_id],
+                    "proposed": self.chain_counts["proposed"][chain_id],
+                }
+                for chain_id in sorted(chain_ids)
+            ],
+            "approvers": [
+                {
+                    "id": approver_id,
+                    "username": usernames.get(approver_id),
+                    "baseline": self.approver_counts["baseline"][approver_id],
+                    "proposed": self.approver_counts["proposed"][approver_id],
+                }
+                for approver_id in sorted(approver_ids)
+            ],
+        }
+
+
+def simulate_routing(
+    queryset, include_chain_ids=(), exclude_chain_ids=(), as_of=None, *, changed_only=True
+):
+    """Stream the requisitions whose routing would change, then per chain/approver counts."""
+    simulation = RoutingSimulation(include_chain_ids, exclude_chain_ids, as_of)
+
+    yield from simulation.run(queryset, changed_only=changed_only)
+
+    yield simulation.summary()
@@ -0,0 +1,730 @@
+import io
+import json
+import random
+from datetime import date
+from decimal import Decimal
+from types import SimpleNamespace
+
+from django.contrib import admin
+from django.core.cache import cache
+from django.core.management import CommandError, call_command
+from django.db import connection
+from django.test import SimpleTestCase, modify_settings, override_settings
+from django.test.utils import CaptureQueriesContext
+from rest_framework import status
+from rest_framework.test import APIRequestFactory, APITestCase
+
+from purly.address.models import Address
+from purly.metrics import read_counters
+from purly.requisition.models import Requisition, RequisitionLine, RequisitionStatusChoices
+from purly.user.models import CustomUser
+
+from .admin import ApprovalAdmin
+from .management.commands.benchmark_routing import (
+    build_chain,
+    build_line_objects,
+    build_line_rule_chain,
+    build_requisition,
+    build_substring_chain,
+    build_substring_requisition,
+    row_wise_evaluation,
+)
+from .models import (
+    Approval,
+    ApprovalChain,
+    ApprovalChainHeaderRule,
+    ApprovalChainLineRule,
+    ApprovalGroup,
+    ApprovalStatusChoices,
+)
+from .routing import (
+    REGEX_BUDGET_EXCEEDED_METRIC,
+    AutomatonLookup,
+    CompiledChain,
+    CompiledHeaderRule,
+    CompiledLineRule,
+    RoutingPlan,
+    SubstringAutomaton,
+    routing_plan_cache,
+)
+from .services import bulk_transition_approvals, sync_approval_sequence
+from .simulation import simulation_pool
+
+factory = APIRequestFactory()
+
+
+class ApprovalRoutingTests(APITestCase):
+    def setUp(self):
+        cache.clear()
+        routing_plan_cache.clear()
+
+        self.user = CustomUser.objects.create_user(username="test", password="test")  # noqa: S106
+        self.approver = CustomUser.objects.create_user(
+            username="approver",
+            password="approver",  # noqa: S106
+        )
+
+        self.client.defaults["HTTP_USER_AGENT"] = "test"
+        self.client.force_login(user=self.user)
+
+        self.address = Address.objects.create(
+            owner=self.user,
+            name="test",
+            attention="test",
+            street1="test",
+            city="test",
+            state="test",
+            zip_code="test",
+            country="US",
+        )
+        self.requisition = Requisition.objects.create(
+            name="test",
+            owner=self.user,
+            supplier="Acme Corp",
+            justification="test",
+            total_amount=Decimal("100.00"),
+        )
+
+        RequisitionLine.objects.create(
+            requisition=self.requisition,
+            line_number=1,
+            description="laptop",
+            category="IT",
+            payment_term="net_30",
+            line_total=Decimal("100.00"),
+            ship_to=self.address,
+        )
+
+        self.approval_chain = ApprovalChain.objects.create(
+            name="test",
+            approver=self.approver,
+            sequence_number=1,
+            min_amount=Decimal("1.00"),
+        )
+
+        self.url = f"/api/v1/requisitions/{self.requisition.pk}/submit/"
+
+    def test_submit_matches_header_rule(self):
+        ApprovalChainHeaderRule.objects.create(
+            approval_chain=self.approval_chain,
+            field="supplier",
+            lookup="iexact",
+            value=["acme corp"],
+        )
+
+        response = self.client.post(self.url, format="json")
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data["status"], RequisitionStatusChoices.PENDING_APPROVAL)
+
+        approval = Approval.objects.get(requisition=self.requisition)
+
+        self.assertEqual(approval.approver, self.approver)
+        self.assertEqual(approval.status, ApprovalStatusChoices.PENDING)
+        self.assertEqual(approval.rule_metadata["approver"]["username"], "approver")
+
+    def test_submit_without_matching_chain(self):
+        ApprovalChainLineRule.objects.create(
+            approval_chain=self.approval_chain,
+            match_mode="all",
+            field="line_total",
+            lookup="gt",
+            value=["500"],
+        )
+
+        response = self.client.post(self.url, format="json")
+
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertFalse(Approval.objects.filter(requisition=self.requisition).exists())
+
+    def test_rule_change_invalidates_compiled_plan(self):
+        rule = ApprovalChainHeaderRule.objects.create(
+            approval_chain=self.approval_chain, field="supplier", lookup="exact", value=["Other"]
+        )
+
+        self.assertEqual(routing_plan_cache.get().match(self.requisition, []), [])
+
+        rule.value = ["Acme Corp"]
+        rule.save()
+
+        matched = routing_plan_cache.get().match(self.requisition, [])
+
+        self.assertEqual([chain.id for chain in matched], [self.approval_chain.id])
+
+    @override_settings(APPROVAL_ROUTING_TRACE_SAMPLE_RATE=0.0)
+    def test_submit_explain_traces_routing_for_staff(self):
+        other_chain = ApprovalChain.objects.create(
+            name="other",
+            approver=self.approver,
+            sequence_number=2,
+            min_amount=Decimal("1.00"),
+        )
+        rule = ApprovalChainHeaderRule.objects.create(
+            approval_chain=other_chain, field="supplier", lookup="contains", value=["Other"]
+        )
+        ApprovalChainHeaderRule.objects.create(
+            approval_chain=other_chain, field="name", lookup="icontains", value=["test"]
+        )
+
+        self.user.is_staff = True
+        self.user.save()
+
+        response = self.client.post(f"{self.url}?explain=1", format="json")
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+        explain = response.data["explain"]
+
+        self.assertEqual(explain["matched_chains"], [self.approval_chain.id])
+        self.assertEqual(
+            [(chain["id"], chain["matched"]) for chain in explain["chains"]],
+            [(self.approval_chain.id, True), (other_chain.id, False)],
+        )
+        self.assertEqual(explain["chains"][1]["decided_by"]["field"], rule.field)
+        self.assertEqual(explain["chains"][1]["decided_by"]["value"], ["Other"])
+
+        response = self.client.get("/api/v1/approvals/routing-metrics/")
+
+        self.assertEqual(response.data["approval.routing.traces"], 1)
+        self.assertEqual(
+            {chain["id"]: chain["evaluations"] for chain in response.data["chains"]},
+            {self.approval_chain.id: 1, other_chain.id: 1},
+        )
+
+    def test_submit_explain_traces_rejected_submits(self):
+        self.approver.is_active = False
+        self.approver.save()
+
+        self.user.is_staff = True
+        self.user.save()
+
+        response = self.client.post(f"{self.url}?explain=1", format="json")
+
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn("inactive approver", response.data["errors"][0]["detail"])
+        self.assertEqual(response.data["explain"]["matched_chains"], [self.approval_chain.id])
+        self.assertFalse(Approval.objects.exists())
+
+    def test_submit_explain_ignored_for_non_staff(self):
+        response = self.client.post(f"{self.url}?explain=1", format="json")
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertNotIn("explain", response.data)
+
+    def test_group_without_active_approvers_blocks_submit(self):
+        approval_group = ApprovalGroup.objects.create(name="test")
+
+        approval_group.approver.add(self.approver)
+
+        self.approval_chain.approver_mode = "group"
+        self.approval_chain.approver = None
+        self.approval_chain.approver_group = approval_group
+        self.approval_chain.save()
+
+        self.approver.is_active = False
+        self.approver.save()
+
+        response = self.client.post(self.url, format="json")
+
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    @override_settings(APPROVAL_REGEX_TIMEOUT_FALLBACK="fail")
+    def test_regex_over_time_budget_fails_submit(self):
+        self.requisition.justification = "a" * 40 + "b"
+        self.requisition.save()
+
+        ApprovalChainHeaderRule.objects.create(
+            approval_chain=self.approval_chain,
+            field="justification",
+            lookup="regex",
+            value=["(a+)+$"],
+        )
+
+        response = self.client.post(self.url, format="json")
+
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(
+            read_counters([REGEX_BUDGET_EXCEEDED_METRIC]), {REGEX_BUDGET_EXCEEDED_METRIC: 1}
+        )
+
+        self.client.force_login(
+            user=CustomUser.objects.create_user(username="staff", is_staff=True)
+        )
+
+        response = self.client.get("/api/v1/approvals/routing-metrics/")
+
+        self.assertEqual(response.data[REGEX_BUDGET_EXCEEDED_METRIC], 1)
+
+    def test_simulation_streams_changes_without_writing(self):
+        other_approver = CustomUser.objects.create_user(username="other")
+        proposed_chain = ApprovalChain.objects.create(
+            name="proposed",
+            approver=other_approver,
+            sequence_number=2,
+            min_amount=Decimal("1.00"),
+            active=False,
+        )
+
+        ApprovalChainHeaderRule.objects.create(
+            approval_chain=proposed_chain, field="supplier", lookup="exact", value=["Acme Corp"]
+        )
+
+        self.client.force_login(
+            user=CustomUser.objects.create_user(username="staff", is_staff=True)
+        )
+
+        response = self.client.post(
+            "/api/v1/approvals/simulate/?supplier=Acme Corp",
+            {"include_chains": [proposed_chain.id]},
+            format="json",
+        )
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+        *changes, summary = [
+            json.loads(line) for line in b"".join(response.streaming_content).splitlines()
+        ]
+
+        self.assertEqual(
+            changes,
+            [
+                {
+                    "type": "requisition",
+                    "id": self.requisition.id,
+                    "baseline": [self.approval_chain.id],
+                    "proposed": [self.approval_chain.id, proposed_chain.id],
+                }
+            ],
+        )
+        self.assertEqual(summary["requisitions"], 1)
+        self.assertEqual(summary["changed"], 1)
+        self.assertIn(
+            {"id": other_approver.id, "username": "other", "baseline": 0, "proposed": 1},
+            summary["approvers"],
+        )
+        self.assertFalse(Approval.objects.exists())
+
+        # A handful of requisitions routes inline, without starting the worker pool.
+        self.assertIsNone(simulation_pool.executor)
+
+
+class ApprovalSequenceTests(APITestCase):
+    def setUp(self):
+        cache.clear()
+        routing_plan_cache.clear()
+
+        self.user = CustomUser.objects.create_user(username="test", password="test")  # noqa: S106
+        self.first = CustomUser.objects.create_user(username="first")
+        self.second = CustomUser.objects.create_user(username="second")
+
+        self.client.defaults["HTTP_USER_AGENT"] = "test"
+        self.client.force_login(user=self.user)
+
+        self.requisition = Requisition.objects.create(
+            name="test",
+            owner=self.user,
+            supplier="Acme Corp",
+            justification="test",
+            total_amount=Decimal("100.00"),
+        )
+
+        for sequence_number, approver in ((1, self.first), (2, self.second)):
+            ApprovalChain.objects.create(
+                name=approver.username,
+                approver=approver,
+                sequence_number=sequence_number,
+                min_amount=Decimal("1.00"),
+            )
+
+    def approve(self, approver):
+        approval = Approval.objects.get(requisition=self.requisition, approver=approver)
+
+        self.client.force_login(user=approver)
+
+        return self.client.post(f"/api/v1/approvals/{approval.pk}/approve/", format="json")
+
+    def assert_sequence(self, current_sequence_number, pending_approval_count):
+        self.requisition.refresh_from_db()
+
+        self.assertEqual(
+            (self.requisition.current_sequence_number, self.requisition.pending_approval_count),
+            (current_sequence_number, pending_approval_count),
+        )
+
+    def test_sequence_follows_submit_and_approvals(self):
+        self.client.post(f"/api/v1/requisitions/{self.requisition.pk}/submit/", format="json")
+
+        self.assert_sequence(1, 2)
+
+        response = self.approve(self.second)
+
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+        response = self.approve(self.first)
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assert_sequence(2, 1)
+
+        response = self.approve(self.second)
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assert_sequence(None, 0)
+
+    def test_reject_cancels_pending_sequence(self):
+        self.client.post(f"/api/v1/requisitions/{self.requisition.pk}/submit/", format="json")
+
+        approval = Approval.objects.get(requisition=self.requisition, approver=self.first)
+
+        self.client.force_login(user=self.first)
+
+        response = self.client.post(f"/api/v1/approvals/{approval.pk}/reject/", format="json")
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assert_sequence(None, 0)
+
+    def test_admin_edits_resync_the_sequence(self):
+        self.client.post(f"/api/v1/requisitions/{self.requisition.pk}/submit/", format="json")
+
+        approval = Approval.objects.get(requisition=self.requisition, approver=self.first)
+        approval.status = ApprovalStatusChoices.SKIPPED
+
+        request = factory.post("/admin/approval/approval/")
+        request.user = self.user
+
+        ApprovalAdmin(Approval, admin.site).save_model(
+            request,
+            approval,
+            SimpleNamespace(changed_data=["status"], initial={"requisition": self.requisition.pk}),
+            change=True,
+        )
+
+        self.assert_sequence(2, 1)
+
+    def test_command_verifies_and_backfills(self):
+        self.client.post(f"/api/v1/requisitions/{self.requisition.pk}/submit/", format="json")
+
+        call_command("sync_approval_sequences", "--verify", stdout=io.StringIO())
+
+        Requisition.objects.filter(pk=self.requisition.pk).update(
+            current_sequence_number=None, pending_approval_count=None
+        )
+
+        with self.assertRaises(CommandError):  # noqa: PT027
+            call_command("sync_approval_sequences", "--verify", stdout=io.StringIO())
+
+        self.assert_sequence(None, None)
+
+        call_command("sync_approval_sequences", stdout=io.StringIO())
+
+        self.assert_sequence(1, 2)
+
+
+class ApprovalBulkActionTests(APITestCase):
+    def setUp(self):
+        cache.clear()
+        routing_plan_cache.clear()
+
+        self.staff = CustomUser.objects.create_user(username="staff", is_staff=True)
+        self.owner = CustomUser.objects.create_user(username="owner")
+        self.first = CustomUser.objects.create_user(username="first")
+        self.second = CustomUser.objects.create_user(username="second")
+
+        self.client.defaults["HTTP_USER_AGENT"] = "test"
+        self.client.force_login(user=self.staff)
+
+    def submit(self, count):
+        requisitions = []
+
+        for index in range(count):
+            requisition = Requisition.objects.create(
+                name=f"test {index}",
+                owner=self.owner,
+                status=RequisitionStatusChoices.PENDING_APPROVAL,
+                supplier="Acme Corp",
+                justification="test",
+                total_amount=Decimal("100.00"),
+            )
+
+            Approval.objects.bulk_create(
+                [
+                    Approval(requisition=requisition, approver=self.first, sequence_number=1),
+                    Approval(requisition=requisition, approver=self.second, sequence_number=2),
+                ]
+            )
+
+            requisitions.append(sync_approval_sequence(requisition))
+
+        return requisitions
+
+    def bulk(self, action, approvals):
+        return self.client.post(
+            "/api/v1/approvals/bulk/",
+            {"action": action, "approvals": [approval.id for approval in approvals]},
+            format="json",
+        )
+
+    def test_bulk_approve_walks_sequences_and_completes(self):
+        requisitions = self.submit(3)
+        approvals = Approval.objects.filter(requisition__in=requisitions)
+        later = list(approvals.filter(sequence_number=2))
+
+        response = self.bulk("approve", later)
+
+        self.assertEqual(response.data["changed"], [])
+        self.assertEqual(len(response.data["ineligible"]), 3)
+
+        response = self.bulk("approve", approvals)
+
+        self.assertEqual(len(response.data["changed"]), 6)
+
+        for requisition in requisitions:
+            requisition.refresh_from_db()
+
+            self.assertEqual(requisition.status, RequisitionStatusChoices.APPROVED)
+            self.assertEqual(requisition.pending_approval_count, 0)
+
+    def test_bulk_reject_cancels_remaining_approvals(self):
+        requisitions = self.submit(2)
+        approvals = list(Approval.objects.filter(requisition__in=requisitions))
+
+        response = self.bulk("reject", approvals)
+
+        self.assertEqual(len(response.data["changed"]), 2)
+        self.assertEqual(Approval.objects.filter(status=ApprovalStatusChoices.CANCELLED).count(), 2)
+
+        for requisition in requisitions:
+            requisition.refresh_from_db()
+
+            self.assertEqual(requisition.status, RequisitionStatusChoices.REJECTED)
+            self.assertIsNone(requisition.current_sequence_number)
+
+    def test_bulk_query_count_does_not_grow_with_selection(self):
+        small = Approval.objects.filter(requisition__in=self.submit(2), sequence_number=1)
+        large = Approval.objects.filter(requisition__in=self.submit(20), sequence_number=1)
+
+        with CaptureQueriesContext(connection) as small_queries:
+            bulk_transition_approvals([approval.id for approval in small], "skip", self.staff)
+
+        with CaptureQueriesContext(connection) as large_queries:
+            bulk_transition_approvals([approval.id for approval in large], "skip", self.staff)
+
+        self.assertEqual(len(small_queries), len(large_queries))
+
+    def test_bulk_requires_staff(self):
+        self.client.force_login(user=self.first)
+
+        response = self.bulk("approve", Approval.objects.all())
+
+        self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
+
+
+@modify_settings(MIDDLEWARE={"remove": "silk.middleware.SilkyMiddleware"})
+class ApprovalResponseCacheTests(APITestCase):
+    def setUp(self):
+        cache.clear()
+
+        self.owner = CustomUser.objects.create_user(username="owner")
+        self.first = CustomUser.objects.create_user(username="first")
+        self.second = CustomUser.objects.create_user(username="second")
+
+        self.client.defaults["HTTP_USER_AGENT"] = "test"
+
+        self.requisition = Requisition.objects.create(
+            name="test",
+            owner=self.owner,
+            status=RequisitionStatusChoices.PENDING_APPROVAL,
+            supplier="Acme Corp",
+            justification="test",
+            total_amount=Decimal("100.00"),
+        )
+        self.approval = Approval.objects.create(
+            requisition=self.requisition, approver=self.first, sequence_number=1
+        )
+        self.other = Approval.objects.create(
+            requisition=self.requisition, approver=self.second, sequence_number=2
+        )
+
+        self.url = "/api/v1/approvals/mine/"
+
+    def mine(self, user, query=""):
+        self.client.force_login(user=user)
+
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(f"{self.url}{query}")
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+        approval_table = Approval._meta.db_table
+        reads = sum(f'"{approval_table}"' in query["sql"] for query in queries)
+
+        return response.data["results"], reads
+
+    def test_repeated_lists_are_served_from_the_cache(self):
+        _, reads = self.mine(self.first)
+
+        self.assertGreater(reads, 0)
+
+        results, reads = self.mine(self.first)
+
+        self.assertEqual(reads, 0)
+        self.assertEqual([row["id"] for row in results], [self.approval.id])
+
+        # The normalized query string keys its own entry.
+        _, reads = self.mine(self.first, "?ordering=created_at")
+
+        self.assertGreater(reads, 0)
+
+    def test_writes_retire_only_the_owners_entries(self):
+        self.mine(self.first)
+        self.mine(self.second)
+
+        self.approval.comment = "changed"
+        self.approval.save()
+
+        results, reads = self.mine(self.first)
+
+        self.assertGreater(reads, 0)
+        self.assertEqual(results[0]["comment"], "changed")
+
+        _, reads = self.mine(self.second)
+
+        self.assertEqual(reads, 0)
+
+    def test_reassignments_retire_the_previous_approvers_entries(self):
+        self.mine(self.first)
+
+        approval = Approval.objects.get(pk=self.approval.pk)
+        approval.approver = self.second
+
+        with CaptureQueriesContext(connection) as queries:
+            approval.save()
+
+        self.assertFalse(any(query["sql"].startswith("SELECT") for query in queries))
+
+        results, reads = self.mine(self.first)
+
+        self.assertGreater(reads, 0)
+        self.assertEqual(results, [])
+
+    def test_set_based_service_updates_retire_entries(self):
+        self.mine(self.second)
+
+        sync_approval_sequence(self.requisition)
+        bulk_transition_approvals([self.approval.id], "reject", self.owner)
+
+        results, reads = self.mine(self.second)
+
+        # The rejection cancelled the second approval, which drops out of the list.
+        self.assertGreater(reads, 0)
+        self.assertEqual(results, [])
+
+
+class ApprovalRoutingIndexTests(SimpleTestCase):
+    def test_index_matches_linear_scan(self):
+        rng = random.Random(7)
+        today = date(2025, 1, 1)
+        plan = RoutingPlan("test", [build_chain(rng, chain_id) for chain_id in range(1, 2001)])
+
+        for _ in range(100):
+            header, lines, total_amount = build_requisition(rng, rng.randint(0, 5))
+
+            self.assertEqual(
+                plan.evaluate(header, lines, total_amount, today, use_index=True),
+                plan.evaluate(header, lines, total_amount, today, use_index=False),
+            )
+
+    def test_all_lines_rule_matches_without_lines(self):
+        chain = CompiledChain(
+            id=1,
+            name="test",
+            sequence_number=1,
+            min_amount=Decimal("1.00"),
+            line_rules=[CompiledLineRule("all", "category", "exact", ["IT"])],
+        )
+        plan = RoutingPlan("test", [chain])
+
+        matched = plan.evaluate({}, [], Decimal("10.00"), date(2025, 1, 1))
+
+        self.assertEqual(matched, [chain])
+
+    def test_substring_automaton_matches_str_methods(self):
+        patterns = ["", "he", "she", "his", "hers", "s", "ushers"]
+        automaton = SubstringAutomaton(patterns)
+
+        for text in ["", "ushers", "she sells", "this", "h", "hershe"]:
+            found, prefixes, suffixes = automaton.scan(text)
+
+            self.assertEqual(found, {i for i, val in enumerate(patterns) if val in text})
+            self.assertEqual(
+                prefixes, {i for i, val in enumerate(patterns) if text.startswith(val)}
+            )
+            self.assertEqual(suffixes, {i for i, val in enumerate(patterns) if text.endswith(val)})
+
+    def test_substring_automata_match_per_rule_lookups(self):
+        rng = random.Random(11)
+        today = date(2025, 1, 1)
+
+        def build_chains():
+            chain_rng = random.Random(3)
+
+            return [build_substring_chain(chain_rng, chain_id) for chain_id in range(1, 301)]
+
+        scan_plan = RoutingPlan("test", build_chains(), substring_automata=False)
+        automaton_plan = RoutingPlan("test", build_chains())
+
+        # 300 chains give each substring field enough patterns to be served by an automaton.
+        self.assertEqual(
+            {field for field, _ in automaton_plan.automata},
+            {"supplier", "description", "manufacturer"},
+        )
+        self.assertTrue(
+            any(
+                isinstance(rule.lookup, AutomatonLookup)
+                for chain in automaton_plan.chains
+                for rule in chain.line_rules
+            )
+        )
+
+        for _ in range(20):
+            header, lines, total_amount = build_substring_requisition(rng, rng.randint(0, 30))
+
+            self.assertEqual(
+                [chain.id for chain in automaton_plan.evaluate(header, lines, total_amount, today)],
+                [chain.id for chain in scan_plan.evaluate(header, lines, total_amount, today)],
+            )
+
+    def test_regex_over_time_budget_does_not_match(self):
+        chain = CompiledChain(
+            id=1,
+            name="test",
+            sequence_number=1,
+            min_amount=Decimal("1.00"),
+            header_rules=[CompiledHeaderRule("justification", "regex", ["(a+)+$"])],
+        )
+        plan = RoutingPlan("test", [chain])
+
+        matched = plan.evaluate(
+            {"justification": "a" * 40 + "b"}, [], Decimal("10.00"), date(2025, 1, 1)
+        )
+
+        self.assertEqual(matched, [])
+
+    def test_line_columns_match_row_wise_evaluation(self):
+        rng = random.Random(5)
+        today = date(2025, 1, 1)
+        plan = RoutingPlan(
+            "test", [build_line_rule_chain(rng, chain_id) for chain_id in range(1, 41)]
+        )
+
+        for _ in range(30):
+            lines = build_line_objects(rng, rng.randint(0, 20))
+
+            if lines and rng.random() < 0.5:  # noqa: PLR2004
+                rng.choice(lines).unit_price = None
+
+            matched = plan.evaluate({}, plan.line_columns(lines), Decimal(100), today)
+
+            self.assertEqual(
+                [chain.id for chain in matched],
+                row_wise_evaluation(plan, lines, Decimal(100), today),
+            )
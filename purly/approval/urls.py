@@ -1,14 +1,23 @@
 from django.urls import path
 from rest_framework import routers
 
-from .views import ApprovalMineListView, ApprovalViewSet
+from .views import (
+    ApprovalBulkActionView,
+    ApprovalMineListView,
+    ApprovalRoutingMetricsView,
+    ApprovalSimulationView,
+    ApprovalViewSet,
+)
 
 router = routers.SimpleRouter()
 
 router.register(r"", ApprovalViewSet, basename="approvals")
 
 urlpatterns = [
+    path("bulk/", ApprovalBulkActionView.as_view()),
     path("mine/", ApprovalMineListView.as_view()),
+    path("routing-metrics/", ApprovalRoutingMetricsView.as_view()),
+    path("simulate/", ApprovalSimulationView.as_view()),
 ]
 
 urlpatterns += router.urls
@@ -1,28 +1,53 @@
+import json
+
+from django.conf import settings
 from django.db import transaction
-from django.http import Http404
+from django.http import Http404, StreamingHttpResponse
 from drf_spectacular.utils import extend_schema
-from rest_framework import exceptions, filters, generics, mixins, viewsets
+from rest_framework import exceptions, filters, generics, mixins, views, viewsets
 from rest_framework.decorators import action
-from rest_framework.permissions import IsAuthenticated
+from rest_framework.permissions import IsAdminUser, IsAuthenticated
 from rest_framework.response import Response
 
+from purly.base import SparseFieldsViewMixin
+from purly.caching import CachedListMixin
+from purly.conditional import ConditionalGetMixin
+from purly.filtering import IndexedFilterBackend
+from purly.metrics import read_counters
 from purly.permissions import IsOwnerOrAdmin
+from purly.readers import CompiledListMixin
+from purly.requisition.filters import REQUISITION_FILTER_FIELDS
+from purly.requisition.models import Requisition
+from purly.user.models import CustomUser
 
 from .models import Approval, ApprovalStatusChoices
 from .pagination import ApprovalPagination
+from .routing import ROUTING_METRICS, read_chain_metrics, routing_plan_cache
 from .serializers import (
+    ApprovalBulkActionSerializer,
     ApprovalDetailSerializer,
     ApprovalListSerializer,
     ApprovalRequestSerializer,
+    ApprovalSimulationSerializer,
 )
 from .services import (
     approval_request_validation,
+    bulk_transition_approvals,
     on_approve_skip,
     on_reject,
 )
-
-
-class ApprovalViewSet(mixins.ListModelMixin, mixins.RetrieveModelMixin, viewsets.GenericViewSet):
+from .simulation import simulate_routing
+
+
+class ApprovalViewSet(
+    CachedListMixin,
+    ConditionalGetMixin,
+    CompiledListMixin,
+    SparseFieldsViewMixin,
+    mixins.ListModelMixin,
+    mixins.RetrieveModelMixin,
+    viewsets.GenericViewSet,
+):
     http_method_names = ["get", "post"]
     permission_classes = [IsOwnerOrAdmin]
     queryset = Approval.objects.active().select_related("approver", "created_by", "updated_by")  # type: ignore
@@ -30,6 +55,7 @@ class ApprovalViewSet(mixins.ListModelMixin, mixins.RetrieveModelMixin, viewsets
     pagination_class = ApprovalPagination
     filter_backends = [filters.OrderingFilter]
     ordering_fields = ["created_at", "updated_at"]
+    cache_models = (Approval, CustomUser)
 
     def get_queryset(self):
         user = self.request.user
@@ -47,20 +73,15 @@ class ApprovalViewSet(mixins.ListModelMixin, mixins.RetrieveModelMixin, viewsets
 
     @extend_schema(summary="List approvals", request=None, responses=ApprovalListSerializer)
     def list(self, request, *args, **kwargs):
-        queryset = self.filter_queryset(self.get_queryset())
-        page = self.paginate_queryset(queryset)
-
-        if page is not None:
-            serializer = ApprovalListSerializer(page, many=True)
-
-            return self.get_paginated_response(serializer.data)
-
-        serializer = self.get_serializer(queryset, many=True)
-
-        return Response(serializer.data)
+        return super().list(request, *args, **kwargs)
 
     @extend_schema(summary="Retrieve approval", request=None, responses=ApprovalDetailSerializer)
     def retrieve(self, request, *args, **kwargs):
+        not_modified = self.not_modified()
+
+        if not_modified is not None:
+            return not_modified
+
         approval = self.get_object()
         serializer = ApprovalDetailSerializer(approval)
 
@@ -116,13 +137,23 @@ class ApprovalViewSet(mixins.ListModelMixin, mixins.RetrieveModelMixin, viewsets
     request=None,
     responses=ApprovalListSerializer,
 )
-class ApprovalMineListView(generics.ListAPIView):
+class ApprovalMineListView(
+    CachedListMixin,
+    ConditionalGetMixin,
+    CompiledListMixin,
+    SparseFieldsViewMixin,
+    generics.ListAPIView,
+):
     http_method_names = ["get"]
     permission_classes = [IsAuthenticated]
     serializer_class = ApprovalListSerializer
     pagination_class = ApprovalPagination
     filter_backends = [filters.OrderingFilter]
     ordering_fields = ["created_at", "updated_at"]
+    cache_models = (Approval, CustomUser)
+
+    def cache_owner_scoped(self):
+        return True
 
     def get_queryset(self):
         return (
@@ -131,3 +162,76 @@ class ApprovalMineListView(generics.ListAPIView):
             .exclude(status=ApprovalStatusChoices.CANCELLED)
             .select_related("approver", "created_by", "updated_by")
         )
+
+
+@extend_schema(summary="Approve, reject or skip approvals in bulk", responses=dict)
+class ApprovalBulkActionView(generics.GenericAPIView):
+    http_method_names = ["post"]
+    permission_classes = [IsAdminUser]
+    serializer_class = ApprovalBulkActionSerializer
+
+    def post(self, request, *args, **kwargs):
+        serializer = self.get_serializer(data=request.data)
+
+        serializer.is_valid(raise_exception=True)
+
+        approval_ids = serializer.validated_data["approvals"]
+        changed = bulk_transition_approvals(
+            approval_ids,
+            serializer.validated_data["action"],
+            request.user,
+            serializer.validated_data.get("comment"),
+        )
+
+        return Response(
+            {
+                "action": serializer.validated_data["action"],
+                "changed": changed,
+                "ineligible": sorted(set(approval_ids) - set(changed)),
+            }
+        )
+
+
+@extend_schema(summary="Retrieve approval routing metrics", request=None, responses=dict)
+class ApprovalRoutingMetricsView(views.APIView):
+    http_method_names = ["get"]
+    permission_classes = [IsAdminUser]
+
+    def get(self, request, *args, **kwargs):
+        chains = read_chain_metrics(
+            routing_plan_cache.get().chains, limit=settings.APPROVAL_ROUTING_TRACE_TOP_CHAINS
+        )
+
+        return Response({**read_counters(ROUTING_METRICS), "chains": chains})
+
+
+@extend_schema(
+    summary="Simulate approval routing",
+    request=ApprovalSimulationSerializer,
+    responses={(200, "application/x-ndjson"): dict},
+)
+class ApprovalSimulationView(generics.GenericAPIView):
+    http_method_names = ["post"]
+    permission_classes = [IsAdminUser]
+    queryset = Requisition.objects.active()  # type: ignore
+    serializer_class = ApprovalSimulationSerializer
+    filter_backends = [IndexedFilterBackend]
+    filterset_fields = REQUISITION_FILTER_FIELDS
+
+    def post(self, request, *args, **kwargs):
+        serializer = self.get_serializer(data=request.data)
+
+        serializer.is_valid(raise_exception=True)
+
+        results = simulate_routing(
+            self.filter_queryset(self.get_queryset()),
+            serializer.validated_data["include_chains"],
+            serializer.validated_data["exclude_chains"],
+            serializer.validated_data.get("as_of"),
+            changed_only=serializer.validated_data["changed_only"],
+        )
+
+        return StreamingHttpResponse(
+            (f"{json.dumps(result)}\n" for result in results),
+            content_type="application/x-ndjson",
+        )
@@ -0,0 +1,9 @@
+import django
+
+
+def init_simulation_worker():
+    """Set up Django once in a spawned simulation worker, before it unpickles any task.
+
+    This module imports nothing from Django apps, so the worker can import it first.
+    """
+    django.setup()
@@ -1,9 +1,13 @@
 from django.conf import settings
 from django.contrib import admin, messages
+from django.core.exceptions import FieldDoesNotExist
 from django.db import models
 from django.http import HttpResponseRedirect
+from django.utils.functional import cached_property
 from rest_framework import serializers
 
+from config.exceptions import BadRequest
+
 
 class CustomToRepresentation(serializers.ModelSerializer):
     def to_representation(self, instance):
@@ -19,6 +23,98 @@ class CustomToRepresentation(serializers.ModelSerializer):
         return data
 
 
+class SparseFieldsSerializerMixin:
+    """Serializer accepting a `fields` argument that drops every other declared field."""
+
+    def __init__(self, *args, fields=None, **kwargs):
+        super().__init__(*args, **kwargs)
+
+        if fields is not None:
+            for name in set(self.fields) - set(fields):  # type: ignore
+                self.fields.pop(name)  # type: ignore
+
+
+def parse_sparse_fields(request, serializer_class):
+    value = request.query_params.get("fields")
+
+    if not value:
+        return None
+
+    fields = list(dict.fromkeys(name.strip() for name in value.split(",") if name.strip()))
+    unknown = set(fields) - set(serializer_class().fields)
+
+    if unknown:
+        raise BadRequest(detail=f"These fields are not available: {', '.join(sorted(unknown))}")
+
+    return fields
+
+
+def shape_queryset(queryset, serializer, fields):
+    """Narrow a list queryset to the columns and relations the requested fields render."""
+    opts = queryset.model._meta
+    only = {"id"}
+    select_related = []
+    prefetch_related = []
+
+    # Ordering columns stay loaded so cursors never hit a deferred field.
+    for term in queryset.query.order_by:
+        if isinstance(term, str) and "__" not in term:
+            name = term.lstrip("-")
+
+            if name not in queryset.query.annotations:
+                only.add(name)
+
+    for name in fields:
+        field = serializer.fields[name]
+
+        try:
+            model_field = opts.get_field(field.source)
+        except FieldDoesNotExist:
+            # Method and dotted-source fields can read anything, so leave the queryset alone.
+            return queryset
+
+        if model_field.many_to_many or model_field.one_to_many:
+            prefetch_related.append(field.source)
+        elif model_field.is_relation and isinstance(field, serializers.BaseSerializer):
+            select_related.append(field.source)
+            only.update(f"{field.source}__{nested.source}" for nested in field.fields.values())
+        else:
+            only.add(field.source)
+
+    queryset = queryset.select_related(None).prefetch_related(None).only(*only)
+
+    # A bare select_related() would follow every foreign key.
+    if select_related:
+        queryset = queryset.select_related(*select_related)
+
+    return queryset.prefetch_related(*prefetch_related)
+
+
+class SparseFieldsViewMixin:
+    """List views honouring `?fields=` in both the serializer output and the queryset."""
+
+    @cached_property
+    def sparse_fields(self):
+        return parse_sparse_fields(self.request, self.serializer_class)  # type: ignore
+
+    def is_sparse_list(self):
+        return getattr(self, "action", "list") == "list" and self.sparse_fields is not None
+
+    def filter_queryset(self, queryset):
+        queryset = super().filter_queryset(queryset)  # type: ignore
+
+        if not self.is_sparse_list():
+            return queryset
+
+        return shape_queryset(queryset, self.serializer_class(), self.sparse_fields)  # type: ignore
+
+    def get_serializer(self, *args, **kwargs):
+        if self.is_sparse_list():
+            kwargs.setdefault("fields", self.sparse_fields)
+
+        return super().get_serializer(*args, **kwargs)  # type: ignore
+
+
 class AdminBase(admin.ModelAdmin):
     def get_search_results(self, request, queryset, search_term):
         queryset, use_distinct = super().get_search_results(request, queryset, search_term)
@@ -65,6 +161,58 @@ class AdminBase(admin.ModelAdmin):
         return super().save_model(request, obj, form, change)
 
 
+class TrackedFieldsMixin:
+    """Model mixin keeping the stored values of `tracked_fields`, a tuple of attnames.
+
+    Values are taken when a row loads and again after each save, so save receivers can tell
+    which tracked fields a save changed without a query. Untracked or deferred fields always
+    read as changed.
+    """
+
+    tracked_fields = ()
+
+    def save(self, *args, **kwargs):
+        super().save(*args, **kwargs)  # type: ignore
+
+        update_fields = kwargs.get("update_fields")
+        names = self.tracked_fields if update_fields is None else set(update_fields)
+
+        self._tracked_values = {
+            **getattr(self, "_tracked_values", {}),
+            **{
+                name: self.__dict__[name]
+                for name in self.tracked_fields
+                if name in names and name in self.__dict__
+            },
+        }
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)  # type: ignore
+
+        instance._tracked_values = {
+            name: value
+            for name, value in zip(field_names, values, strict=True)
+            if name in cls.tracked_fields
+        }
+
+        return instance
+
+    def loaded_value(self, name):
+        """Return the stored value of a tracked field, None when it is unknown."""
+        return getattr(self, "_tracked_values", {}).get(name)
+
+    def changed_fields(self, fields):
+        """Return which of fields differ from the stored row, all of them if it is unknown."""
+        tracked = getattr(self, "_tracked_values", {})
+
+        return {
+            field
+            for field in fields
+            if field not in tracked or tracked[field] != getattr(self, field)
+        }
+
+
 class ModelBase(models.Model):
     created_at = models.DateTimeField(auto_now_add=True)
     created_by = models.ForeignKey(
@@ -0,0 +1,137 @@
+import hashlib
+import uuid
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from rest_framework.response import Response
+
+from .metrics import increment
+
+GENERATION_CACHE_PREFIX = "generation:"
+RESPONSE_CACHE_PREFIX = "response:"
+
+RESPONSE_CACHE_HIT_METRIC = "response_cache.hits"
+RESPONSE_CACHE_MISS_METRIC = "response_cache.misses"
+
+# Models cached list responses are built from, with the field naming the user a row is
+# listed for. Rows of an owned model also bump that user's own generation.
+GENERATION_OWNERS = {
+    "address.address": "owner_id",
+    "approval.approval": "approver_id",
+    "project.project": None,
+    "user.customuser": None,
+}
+
+
+def generation_key(model, owner_id=None):
+    label = model._meta.label_lower
+
+    if owner_id is None:
+        return f"{GENERATION_CACHE_PREFIX}{label}"
+
+    return f"{GENERATION_CACHE_PREFIX}{label}:{owner_id}"
+
+
+def read_generations(keys):
+    generations = cache.get_many(keys)
+    missing = [key for key in keys if key not in generations]
+
+    if missing:
+        for key in missing:
+            cache.add(key, uuid.uuid4().hex, timeout=None)
+
+        generations.update(cache.get_many(missing))
+
+    return [generations[key] for key in keys]
+
+
+def bump_generations(model, owner_ids=()):
+    keys = [generation_key(model), *(generation_key(model, owner_id) for owner_id in owner_ids)]
+
+    cache.set_many({key: uuid.uuid4().hex for key in keys}, timeout=None)
+
+
+def invalidate_responses(model, owner_ids=()):
+    """Retire every cached response built from rows of model, or of the owners' rows."""
+    owner_ids = sorted({owner_id for owner_id in owner_ids if owner_id is not None})
+
+    bump_generations(model, owner_ids)
+
+    # Bump again once committed so no request caches a response read before the commit.
+    transaction.on_commit(lambda: bump_generations(model, owner_ids))
+
+
+def invalidate_cached_responses(sender, instance, update_fields=None, **kwargs):
+    """Retire the cached responses built from sender's rows; connected per model in ready()."""
+    # Logins only touch last_login, which no cached list renders.
+    if update_fields is not None and set(update_fields) <= {"last_login"}:
+        return
+
+    owner_field = GENERATION_OWNERS[sender._meta.label_lower]
+    owner_ids = []
+
+    if owner_field is not None:
+        # An ownership change retires the lists of the owner the row was loaded with too.
+        owner_ids = [getattr(instance, owner_field), instance.loaded_value(owner_field)]
+
+    invalidate_responses(sender, owner_ids)
+
+
+class CachedListMixin:
+    """List action served from the cache while every model it renders is unchanged.
+
+    `cache_models` lists the models the response is built from, the first being the listed
+    one. Entries are keyed by user, endpoint, normalized query string and the generation of
+    each model, so a write retires them by bumping a generation; nothing is deleted. The
+    listed model's generation is the user's own when `cache_owner_scoped()` says the rows
+    are limited to theirs.
+    """
+
+    cache_models = ()
+
+    def cache_owner_scoped(self):
+        user = self.request.user  # type: ignore
+
+        return not (user.is_staff or user.is_superuser)
+
+    def get_response_cache_key(self):
+        request = self.request  # type: ignore
+        listed, *others = self.cache_models
+        owned = GENERATION_OWNERS[listed._meta.label_lower] is not None
+        owner_id = request.user.pk if owned and self.cache_owner_scoped() else None
+        generations = read_generations(
+            [generation_key(listed, owner_id), *(generation_key(model) for model in others)]
+        )
+        query = sorted((name, sorted(values)) for name, values in request.query_params.lists())
+        digest = hashlib.sha256(repr((request.get_host(), query, generations)).encode()).hexdigest()
+
+        return f"{RESPONSE_CACHE_PREFIX}{type(self).__name__}:{request.user.pk}:{digest}"
+
+    def list(self, request, *args, **kwargs):
+        key = self.get_response_cache_key()
+        entry = cache.get(key)
+
+        if entry is None:
+            increment(RESPONSE_CACHE_MISS_METRIC)
+
+            response = super().list(request, *args, **kwargs)  # type: ignore
+
+            if response.status_code == 200:  # noqa: PLR2004
+                entry = {"data": response.data, "headers": getattr(self, "conditional_headers", {})}
+
+                cache.set(key, entry, timeout=settings.RESPONSE_CACHE_TIMEOUT)
+
+            return response
+
+        increment(RESPONSE_CACHE_HIT_METRIC)
+
+        if entry["headers"]:
+            self.conditional_headers = entry["headers"]
+
+            response = self.conditional_response()  # type: ignore
+
+            if response is not None:
+                return response
+
+        return Response(entry["data"])
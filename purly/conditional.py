@@ -0,0 +1,171 @@
+import hashlib
+
+from django.conf import settings
+from django.db.models import Count, Max
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date, parse_http_date
+
+from config.pagination import planner_estimate
+
+CONDITIONAL_HEADERS = ("HTTP_IF_NONE_MATCH", "HTTP_IF_MODIFIED_SINCE")
+
+
+class ConditionalGetMixin:
+    """List and retrieve answering If-None-Match/If-Modified-Since with 304 before serializing.
+
+    Validators come from the rows a response renders: their count and max(updated_at), plus
+    the same for each relation in `get_etag_related()` whose rows are embedded in the body.
+    Rows embedded through foreign keys (owner, project) are not tracked. Retrieve actions
+    call `not_modified()` first, which costs one aggregate and only when the request carries
+    validators; a 200 detail takes its validators from the object it already loaded.
+
+    Lists are fingerprinted with one aggregate over the filtered rows, whose count the
+    paginator then reuses instead of counting again, so the validators cost no query of their
+    own. Only paginations of large tables (`estimate_count`) plan the rows first; cursor
+    walks and result sets large enough for an estimated count skip the aggregate, which
+    would cost the scan the estimate avoids. The filtered queryset is left on the view for
+    CompiledListMixin. List responses carry only an ETag: max(updated_at) does not move when
+    rows leave the set, so a Last-Modified there could answer 304 for a list that lost rows.
+    """
+
+    etag_related = ()
+
+    def get_etag_related(self):
+        return list(self.etag_related)
+
+    def queryset_state(self, queryset):
+        related = self.get_etag_related()
+        aggregates = {"count": Count("id", distinct=bool(related)), "updated_at": Max("updated_at")}
+
+        for relation in related:
+            aggregates[f"{relation}_count"] = Count(f"{relation}__id", distinct=True)
+            aggregates[f"{relation}_updated_at"] = Max(f"{relation}__updated_at")
+
+        return queryset.order_by().aggregate(**aggregates)
+
+    def instance_state(self, instance):
+        """Return queryset_state() for one loaded object, read from its prefetched relations."""
+        state = {"count": 1, "updated_at": instance.updated_at}
+
+        for relation in self.get_etag_related():
+            rows = list(getattr(instance, relation).all())
+
+            state[f"{relation}_count"] = len(rows)
+            state[f"{relation}_updated_at"] = max((row.updated_at for row in rows), default=None)
+
+        return state
+
+    def set_validators(self, state, *, last_modified=True):
+        request = self.request  # type: ignore
+        values = sorted(
+            (name, value.isoformat() if hasattr(value, "isoformat") else value)
+            for name, value in state.items()
+        )
+
+        # The query string picks pages, fields and includes, and rows differ per user.
+        digest = hashlib.sha256(
+            repr((request.user.pk, request.get_full_path(), values)).encode()
+        ).hexdigest()[:32]
+        self.conditional_headers = {"ETag": f'W/"{digest}"'}
+
+        if not last_modified:
+            return
+
+        timestamps = [value for name, value in state.items() if name.endswith("updated_at")]
+        modified_at = max(filter(None, timestamps), default=None)
+
+        if modified_at is not None:
+            self.conditional_headers["Last-Modified"] = http_date(modified_at.timestamp())
+
+    def conditional_response(self):
+        """Return a 304 (or 412) when the request's preconditions hold, else None."""
+        last_modified = self.conditional_headers.get("Last-Modified")
+        response = get_conditional_response(
+            self.request,  # type: ignore
+            etag=self.conditional_headers["ETag"],
+            last_modified=last_modified and parse_http_date(last_modified),
+        )
+
+        if response is not None:
+            for header, value in self.conditional_headers.items():
+                response.headers[header] = value
+
+        return response
+
+    def not_modified(self):
+        """Return a 304 when the request's validators still match the object, else None."""
+        request = self.request  # type: ignore
+
+        if request.method not in ("GET", "HEAD"):
+            return None
+
+        if not any(header in request.META for header in CONDITIONAL_HEADERS):
+            return None
+
+        lookup_url_kwarg = self.lookup_url_kwarg or self.lookup_field  # type: ignore
+        queryset = self.filter_queryset(self.get_queryset()).filter(  # type: ignore
+            **{self.lookup_field: self.kwargs[lookup_url_kwarg]}  # type: ignore
+        )
+        state = self.queryset_state(queryset)
+
+        # A missing object is left to the action, which answers 404 as before.
+        if not state["count"]:
+            return None
+
+        self.set_validators(state)
+
+        return self.conditional_response()
+
+    def get_object(self):
+        instance = super().get_object()  # type: ignore
+
+        if self.request.method in ("GET", "HEAD"):  # type: ignore
+            self.set_validators(self.instance_state(instance))
+
+        return instance
+
+    def list_fingerprinted(self, queryset):
+        cursor_query_param = getattr(self.paginator, "cursor_query_param", None)  # type: ignore
+
+        if cursor_query_param in self.request.query_params:  # type: ignore
+            return False
+
+        # Small tables are counted exactly anyway, and the aggregate is that count.
+        if not getattr(self.paginator, "estimate_count", False):  # type: ignore
+            return True
+
+        estimate = planner_estimate(queryset)
+
+        if estimate is None or estimate < settings.PAGINATION_ESTIMATED_COUNT_THRESHOLD:
+            return True
+
+        self.list_estimate = estimate
+
+        return False
+
+    def list(self, request, *args, **kwargs):
+        queryset = self.filter_queryset(self.get_queryset())  # type: ignore
+
+        self.list_queryset = queryset
+
+        if self.list_fingerprinted(queryset):
+            state = self.queryset_state(queryset)
+
+            self.list_count = state["count"]
+            self.set_validators(state, last_modified=False)
+
+            response = self.conditional_response()
+
+            if response is not None:
+                return response
+
+        return super().list(request, *args, **kwargs)  # type: ignore
+
+    def finalize_response(self, request, response, *args, **kwargs):
+        response = super().finalize_response(request, response, *args, **kwargs)  # type: ignore
+
+        if response.status_code == 200:  # noqa: PLR2004
+            for header, value in getattr(self, "conditional_headers", {}).items():
+                response.headers[header] = value
+
+        return response
@@ -0,0 +1,252 @@
+from datetime import date, datetime, time, timedelta
+
+from django.contrib.postgres.indexes import GinIndex
+from django.db import connection, models
+from django.db.models import Lookup, Q
+from django.utils import timezone
+from django_filters import filters
+from django_filters.constants import EMPTY_VALUES
+from django_filters.rest_framework import DjangoFilterBackend, FilterSet
+
+# Case-insensitive lookups served by a pg_trgm index once rewritten to ILIKE.
+TRIGRAM_PATTERNS = {
+    "iexact": "{}",
+    "istartswith": "{}%",
+    "iendswith": "%{}",
+    "icontains": "%{}%",
+}
+TRIGRAM_LOOKUPS = {*TRIGRAM_PATTERNS, "contains", "startswith", "endswith", "regex", "iregex"}
+# Date part lookups answered with ranges once a year pins them down, read as day predicates.
+DATE_PARTS = {
+    "year": lambda day: day.year,
+    "quarter": lambda day: (day.month - 1) // 3 + 1,
+    "month": lambda day: day.month,
+    "week": lambda day: day.isocalendar().week,
+    "day": lambda day: day.day,
+}
+BTREE_LOOKUPS = {"exact", "in", "gt", "gte", "lt", "lte", "range", "isnull", "date", *DATE_PARTS}
+
+
+def trigram_index(field, name):
+    return GinIndex(fields=[field], name=name, opclasses=["gin_trgm_ops"])
+
+
+def create_trigram_extension(using, **kwargs):
+    """Migrations are generated at deploy, so the extension is created ahead of them."""
+    from django.db import connections
+
+    database = connections[using]
+
+    if database.vendor != "postgresql":
+        return
+
+    with database.cursor() as cursor:
+        cursor.execute("CREATE EXTENSION IF NOT EXISTS pg_trgm")
+
+
+@models.CharField.register_lookup
+@models.TextField.register_lookup
+class ILike(Lookup):
+    lookup_name = "ilike"
+
+    def as_sql(self, compiler, connection):
+        lhs, lhs_params = self.process_lhs(compiler, connection)
+        rhs, rhs_params = self.process_rhs(compiler, connection)
+
+        return f"{lhs} ILIKE {rhs}", [*lhs_params, *rhs_params]
+
+
+class TrigramCharFilter(filters.CharFilter):
+    """Case-insensitive text filter written as ILIKE, which a trigram index can serve.
+
+    Django writes these lookups as UPPER(column) comparisons, which no index on the
+    column itself can answer.
+    """
+
+    def filter(self, qs, value):
+        if value in EMPTY_VALUES:
+            return qs
+
+        pattern = TRIGRAM_PATTERNS[self.lookup_expr].format(
+            connection.ops.prep_for_like_query(value)
+        )
+
+        if self.distinct:
+            qs = qs.distinct()
+
+        return self.get_method(qs)(**{f"{self.field_name}__ilike": pattern})
+
+
+def matching_day_spans(parts):
+    """Return [start, end) day spans of the year in parts where every date part matches."""
+    year = parts["year"]
+    day = date(year, 1, 1)
+    spans = []
+
+    while day.year == year:
+        if all(DATE_PARTS[part](day) == value for part, value in parts.items()):
+            if spans and spans[-1][1] == day:
+                spans[-1][1] = day + timedelta(days=1)
+            else:
+                spans.append([day, day + timedelta(days=1)])
+
+        day += timedelta(days=1)
+
+    return spans
+
+
+def day_bound(field, day):
+    if not isinstance(field, models.DateTimeField):
+        return day
+
+    # Local midnight in the active timezone, the same clock EXTRACT reads the parts from.
+    return timezone.make_aware(datetime.combine(day, time.min), timezone.get_current_timezone())
+
+
+def day_span_condition(field_name, field, spans):
+    condition = Q(pk__in=[])
+
+    for start, end in spans:
+        condition |= Q(
+            **{
+                f"{field_name}__gte": day_bound(field, start),
+                f"{field_name}__lt": day_bound(field, end),
+            }
+        )
+
+    return condition
+
+
+class IndexedFilterSet(FilterSet):
+    """FilterSet writing text and date part lookups in forms an index can serve.
+
+    Case-insensitive text lookups become ILIKE for the trigram indexes. `date` and
+    `year` (with any of quarter, month, week and day alongside) become half-open ranges
+    in the active timezone instead of EXTRACT(...), so a B-tree index on the column applies.
+    A date part sent without a year still compiles to EXTRACT.
+    """
+
+    @classmethod
+    def filter_for_lookup(cls, field, lookup_type):
+        if lookup_type in TRIGRAM_PATTERNS and isinstance(
+            field, (models.CharField, models.TextField)
+        ):
+            return TrigramCharFilter, {}
+
+        return super().filter_for_lookup(field, lookup_type)
+
+    def date_range_conditions(self):
+        """Return the range condition per date field and the filter names it replaces."""
+        parts = {}
+        names = {}
+        conditions = []
+        replaced = set()
+
+        for name, value in self.form.cleaned_data.items():
+            lookup = self.filters[name].lookup_expr
+
+            if value in EMPTY_VALUES or (lookup not in DATE_PARTS and lookup != "date"):
+                continue
+
+            field_name = self.filters[name].field_name
+            _, field = resolve_filter_path(self._meta.model, field_name)
+
+            if lookup == "date":
+                conditions.append(
+                    day_span_condition(field_name, field, [[value, value + timedelta(days=1)]])
+                )
+                replaced.add(name)
+
+                continue
+
+            # A fractional part never matches EXTRACT, so it is left to the plain lookup.
+            if value != int(value):
+                continue
+
+            parts.setdefault(field_name, {})[lookup] = int(value)
+            names.setdefault(field_name, []).append(name)
+
+        for field_name, field_parts in parts.items():
+            if not date.min.year <= field_parts.get("year", 0) < date.max.year:
+                continue
+
+            _, field = resolve_filter_path(self._meta.model, field_name)
+
+            conditions.append(
+                day_span_condition(field_name, field, matching_day_spans(field_parts))
+            )
+            replaced.update(names[field_name])
+
+        return conditions, replaced
+
+    def filter_queryset(self, queryset):
+        conditions, replaced = self.date_range_conditions()
+
+        for condition in conditions:
+            queryset = queryset.filter(condition)
+
+        for name, value in self.form.cleaned_data.items():
+            if name not in replaced:
+                queryset = self.filters[name].filter(queryset, value)
+
+        return queryset
+
+
+class IndexedFilterBackend(DjangoFilterBackend):
+    filterset_base = IndexedFilterSet
+
+
+def resolve_filter_path(model, path):
+    """Return the model and concrete field a filterset_fields path ends on."""
+    *relations, name = path.split("__")
+
+    for relation in relations:
+        model = model._meta.get_field(relation).related_model
+
+    return model, model._meta.get_field(name)
+
+
+def column_indexes(model, field):
+    """Index kinds ("btree", "trigram") covering a column as the leading key."""
+    kinds = set()
+
+    if field.primary_key or field.unique or field.db_index:
+        kinds.add("btree")
+
+    for index in model._meta.indexes:
+        if not index.fields or index.fields[0].lstrip("-") != field.name:
+            continue
+
+        if isinstance(index, GinIndex):
+            if "gin_trgm_ops" in index.opclasses:
+                kinds.add("trigram")
+        else:
+            kinds.add("btree")
+
+    for fields in model._meta.unique_together:
+        if fields[0] == field.name:
+            kinds.add("btree")
+
+    return kinds
+
+
+def required_index(lookup):
+    if lookup in TRIGRAM_LOOKUPS:
+        return "trigram"
+
+    if lookup in BTREE_LOOKUPS:
+        return "btree"
+
+    # week_day, and other parts sent without a year, compile to EXTRACT(...).
+    return None
+
+
+def unindexed_filters(model, filterset_fields):
+    """Yield (path, table.column, lookups) for enabled filters no index supports."""
+    for path, lookups in filterset_fields.items():
+        target_model, field = resolve_filter_path(model, path)
+        kinds = column_indexes(target_model, field)
+        missing = [lookup for lookup in lookups if required_index(lookup) not in kinds]
+
+        if missing:
+            yield path, f"{target_model._meta.db_table}.{field.column}", missing
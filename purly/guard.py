@@ -0,0 +1,143 @@
+import time
+from contextlib import contextmanager
+
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS, OperationalError, connections, transaction
+
+from config.exceptions import BadRequest
+from config.pagination import explain
+
+from .metrics import increment, read_counters
+
+# Postgres SQLSTATE raised when statement_timeout cancels a query.
+QUERY_CANCELED = "57014"
+
+GUARD_COUNTERS = ("rejected_filters", "rejected_cost", "timeouts", "slow")
+
+
+def guard_metric(endpoint, counter):
+    return f"query_guard.{endpoint}.{counter}"
+
+
+def read_guard_metrics(endpoint):
+    values = read_counters([guard_metric(endpoint, counter) for counter in GUARD_COUNTERS])
+
+    return {counter: values[guard_metric(endpoint, counter)] for counter in GUARD_COUNTERS}
+
+
+@contextmanager
+def statement_timeout(milliseconds, using=DEFAULT_DB_ALIAS):
+    """Cancel any query running longer than milliseconds inside the block."""
+    connection = connections[using]
+
+    if not milliseconds or connection.vendor != "postgresql":
+        yield
+
+        return
+
+    with transaction.atomic(using=using):
+        with connection.cursor() as cursor:
+            cursor.execute("SET LOCAL statement_timeout = %s", [int(milliseconds)])
+
+        yield
+
+        # SET LOCAL outlives the savepoint when ATOMIC_REQUESTS wraps the request.
+        with connection.cursor() as cursor:
+            cursor.execute("SET LOCAL statement_timeout = DEFAULT")
+
+
+def query_canceled(exc):
+    return getattr(exc.__cause__, "pgcode", None) == QUERY_CANCELED
+
+
+def filter_param_errors(query_params):
+    """Return a message per `__in` list or regex filter beyond the configured limits."""
+    errors = []
+
+    # Every value counts, since a repeated parameter may reach the filter as a list.
+    for name, values in query_params.lists():
+        if (
+            name.endswith("__in")
+            and sum(len(value.split(",")) for value in values) > settings.QUERY_GUARD_MAX_IN_VALUES
+        ):
+            errors.append(f"{name} accepts at most {settings.QUERY_GUARD_MAX_IN_VALUES} values.")
+
+        if name.endswith(("__regex", "__iregex")) and any(
+            len(value) > settings.QUERY_GUARD_MAX_REGEX_LENGTH for value in values
+        ):
+            errors.append(
+                f"{name} accepts at most {settings.QUERY_GUARD_MAX_REGEX_LENGTH} characters."
+            )
+
+    return errors
+
+
+class QueryGuardMixin:
+    """List views bounded by a statement timeout, filter size limits and a planner cost ceiling.
+
+    Rejections, timeouts and slow requests are counted per view (see `guard_metric`) so
+    `statement_timeout` and `max_query_cost` can be tuned per endpoint.
+    """
+
+    statement_timeout = None  # Milliseconds, QUERY_GUARD_STATEMENT_TIMEOUT when None
+    max_query_cost = None  # Planner cost, QUERY_GUARD_MAX_COST when None
+
+    @classmethod
+    def guard_endpoint(cls):
+        return cls.__name__
+
+    def get_statement_timeout(self):
+        return self.statement_timeout or settings.QUERY_GUARD_STATEMENT_TIMEOUT
+
+    def get_max_query_cost(self):
+        return self.max_query_cost or settings.QUERY_GUARD_MAX_COST
+
+    def record(self, counter):
+        increment(guard_metric(self.guard_endpoint(), counter))
+
+    def filter_queryset(self, queryset):
+        errors = filter_param_errors(self.request.query_params)  # type: ignore
+
+        if errors:
+            self.record("rejected_filters")
+
+            raise BadRequest(detail=" ".join(errors))
+
+        return super().filter_queryset(queryset)  # type: ignore
+
+    def paginate_queryset(self, queryset):
+        max_cost = self.get_max_query_cost()
+
+        if max_cost is not None:
+            self.check_query_cost(queryset, max_cost)
+
+        return super().paginate_queryset(queryset)  # type: ignore
+
+    def check_query_cost(self, queryset, max_cost):
+        # The page query is what runs, so the plan is costed with the page's LIMIT.
+        page_size = self.paginator.get_page_size(self.request) if self.paginator else None  # type: ignore
+        plan = explain(queryset[:page_size] if page_size else queryset)
+
+        if plan is None or plan["Total Cost"] <= max_cost:
+            return
+
+        self.record("rejected_cost")
+
+        raise BadRequest(detail="This query is too expensive to run. Narrow the filters.")
+
+    def list(self, request, *args, **kwargs):
+        started = time.perf_counter()
+
+        try:
+            with statement_timeout(self.get_statement_timeout()):
+                return super().list(request, *args, **kwargs)  # type: ignore
+        except OperationalError as exc:
+            if not query_canceled(exc):
+                raise
+
+            self.record("timeouts")
+
+            raise BadRequest(detail="This query took too long to run. Narrow the filters.") from exc
+        finally:
+            if time.perf_counter() - started > settings.QUERY_GUARD_SLOW_SECONDS:
+                self.record("slow")
@@ -0,0 +1,20 @@
+from django.core.cache import cache
+
+METRICS_CACHE_PREFIX = "metrics:"
+
+
+def increment(name, amount=1):
+    key = f"{METRICS_CACHE_PREFIX}{name}"
+
+    cache.add(key, 0, timeout=None)
+
+    try:
+        cache.incr(key, amount)
+    except ValueError:
+        cache.set(key, amount, timeout=None)
+
+
+def read_counters(names):
+    values = cache.get_many([f"{METRICS_CACHE_PREFIX}{name}" for name in names])
+
+    return {name: values.get(f"{METRICS_CACHE_PREFIX}{name}", 0) for name in names}
@@ -5,3 +5,16 @@ class ProjectConfig(AppConfig):
     default_auto_field = "django.db.models.BigAutoField"
     name = "purly.project"
     verbose_name = "Project Management"
+
+    def ready(self):
+        from django.db.models.signals import post_delete, post_save
+
+        from purly.caching import invalidate_cached_responses
+        from purly.reference import invalidate_reference_rows
+
+        model = self.get_model("Project")
+
+        post_save.connect(invalidate_cached_responses, sender=model)
+        post_delete.connect(invalidate_cached_responses, sender=model)
+        post_save.connect(invalidate_reference_rows, sender=model)
+        post_delete.connect(invalidate_reference_rows, sender=model)
@@ -59,6 +59,19 @@ class ProjectSimpleDetailSerializer(CustomToRepresentation, serializers.ModelSer
         ]
 
 
+class ProjectIncludedSerializer(CustomToRepresentation, serializers.ModelSerializer):
+    class Meta:
+        model = Project
+        fields = [
+            "id",
+            "name",
+            "project_code",
+            "description",
+            "start_date",
+            "end_date",
+        ]
+
+
 class ProjectCreateSerializer(serializers.ModelSerializer):
     class Meta:
         model = Project
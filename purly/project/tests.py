@@ -1,3 +1,5 @@
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
 from rest_framework import status
 from rest_framework.test import APIRequestFactory, APITestCase
 
@@ -27,6 +29,24 @@ class ProjectTests(APITestCase):
 
         self.url = "/api/v1/projects/"
 
+    def test_list_fingerprint_is_the_only_count(self):
+        Project.objects.create(name="test", description="test", created_by=self.user)
+
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(self.url)
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data["count"], 1)
+        self.assertIn("ETag", response)
+
+        statements = [query["sql"] for query in queries]
+
+        self.assertFalse(any(sql.startswith("EXPLAIN (FORMAT JSON)") for sql in statements))
+        self.assertEqual(
+            sum(sql.startswith("SELECT") and 'COUNT("project"' in sql for sql in statements), 1
+        )
+        self.assertFalse(any('"__count"' in sql for sql in statements))
+
     def test_create_project_full_payload(self):
         data = {
             "name": "test",
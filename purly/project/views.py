@@ -1,10 +1,15 @@
 from django.http import Http404
-from django_filters.rest_framework import DjangoFilterBackend
 from drf_spectacular.utils import extend_schema
 from rest_framework import exceptions, filters, status, viewsets
 from rest_framework.response import Response
 
+from purly.caching import CachedListMixin
+from purly.conditional import ConditionalGetMixin
+from purly.filtering import IndexedFilterBackend
+from purly.guard import QueryGuardMixin
 from purly.permissions import IsAdminOrReadOnlyAuthenticated
+from purly.readers import CompiledListMixin
+from purly.user.models import CustomUser
 
 from .filters import PROJECT_FILTER_FIELDS
 from .models import Project
@@ -17,15 +22,18 @@ from .serializers import (
 )
 
 
-class ProjectViewSet(viewsets.ModelViewSet):
+class ProjectViewSet(
+    CachedListMixin, QueryGuardMixin, ConditionalGetMixin, CompiledListMixin, viewsets.ModelViewSet
+):
     http_method_names = ["get", "post", "put"]
     permission_classes = [IsAdminOrReadOnlyAuthenticated]
     queryset = Project.objects.active().select_related("created_by", "updated_by")  # type: ignore
     serializer_class = ProjectListSerializer
     pagination_class = ProjectPagination
-    filter_backends = [DjangoFilterBackend, filters.OrderingFilter]
+    filter_backends = [IndexedFilterBackend, filters.OrderingFilter]
     filterset_fields = PROJECT_FILTER_FIELDS
     ordering_fields = ["start_date", "end_date", "created_at", "updated_at"]
+    cache_models = (Project, CustomUser)
 
     def get_object(self):
         try:
@@ -35,17 +43,7 @@ class ProjectViewSet(viewsets.ModelViewSet):
 
     @extend_schema(summary="List projects", request=None, responses=ProjectListSerializer)
     def list(self, request, *args, **kwargs):
-        queryset = self.filter_queryset(self.get_queryset())
-        page = self.paginate_queryset(queryset)
-
-        if page is not None:
-            serializer = ProjectListSerializer(page, many=True)
-
-            return self.get_paginated_response(serializer.data)
-
-        serializer = self.get_serializer(queryset, many=True)
-
-        return Response(serializer.data)
+        return super().list(request, *args, **kwargs)
 
     @extend_schema(
         summary="Create project", request=ProjectCreateSerializer, responses=ProjectDetailSerializer
@@ -62,6 +60,11 @@ class ProjectViewSet(viewsets.ModelViewSet):
 
     @extend_schema(summary="Retrieve project", request=None, responses=ProjectDetailSerializer)
     def retrieve(self, request, *args, **kwargs):
+        not_modified = self.not_modified()
+
+        if not_modified is not None:
+            return not_modified
+
         project = self.get_object()
         serializer = ProjectDetailSerializer(project)
 
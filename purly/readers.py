@@ -0,0 +1,156 @@
+from functools import lru_cache
+
+from django.core.exceptions import FieldDoesNotExist
+from rest_framework import serializers
+from rest_framework.response import Response
+
+from .base import CustomToRepresentation
+
+# Fields whose representation of a database value is the value itself.
+PASSTHROUGH_FIELDS = (
+    serializers.BooleanField,
+    serializers.CharField,
+    serializers.ChoiceField,
+    serializers.IntegerField,
+    serializers.PrimaryKeyRelatedField,
+)
+
+
+class UnsupportedFieldError(Exception):
+    pass
+
+
+class CompiledReader:
+    """Row-to-dict function generated from a read serializer, fed by values_list() rows."""
+
+    def __init__(self, paths, read):
+        self.paths = paths
+        self.read = read
+
+    def rows(self, queryset, extra_paths=()):
+        # Extra paths (ordering columns) ride along for cursors and are never rendered.
+        paths = list(dict.fromkeys([*self.paths, "id", *extra_paths]))
+
+        return queryset.values_list(*paths, named=True)
+
+    def __call__(self, rows):
+        read = self.read
+
+        return [read(row) for row in rows]
+
+
+class ReaderCompiler:
+    def __init__(self):
+        self.paths = []
+        self.namespace = {}
+
+    def column(self, path):
+        if path not in self.paths:
+            self.paths.append(path)
+
+        return f"row[{self.paths.index(path)}]"
+
+    def serializer_source(self, serializer, model, prefix=""):
+        nullify = isinstance(serializer, CustomToRepresentation)
+        items = [
+            f"{name!r}: {self.field_source(field, model, prefix, nullify=nullify)}"
+            for name, field in serializer.fields.items()
+            if not field.write_only
+        ]
+
+        return "{" + ", ".join(items) + "}"
+
+    def field_source(self, field, model, prefix, *, nullify):
+        if field.source == "*" or "." in field.source:
+            raise UnsupportedFieldError(field.field_name)
+
+        try:
+            model_field = model._meta.get_field(field.source)
+        except FieldDoesNotExist as exc:
+            raise UnsupportedFieldError(field.field_name) from exc
+
+        if model_field.many_to_many or model_field.one_to_many:
+            raise UnsupportedFieldError(field.field_name)
+
+        column = self.column(f"{prefix}{field.source}")
+
+        if isinstance(field, serializers.ListSerializer):
+            raise UnsupportedFieldError(field.field_name)
+
+        if isinstance(field, serializers.BaseSerializer):
+            if not model_field.is_relation:
+                raise UnsupportedFieldError(field.field_name)
+
+            nested = self.serializer_source(
+                field, model_field.related_model, f"{prefix}{field.source}__"
+            )
+
+            return f"(None if {column} is None else {nested})"
+
+        if isinstance(field, serializers.BooleanField):
+            return column
+
+        if isinstance(field, PASSTHROUGH_FIELDS):
+            value = column
+        else:
+            name = f"represent_{len(self.namespace)}"
+            self.namespace[name] = field.to_representation
+            value = f"(None if {column} is None else {name}({column}))"
+
+        # CustomToRepresentation nulls every falsy value other than booleans.
+        return f"({value} or None)" if nullify else value
+
+    def compile(self, serializer):
+        body = self.serializer_source(serializer, serializer.Meta.model)
+        source = f"def read(row):\n    return {body}\n"
+        code = compile(source, f"<reader {type(serializer).__name__}>", "exec")
+
+        # The source is built from serializer field names and model paths only.
+        exec(code, self.namespace)  # noqa: S102
+
+        return CompiledReader(self.paths, self.namespace["read"])
+
+
+@lru_cache(maxsize=128)
+def compile_reader(serializer_class, fields=None):
+    """Compile a read serializer (optionally trimmed to fields), None if it cannot be."""
+    serializer = serializer_class() if fields is None else serializer_class(fields=fields)
+
+    try:
+        return ReaderCompiler().compile(serializer)
+    except UnsupportedFieldError:
+        return None
+
+
+class CompiledListMixin:
+    """List action rendering rows with the compiled reader of `serializer_class`."""
+
+    def get_included(self, rows):
+        """Side-loaded resources for the page rows, returned under `included` when not None."""
+
+    def list(self, request, *args, **kwargs):
+        fields = getattr(self, "sparse_fields", None)
+        reader = compile_reader(self.serializer_class, tuple(fields) if fields else None)  # type: ignore
+        queryset = getattr(self, "list_queryset", None)
+
+        if queryset is None:
+            queryset = self.filter_queryset(self.get_queryset())  # type: ignore
+
+        if reader is not None:
+            queryset = reader.rows(queryset, getattr(self, "ordering_fields", None) or ())
+
+        page = self.paginate_queryset(queryset)  # type: ignore
+        rows = queryset if page is None else page
+        data = reader(rows) if reader else self.get_serializer(rows, many=True).data  # type: ignore
+
+        included = self.get_included(rows)
+
+        if page is not None:
+            response = self.get_paginated_response(data)  # type: ignore
+
+            if included is not None:
+                response.data["included"] = included
+
+            return response
+
+        return Response(data if included is None else {"results": data, "included": included})
@@ -0,0 +1,266 @@
+import copy
+import json
+import logging
+import os
+import threading
+import time
+from collections import Counter, OrderedDict
+
+from django.apps import apps
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from rest_framework import serializers
+
+from .metrics import increment, read_counters
+
+logger = logging.getLogger(__name__)
+
+REFERENCE_CACHE_PREFIX = "reference:"
+REFERENCE_COUNTERS = ("local_hits", "shared_hits", "misses", "invalidations")
+
+# Reference caches by model label, for the invalidation listener to find.
+reference_caches = {}
+
+
+def reference_metric(label, counter):
+    return f"reference_cache.{label}.{counter}"
+
+
+def read_reference_metrics(label):
+    values = read_counters([reference_metric(label, counter) for counter in REFERENCE_COUNTERS])
+
+    return {counter: values[reference_metric(label, counter)] for counter in REFERENCE_COUNTERS}
+
+
+def redis_connection():
+    """Return the redis client behind the default cache, None for other cache backends."""
+    from django_redis import get_redis_connection
+
+    try:
+        return get_redis_connection("default")
+    except NotImplementedError:
+        return None
+
+
+class InvalidationListener:
+    """Per-process subscriber dropping local entries that another process invalidated."""
+
+    def __init__(self):
+        self.pid = None
+        self.lock = threading.Lock()
+
+    def ensure_started(self):
+        # Forked workers inherit the flag but not the thread, so the pid is what counts.
+        if self.pid == os.getpid():
+            return
+
+        with self.lock:
+            if self.pid == os.getpid():
+                return
+
+            connection = redis_connection()
+
+            if connection is not None:
+                pubsub = connection.pubsub(ignore_subscribe_messages=True)
+                pubsub.subscribe(**{settings.REFERENCE_CACHE_CHANNEL: self.handle})
+                pubsub.run_in_thread(sleep_time=1, daemon=True)
+
+            self.pid = os.getpid()
+
+    def handle(self, message):
+        try:
+            payload = json.loads(message["data"])
+            reference_cache = reference_caches[payload["model"]]
+        except (KeyError, TypeError, ValueError):
+            logger.warning("Ignoring a malformed reference cache invalidation: %r", message)
+
+            return
+
+        reference_cache.drop_local(payload["ids"])
+
+
+listener = InvalidationListener()
+
+
+def publish_invalidation(label, ids):
+    connection = redis_connection()
+
+    if connection is not None:
+        connection.publish(
+            settings.REFERENCE_CACHE_CHANNEL, json.dumps({"model": label, "ids": ids})
+        )
+
+
+class ReferenceCache:
+    """Rows by primary key from an in-process LRU, then the shared cache, then Postgres.
+
+    Saves and deletes call `invalidate()`, which clears the shared entries and broadcasts
+    the ids over pub/sub so every process drops its local copies. Local entries also expire
+    after REFERENCE_CACHE_LOCAL_TTL in case a broadcast is missed. Callers get copies, so
+    the cached rows are never mutated.
+    """
+
+    def __init__(self, label):
+        self.label = label.lower()
+        self.entries = OrderedDict()
+        self.lock = threading.Lock()
+        self.counts = Counter()
+
+        reference_caches[self.label] = self
+
+    @property
+    def model(self):
+        return apps.get_model(self.label)
+
+    def key(self, pk):
+        return f"{REFERENCE_CACHE_PREFIX}{self.label}:{pk}"
+
+    def count(self, counter, amount=1):
+        if not amount:
+            return
+
+        # Local hits are frequent, so counters reach the shared metrics in batches.
+        with self.lock:
+            self.counts[counter] += amount
+            full = self.counts.total() >= settings.REFERENCE_CACHE_METRICS_BATCH
+
+        if full:
+            self.flush_counts()
+
+    def flush_counts(self):
+        with self.lock:
+            counts, self.counts = self.counts, Counter()
+
+        for name, value in counts.items():
+            increment(reference_metric(self.label, name), value)
+
+    def read_local(self, pks):
+        now = time.monotonic()
+        found = {}
+
+        with self.lock:
+            for pk in pks:
+                entry = self.entries.get(pk)
+
+                if entry is None:
+                    continue
+
+                instance, expires_at = entry
+
+                if expires_at <= now:
+                    del self.entries[pk]
+
+                    continue
+
+                self.entries.move_to_end(pk)
+                found[pk] = instance
+
+        return found
+
+    def store_local(self, instances):
+        expires_at = time.monotonic() + settings.REFERENCE_CACHE_LOCAL_TTL
+
+        with self.lock:
+            for pk, instance in instances.items():
+                self.entries[pk] = (instance, expires_at)
+                self.entries.move_to_end(pk)
+
+            while len(self.entries) > settings.REFERENCE_CACHE_LOCAL_SIZE:
+                self.entries.popitem(last=False)
+
+    def drop_local(self, pks):
+        with self.lock:
+            for pk in pks:
+                self.entries.pop(pk, None)
+
+    def clear(self):
+        with self.lock:
+            self.entries.clear()
+
+    def get_many(self, pks):
+        """Return {pk: row} for the pks that exist, soft-deleted rows included."""
+        listener.ensure_started()
+
+        pks = {int(pk) for pk in pks}
+        found = self.read_local(pks)
+
+        self.count("local_hits", len(found))
+
+        missing = pks - set(found)
+
+        if missing:
+            shared = cache.get_many([self.key(pk) for pk in missing])
+            loaded = {instance.pk: instance for instance in shared.values()}
+
+            self.count("shared_hits", len(loaded))
+
+            missing -= set(loaded)
+
+            if missing:
+                rows = self.model._default_manager.in_bulk(missing)
+
+                self.count("misses", len(missing))
+
+                cache.set_many(
+                    {self.key(pk): instance for pk, instance in rows.items()},
+                    timeout=settings.REFERENCE_CACHE_TIMEOUT,
+                )
+                loaded.update(rows)
+
+            self.store_local(loaded)
+            found.update(loaded)
+
+        return {pk: copy.copy(instance) for pk, instance in found.items()}
+
+    def get(self, pk):
+        return self.get_many([pk]).get(int(pk))
+
+    def invalidate(self, pks):
+        pks = sorted({int(pk) for pk in pks})
+
+        self.drop_local(pks)
+        cache.delete_many([self.key(pk) for pk in pks])
+        publish_invalidation(self.label, pks)
+
+        self.count("invalidations", len(pks))
+
+
+def invalidate_reference_rows(sender, instance, **kwargs):
+    """Drop a saved or deleted row now and again on commit, before anyone reads it back."""
+    reference_cache = reference_caches.get(sender._meta.label_lower)
+
+    if reference_cache is None:
+        return
+
+    reference_cache.invalidate([instance.pk])
+
+    # A process reading before the commit would otherwise cache the previous row again.
+    transaction.on_commit(lambda: reference_cache.invalidate([instance.pk]))
+
+
+project_cache = ReferenceCache("project.Project")
+address_cache = ReferenceCache("address.Address")
+
+
+class CachedRelatedField(serializers.PrimaryKeyRelatedField):
+    """PrimaryKeyRelatedField resolving through the reference cache of its model, if any."""
+
+    def to_internal_value(self, data):
+        reference_cache = reference_caches.get(self.get_queryset().model._meta.label_lower)
+
+        if reference_cache is None:
+            return super().to_internal_value(data)
+
+        if isinstance(data, bool):
+            self.fail("incorrect_type", data_type=type(data).__name__)
+
+        try:
+            instance = reference_cache.get(data)
+        except (TypeError, ValueError):
+            self.fail("incorrect_type", data_type=type(data).__name__)
+
+        if instance is None:
+            self.fail("does_not_exist", pk_value=data)
+
+        return instance
@@ -5,6 +5,7 @@ from django.db import transaction
 from django.db.models import Q, Sum
 from django.http import HttpResponseRedirect
 
+from config.pagination import EstimatedCountPaginator
 from purly.approval.models import Approval
 from purly.approval.services import bypass_approvals, generate_approvals
 from purly.base import AdminBase
@@ -59,6 +60,8 @@ class RequisitionAdmin(AdminBase):
     autocomplete_fields = ["owner", "project"]
     change_form_template = "admin/requisition/change_form.html"
     form = RequisitionForm
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
     inlines = [RequisitionLineInline]
     fieldsets = (
         (
@@ -90,6 +93,8 @@ class RequisitionAdmin(AdminBase):
                     "submitted_at",
                     "approved_at",
                     "rejected_at",
+                    "current_sequence_number",
+                    "pending_approval_count",
                     "created_at",
                     "created_by",
                     "updated_at",
@@ -305,6 +310,8 @@ class RequisitionAdmin(AdminBase):
             "submitted_at",
             "approved_at",
             "rejected_at",
+            "current_sequence_number",
+            "pending_approval_count",
             "created_at",
             "created_by",
             "updated_at",
@@ -343,6 +350,8 @@ class RequisitionAdmin(AdminBase):
 
 
 class RequisitionLineAdmin(AdminBase):
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
     fieldsets = (
         (
             "Requisition Line Information",
@@ -5,3 +5,10 @@ class RequisitionConfig(AppConfig):
     default_auto_field = "django.db.models.BigAutoField"
     name = "purly.requisition"
     verbose_name = "Requisition Management"
+
+    def ready(self):
+        from django.db.models.signals import pre_migrate
+
+        from purly.filtering import create_trigram_extension
+
+        pre_migrate.connect(create_trigram_extension, sender=self)
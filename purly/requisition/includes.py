@@ -0,0 +1,104 @@
+from config.exceptions import BadRequest
+from purly.address.models import Address
+from purly.address.serializers import AddressIncludedSerializer
+from purly.project.models import Project
+from purly.project.serializers import ProjectIncludedSerializer
+from purly.readers import compile_reader
+from purly.user.models import CustomUser
+from purly.user.serializers import UserSimpleDetailSerializer
+
+from .models import RequisitionLine
+from .serializers import RequisitionLineIncludedSerializer
+
+INCLUDE_PATHS = ["lines", "lines.ship_to", "approvals", "approvals.approver", "project"]
+
+
+def parse_includes(request):
+    value = request.query_params.get("include")
+
+    if not value:
+        return set()
+
+    includes = {path.strip() for path in value.split(",") if path.strip()}
+    unknown = includes - set(INCLUDE_PATHS)
+
+    if unknown:
+        raise BadRequest(detail=f"These includes are not available: {', '.join(sorted(unknown))}")
+
+    # A nested path brings its parent along.
+    return includes | {path.split(".")[0] for path in includes}
+
+
+def read_included(serializer_class, queryset):
+    """Render a queryset with the compiled reader, keyed by id."""
+    reader = compile_reader(serializer_class)
+
+    return {row["id"]: row for row in reader(reader.rows(queryset))}
+
+
+def build_included(requisition_ids, includes):
+    """Side-load related resources of requisitions, one query per resource type.
+
+    Lines and approvals point at addresses and users by id, so each address and user is
+    rendered once in its own map however many rows reference it.
+    """
+    from purly.approval.models import Approval
+    from purly.approval.serializers import ApprovalIncludedSerializer
+
+    included = {}
+
+    if "lines" in includes:
+        included["lines"] = read_included(
+            RequisitionLineIncludedSerializer,
+            RequisitionLine.objects.active()  # type: ignore
+            .filter(requisition_id__in=requisition_ids)
+            .order_by("requisition_id", "line_number"),
+        )
+
+    if "lines.ship_to" in includes:
+        address_ids = {line["ship_to"] for line in included["lines"].values()}
+        included["addresses"] = read_included(
+            AddressIncludedSerializer, Address.objects.filter(id__in=address_ids).order_by("id")
+        )
+
+    if "approvals" in includes:
+        included["approvals"] = read_included(
+            ApprovalIncludedSerializer,
+            Approval.objects.active()  # type: ignore
+            .filter(requisition_id__in=requisition_ids)
+            .order_by("requisition_id", "sequence_number", "id"),
+        )
+
+    if "approvals.approver" in includes:
+        user_ids = {approval["approver"] for approval in included["approvals"].values()}
+        included["users"] = read_included(
+            UserSimpleDetailSerializer, CustomUser.objects.filter(id__in=user_ids).order_by("id")
+        )
+
+    if "project" in includes:
+        included["projects"] = read_included(
+            ProjectIncludedSerializer,
+            Project.objects.filter(project_requisitions__id__in=requisition_ids)
+            .distinct()
+            .order_by("id"),
+        )
+
+    return included
+
+
+class IncludeViewMixin:
+    """Requisition views answering `?include=` with a top-level `included` map."""
+
+    def get_etag_related(self):
+        includes = parse_includes(self.request)  # type: ignore
+        related = super().get_etag_related()  # type: ignore
+
+        return [*related, *(name for name in ("lines", "approvals") if name in includes)]
+
+    def get_included(self, rows):
+        includes = parse_includes(self.request)  # type: ignore
+
+        if not includes:
+            return None
+
+        return build_included([row.id for row in rows], includes)
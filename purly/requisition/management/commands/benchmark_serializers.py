@@ -0,0 +1,108 @@
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from rest_framework import serializers
+
+from purly.address.serializers import AddressListSerializer
+from purly.approval.serializers import ApprovalListSerializer
+from purly.project.serializers import ProjectListSerializer
+from purly.readers import compile_reader
+from purly.requisition.serializers import RequisitionLineListSerializer, RequisitionListSerializer
+from purly.user.serializers import UserListSerializer
+
+LIST_SERIALIZERS = [
+    RequisitionListSerializer,
+    RequisitionLineListSerializer,
+    ApprovalListSerializer,
+    AddressListSerializer,
+    ProjectListSerializer,
+    UserListSerializer,
+]
+
+
+def page_queryset(serializer_class, page_size):
+    related = [
+        name
+        for name, field in serializer_class().fields.items()
+        if isinstance(field, serializers.BaseSerializer)
+    ]
+    queryset = serializer_class.Meta.model.objects.order_by("id")
+
+    # A bare select_related() would follow every foreign key.
+    if related:
+        queryset = queryset.select_related(*related)
+
+    return queryset[:page_size]
+
+
+def time_rounds(fn, rounds):
+    start = time.perf_counter()
+
+    for _ in range(rounds):
+        result = fn()
+
+    return (time.perf_counter() - start) / rounds, result
+
+
+class Command(BaseCommand):
+    help = "Benchmark compiled list readers against the DRF list serializers on stored rows."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--page-size", type=int, default=100)
+        parser.add_argument("--rounds", type=int, default=20)
+
+    def handle(self, *args, **kwargs):
+        page_size = kwargs["page_size"]
+        rounds = kwargs["rounds"]
+
+        for serializer_class in LIST_SERIALIZERS:
+            name = serializer_class.__name__
+            queryset = page_queryset(serializer_class, page_size)
+            reader = compile_reader(serializer_class)
+
+            if reader is None:
+                raise CommandError(f"{name} cannot be compiled.")
+
+            instances = list(queryset.all())
+
+            if not instances:
+                self.stdout.write(f"{name}: no rows, run create_fake_data first.")
+
+                continue
+
+            rows = list(reader.rows(queryset.all()))
+
+            # Rendering only, then fetching and rendering a page the way the list views do.
+            drf_render, expected = time_rounds(
+                lambda instances=instances, serializer_class=serializer_class: (
+                    serializer_class(instances, many=True).data
+                ),
+                rounds,
+            )
+            compiled_render, compiled = time_rounds(
+                lambda rows=rows, reader=reader: reader(rows), rounds
+            )
+
+            if compiled != expected:
+                raise CommandError(f"{name}: compiled output diverged from the serializer.")
+
+            drf_total, _ = time_rounds(
+                lambda queryset=queryset, serializer_class=serializer_class: (
+                    serializer_class(list(queryset.all()), many=True).data
+                ),
+                rounds,
+            )
+            compiled_total, _ = time_rounds(
+                lambda queryset=queryset, reader=reader: reader(reader.rows(queryset.all())),
+                rounds,
+            )
+
+            self.stdout.write(
+                f"{name} rows={len(rows)} "
+                f"render drf={drf_render * 1000:.3f}ms compiled={compiled_render * 1000:.3f}ms "
+                f"speedup={drf_render / compiled_render:.1f}x "
+                f"page drf={drf_total * 1000:.3f}ms compiled={compiled_total * 1000:.3f}ms "
+                f"speedup={drf_total / compiled_total:.1f}x"
+            )
+
+        self.stdout.write(self.style.SUCCESS("Compiled readers matched the list serializers."))
@@ -0,0 +1,39 @@
+from django.core.management.base import BaseCommand
+
+from purly.address.filters import ADDRESS_FILTER_FIELDS
+from purly.address.models import Address
+from purly.filtering import unindexed_filters
+from purly.project.filters import PROJECT_FILTER_FIELDS
+from purly.project.models import Project
+from purly.requisition.filters import REQUISITION_FILTER_FIELDS, REQUISITION_LINE_FILTER_FIELDS
+from purly.requisition.models import Requisition, RequisitionLine
+from purly.user.filters import USER_FILTER_FIELDS
+from purly.user.models import CustomUser
+
+FILTER_SETS = [
+    ("requisitions", Requisition, REQUISITION_FILTER_FIELDS),
+    ("requisition lines", RequisitionLine, REQUISITION_LINE_FILTER_FIELDS),
+    ("addresses", Address, ADDRESS_FILTER_FIELDS),
+    ("projects", Project, PROJECT_FILTER_FIELDS),
+    ("users", CustomUser, USER_FILTER_FIELDS),
+]
+
+
+class Command(BaseCommand):
+    help = "List enabled API filters that no B-tree or trigram index supports."
+
+    def handle(self, *args, **kwargs):
+        total = 0
+
+        for label, model, filterset_fields in FILTER_SETS:
+            for path, column, lookups in unindexed_filters(model, filterset_fields):
+                self.stdout.write(f"{label} {path} ({column}): {', '.join(lookups)}")
+
+                total += 1
+
+        if total:
+            self.stdout.write(self.style.WARNING(f"{total} filters lack a supporting index."))
+
+            return
+
+        self.stdout.write(self.style.SUCCESS("Every enabled filter has a supporting index."))
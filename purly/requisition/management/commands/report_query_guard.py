@@ -0,0 +1,34 @@
+from django.core.management.base import BaseCommand
+from django.urls import URLResolver, get_resolver
+
+from purly.guard import QueryGuardMixin, read_guard_metrics
+
+
+def guarded_views(patterns):
+    for pattern in patterns:
+        if isinstance(pattern, URLResolver):
+            yield from guarded_views(pattern.url_patterns)
+
+            continue
+
+        view = getattr(pattern.callback, "cls", None)
+
+        if view is not None and issubclass(view, QueryGuardMixin):
+            yield view
+
+
+class Command(BaseCommand):
+    help = "Show the query guard limits and counters of every guarded list endpoint."
+
+    def handle(self, *args, **kwargs):
+        views = {view.guard_endpoint(): view for view in guarded_views(get_resolver().url_patterns)}
+
+        for endpoint, view in sorted(views.items()):
+            guard = view()
+            counters = read_guard_metrics(endpoint)
+
+            self.stdout.write(
+                f"{endpoint} (timeout {guard.get_statement_timeout()} ms, "
+                f"max cost {guard.get_max_query_cost()}): "
+                + ", ".join(f"{counter}={value}" for counter, value in counters.items())
+            )
@@ -0,0 +1,21 @@
+from django.core.management.base import BaseCommand
+
+from purly.reference import read_reference_metrics, reference_caches
+
+
+class Command(BaseCommand):
+    help = "Show the hit, miss and invalidation counters of every reference cache."
+
+    def handle(self, *args, **kwargs):
+        for label, reference_cache in sorted(reference_caches.items()):
+            reference_cache.flush_counts()
+
+            counters = read_reference_metrics(label)
+            lookups = counters["local_hits"] + counters["shared_hits"] + counters["misses"]
+            hit_rate = (lookups - counters["misses"]) / lookups if lookups else 0
+
+            self.stdout.write(
+                f"{label}: "
+                + ", ".join(f"{counter}={value}" for counter, value in counters.items())
+                + f", hit_rate={hit_rate:.1%}"
+            )
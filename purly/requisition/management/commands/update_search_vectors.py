@@ -0,0 +1,26 @@
+from itertools import batched
+
+from django.core.management.base import BaseCommand
+
+from purly.requisition.models import Requisition
+from purly.requisition.search import update_search_vectors
+
+
+class Command(BaseCommand):
+    help = "Backfill the full text search vectors of requisitions and their lines."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--batch-size", type=int, default=2000)
+
+    def handle(self, *args, **kwargs):
+        requisition_ids = Requisition.objects.order_by("id").values_list("id", flat=True)
+        updated = 0
+
+        for batch in batched(requisition_ids.iterator(), kwargs["batch_size"], strict=False):
+            update_search_vectors(batch)
+
+            updated += len(batch)
+
+        self.stdout.write(
+            self.style.SUCCESS(f"Updated the search vectors of {updated} requisitions.")
+        )
@@ -1,10 +1,27 @@
 from django.db import models
 
 
+def lines_prefetch():
+    from .models import RequisitionLine
+
+    return models.Prefetch(
+        "lines",
+        queryset=RequisitionLine.objects.select_related(
+            "ship_to", "created_by", "updated_by"
+        ).order_by("line_number"),
+    )
+
+
 class RequisitionQuerySet(models.QuerySet):
     def active(self):
         return self.filter(deleted=False)
 
+    def with_detail(self):
+        """Join the header relations and load lines with their address and users in one query."""
+        return self.select_related("project", "owner", "created_by", "updated_by").prefetch_related(
+            lines_prefetch()
+        )
+
 
 class RequisitionManager(models.Manager.from_queryset(RequisitionQuerySet)):
     pass
@@ -1,11 +1,16 @@
 from decimal import Decimal
 
 from django.conf import settings
+from django.contrib.postgres.indexes import GinIndex
+from django.contrib.postgres.search import SearchVectorField
 from django.core.validators import MinValueValidator
 from django.db import models
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
 
 from purly.address.models import Address
-from purly.base import ModelBase
+from purly.base import ModelBase, TrackedFieldsMixin
+from purly.filtering import trigram_index
 from purly.project.models import Project
 
 from .managers import (
@@ -41,7 +46,11 @@ class PaymentTermChoices(models.TextChoices):
     NET90 = ("net_90", "net 90")
 
 
-class Requisition(ModelBase):
+SEARCH_HEADER_FIELDS = ["name", "external_reference", "supplier", "justification"]
+SEARCH_LINE_FIELDS = ["description", "category", "manufacturer", "manufacturer_part_number"]
+
+
+class Requisition(TrackedFieldsMixin, ModelBase):
     name = models.CharField(max_length=255)
     external_reference = models.CharField(max_length=255, blank=True)
     status = models.CharField(
@@ -64,20 +73,35 @@ class Requisition(ModelBase):
     submitted_at = models.DateTimeField(blank=True, null=True, editable=False)
     approved_at = models.DateTimeField(blank=True, null=True, editable=False)
     rejected_at = models.DateTimeField(blank=True, null=True, editable=False)
+    # Maintained by purly.approval.services.sync_approval_sequence, null until first synced.
+    current_sequence_number = models.PositiveIntegerField(blank=True, null=True, editable=False)
+    pending_approval_count = models.PositiveIntegerField(blank=True, null=True, editable=False)
+    # Header and line text, maintained by purly.requisition.search.update_search_vectors.
+    search_vector = SearchVectorField(blank=True, null=True, editable=False)
 
     objects = RequisitionManager()
 
+    tracked_fields = tuple(SEARCH_HEADER_FIELDS)
+
     class Meta(ModelBase.Meta):
         db_table = "requisition"
         verbose_name = "requisition"
         verbose_name_plural = "requisitions"
         ordering = ["-created_at"]
+        indexes = [
+            GinIndex(fields=["search_vector"], name="requisition_search_gin"),
+            trigram_index("name", "requisition_name_trgm"),
+            trigram_index("supplier", "requisition_supplier_trgm"),
+            models.Index(fields=["created_at"], name="requisition_created_at_idx"),
+            models.Index(fields=["submitted_at"], name="requisition_submitted_at_idx"),
+            models.Index(fields=["approved_at"], name="requisition_approved_at_idx"),
+        ]
 
     def __str__(self):
         return f"{self.pk} - {self.name}"
 
 
-class RequisitionLine(ModelBase):
+class RequisitionLine(TrackedFieldsMixin, ModelBase):
     line_number = models.PositiveIntegerField(validators=[MinValueValidator(1)])
     line_type = models.CharField(choices=LineTypeChoices.choices, default=LineTypeChoices.GOODS)
     description = models.CharField(max_length=255)
@@ -104,14 +128,62 @@ class RequisitionLine(ModelBase):
     need_by = models.DateField(blank=True, null=True)
     requisition = models.ForeignKey(Requisition, on_delete=models.CASCADE, related_name="lines")
     ship_to = models.ForeignKey(Address, on_delete=models.CASCADE)
+    search_vector = SearchVectorField(blank=True, null=True, editable=False)
 
     objects = RequisitionLineManager()
 
+    # The requisition vector only aggregates active lines, so deletes count as changes.
+    tracked_fields = (*SEARCH_LINE_FIELDS, "deleted")
+
     class Meta(ModelBase.Meta):
         db_table = "requisition_line"
         verbose_name = "requisition line"
         verbose_name_plural = "requisition lines"
         ordering = ["requisition", "line_number"]
+        indexes = [
+            GinIndex(fields=["search_vector"], name="requisition_line_search_gin"),
+            trigram_index("description", "requisition_line_desc_trgm"),
+            trigram_index("manufacturer_part_number", "requisition_line_mpn_trgm"),
+            models.Index(fields=["need_by"], name="requisition_line_need_by_idx"),
+        ]
 
     def __str__(self):
         return f"{self.pk} - {self.description}"
+
+
+@receiver(post_save, sender=Requisition)
+def refresh_requisition_search(sender, instance, created, update_fields=None, **kwargs):
+    from .search import schedule_search_update
+
+    # Lines of a new requisition are bulk created after it, without signals of their own.
+    if created:
+        schedule_search_update(instance.pk, all_lines=True)
+
+        return
+
+    fields = update_fields if update_fields is not None else sender.tracked_fields
+
+    # Status and approval bookkeeping saves leave the searched text alone.
+    if not instance.changed_fields(set(fields) & set(sender.tracked_fields)):
+        return
+
+    schedule_search_update(instance.pk)
+
+
+@receiver(post_save, sender=RequisitionLine)
+def refresh_line_search(sender, instance, created, update_fields=None, **kwargs):
+    from .search import schedule_search_update
+
+    fields = update_fields if update_fields is not None else sender.tracked_fields
+
+    if not created and not instance.changed_fields(set(fields) & set(sender.tracked_fields)):
+        return
+
+    schedule_search_update(instance.requisition_id, line_id=instance.pk)
+
+
+@receiver(post_delete, sender=RequisitionLine)
+def refresh_deleted_line_search(sender, instance, **kwargs):
+    from .search import schedule_search_update
+
+    schedule_search_update(instance.requisition_id)
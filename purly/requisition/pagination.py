@@ -1,9 +1,11 @@
-from config.pagination import CustomPagination
+from config.pagination import KeysetPagination
 
 
-class RequisitionPagination(CustomPagination):
+class RequisitionPagination(KeysetPagination):
     page_size = 50
+    estimate_count = True
 
 
-class RequisitionLinePagination(CustomPagination):
+class RequisitionLinePagination(KeysetPagination):
     page_size = 50
+    estimate_count = True
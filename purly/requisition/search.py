@@ -0,0 +1,139 @@
+import threading
+
+from django.conf import settings
+from django.contrib.postgres.aggregates import StringAgg
+from django.contrib.postgres.search import SearchQuery, SearchRank, SearchVector
+from django.db import transaction
+from django.db.models import F, OuterRef, Q, Subquery, Value
+from django.db.models.functions import Concat
+from rest_framework.filters import BaseFilterBackend
+
+from .models import SEARCH_LINE_FIELDS, Requisition, RequisitionLine
+
+# Requisition ids whose vectors are rebuilt once the current transaction commits.
+pending = threading.local()
+
+
+def line_search_vector():
+    config = settings.SEARCH_CONFIG
+
+    return SearchVector("description", weight="A", config=config) + SearchVector(
+        "category", "manufacturer", "manufacturer_part_number", weight="B", config=config
+    )
+
+
+def requisition_search_vector():
+    config = settings.SEARCH_CONFIG
+    line_text = (
+        RequisitionLine.objects.active()  # type: ignore
+        .filter(requisition=OuterRef("pk"))
+        .order_by()
+        .values("requisition")
+        .annotate(
+            text=StringAgg(
+                Concat(
+                    *(part for field in SEARCH_LINE_FIELDS for part in (F(field), Value(" "))),
+                ),
+                delimiter=" ",
+            )
+        )
+        .values("text")
+    )
+
+    return (
+        SearchVector("name", "supplier", "external_reference", weight="A", config=config)
+        + SearchVector("justification", weight="B", config=config)
+        + SearchVector(Subquery(line_text), weight="C", config=config)
+    )
+
+
+def rebuild_search_vectors(requisition_ids, lines):
+    """Rebuild the vectors of the lines matching the lines Q, then of requisitions."""
+    RequisitionLine.objects.filter(lines).update(search_vector=line_search_vector())
+    Requisition.objects.filter(id__in=requisition_ids).update(
+        search_vector=requisition_search_vector()
+    )
+
+
+def update_search_vectors(requisition_ids):
+    """Rebuild the search vectors of requisitions and all their lines in two UPDATEs."""
+    requisition_ids = list(requisition_ids)
+
+    if not requisition_ids:
+        return
+
+    rebuild_search_vectors(requisition_ids, Q(requisition_id__in=requisition_ids))
+
+
+def flush_search_updates():
+    requisition_ids = getattr(pending, "requisition_ids", set())
+    line_ids = getattr(pending, "line_ids", set())
+    all_lines_ids = getattr(pending, "all_lines_ids", set())
+
+    pending.requisition_ids, pending.line_ids, pending.all_lines_ids = set(), set(), set()
+
+    if not requisition_ids:
+        return
+
+    rebuild_search_vectors(
+        sorted(requisition_ids),
+        Q(id__in=sorted(line_ids)) | Q(requisition_id__in=sorted(all_lines_ids)),
+    )
+
+
+def schedule_search_update(requisition_id, *, line_id=None, all_lines=False):
+    """Queue a requisition vector rebuild, with one or all of its line vectors.
+
+    Rebuilds are deduplicated within the transaction. Line vectors only hold line text, so
+    header changes leave them alone; `all_lines` is for lines written by bulk_create, which
+    sends no signals.
+    """
+    if not hasattr(pending, "requisition_ids"):
+        pending.requisition_ids, pending.line_ids, pending.all_lines_ids = set(), set(), set()
+
+    pending.requisition_ids.add(requisition_id)
+
+    if line_id is not None:
+        pending.line_ids.add(line_id)
+
+    if all_lines:
+        pending.all_lines_ids.add(requisition_id)
+
+    # Later callbacks of the same transaction find the sets already flushed and do nothing.
+    transaction.on_commit(flush_search_updates)
+
+
+class FullTextSearchFilter(BaseFilterBackend):
+    """`?search=` matched against the search vector with websearch syntax, best rank first.
+
+    An explicit `?ordering=` (and keyset cursors) take precedence over the rank.
+    """
+
+    search_param = "search"
+
+    def filter_queryset(self, request, queryset, view):
+        terms = request.query_params.get(self.search_param, "").strip()
+
+        if not terms:
+            return queryset
+
+        query = SearchQuery(terms, search_type="websearch", config=settings.SEARCH_CONFIG)
+        queryset = queryset.filter(search_vector=query).annotate(
+            search_rank=SearchRank(F("search_vector"), query)
+        )
+
+        if request.query_params.get("ordering"):
+            return queryset
+
+        return queryset.order_by("-search_rank", "-id")
+
+    def get_schema_operation_parameters(self, view):
+        return [
+            {
+                "name": self.search_param,
+                "required": False,
+                "in": "query",
+                "description": "Full text search, best matches first.",
+                "schema": {"type": "string"},
+            },
+        ]
@@ -3,13 +3,17 @@ from decimal import Decimal
 
 from django.conf import settings
 from django.db import transaction
+from django.db.models import prefetch_related_objects
 from rest_framework import serializers
 
+from purly.address.models import Address
 from purly.address.serializers import AddressSimpleDetailSerializer
-from purly.base import CustomToRepresentation
+from purly.base import CustomToRepresentation, SparseFieldsSerializerMixin
 from purly.project.serializers import ProjectSimpleDetailSerializer
+from purly.reference import CachedRelatedField, address_cache
 from purly.user.serializers import UserSimpleDetailSerializer
 
+from .managers import lines_prefetch
 from .models import (
     CurrencyChoices,
     LineTypeChoices,
@@ -21,7 +25,9 @@ from .models import (
 )
 
 
-class RequisitionLineListSerializer(CustomToRepresentation, serializers.ModelSerializer):
+class RequisitionLineListSerializer(
+    SparseFieldsSerializerMixin, CustomToRepresentation, serializers.ModelSerializer
+):
     ship_to = AddressSimpleDetailSerializer()
     created_by = UserSimpleDetailSerializer(read_only=True)
     updated_by = UserSimpleDetailSerializer(read_only=True)
@@ -80,10 +86,62 @@ class RequisitionLineDetailSerializer(CustomToRepresentation, serializers.ModelS
         ]
 
 
+def resolve_ship_to(lines, user):
+    """Swap each line's ship_to id for its address, read through the reference cache.
+
+    Whether the user may ship to an address is checked against the database in one query,
+    as a cached row can outlive its deletion or a change of owner until it is invalidated.
+    """
+    usable = Address.objects.active().filter(pk__in={line["ship_to"] for line in lines})  # type: ignore
+
+    if not (user.is_staff or user.is_superuser):
+        usable = usable.filter(owner=user)
+
+    addresses = address_cache.get_many(set(usable.order_by().values_list("pk", flat=True)))
+
+    errors = [
+        {}
+        if line["ship_to"] in addresses
+        else {"ship_to": [f"This address does not exist: {line['ship_to']}"]}
+        for line in lines
+    ]
+
+    if any(errors):
+        raise serializers.ValidationError({"lines": errors})
+
+    return [{**line, "ship_to": addresses[line["ship_to"]]} for line in lines]
+
+
+class RequisitionLineIncludedSerializer(CustomToRepresentation, serializers.ModelSerializer):
+    class Meta:
+        model = RequisitionLine
+        fields = [
+            "id",
+            "requisition",
+            "line_number",
+            "line_type",
+            "description",
+            "category",
+            "manufacturer",
+            "manufacturer_part_number",
+            "quantity",
+            "unit_of_measure",
+            "unit_price",
+            "line_total",
+            "payment_term",
+            "need_by",
+            "ship_to",
+            "created_at",
+            "updated_at",
+        ]
+
+
 class RequisitionLineCreateSerializer(serializers.ModelSerializer):
     line_type = serializers.CharField()
     unit_of_measure = serializers.CharField(allow_blank=True, required=False)
     payment_term = serializers.CharField()
+    # Resolved for all lines at once by RequisitionCreateSerializer.validate().
+    ship_to = serializers.IntegerField()
 
     class Meta:
         model = RequisitionLine
@@ -102,13 +160,6 @@ class RequisitionLineCreateSerializer(serializers.ModelSerializer):
             "need_by",
             "ship_to",
         ]
-        extra_kwargs = {
-            "ship_to": {
-                "error_messages": {
-                    "does_not_exist": "This address does not exist: {pk_value}",
-                }
-            }
-        }
 
     def validate_line_type(self, value):
         if value not in LineTypeChoices.values:
@@ -165,7 +216,9 @@ class RequisitionLineCreateSerializer(serializers.ModelSerializer):
         return attrs
 
 
-class RequisitionListSerializer(CustomToRepresentation, serializers.ModelSerializer):
+class RequisitionListSerializer(
+    SparseFieldsSerializerMixin, CustomToRepresentation, serializers.ModelSerializer
+):
     owner = UserSimpleDetailSerializer(read_only=True)
     project = ProjectSimpleDetailSerializer(read_only=True)
     created_by = UserSimpleDetailSerializer(read_only=True)
@@ -225,12 +278,15 @@ class RequisitionDetailSerializer(CustomToRepresentation, serializers.ModelSeria
         ]
 
     def get_lines(self, obj):
-        lines = obj.lines.order_by("line_number")
+        # A no-op for requisitions loaded through RequisitionQuerySet.with_detail().
+        prefetch_related_objects([obj], lines_prefetch())
 
-        return RequisitionLineDetailSerializer(lines, many=True).data
+        return RequisitionLineDetailSerializer(obj.lines.all(), many=True).data
 
 
 class RequisitionCreateSerializer(serializers.ModelSerializer):
+    serializer_related_field = CachedRelatedField
+
     currency = serializers.CharField()
     lines = RequisitionLineCreateSerializer(many=True)
 
@@ -277,6 +333,8 @@ class RequisitionCreateSerializer(serializers.ModelSerializer):
         if len(line_numbers) > len(set(line_numbers)):
             raise serializers.ValidationError({"lines": "Line numbers must contain unique values."})
 
+        attrs["lines"] = resolve_ship_to(lines, self.context["request"].user)
+
         return attrs
 
     @transaction.atomic
@@ -313,6 +371,8 @@ class RequisitionCreateSerializer(serializers.ModelSerializer):
 
 
 class RequisitionUpdateSerializer(serializers.ModelSerializer):
+    serializer_related_field = CachedRelatedField
+
     currency = serializers.CharField()
 
     class Meta:
@@ -5,7 +5,7 @@ from rest_framework import exceptions
 from config.exceptions import BadRequest
 from purly.approval.emails import send_reject_email
 
-from .models import RequisitionStatusChoices
+from .models import Requisition, RequisitionStatusChoices
 
 
 def submit_withdraw_validation(request_user, requisition, action):
@@ -88,3 +88,20 @@ def on_reject_requisition(approval, requisition):
     transaction.on_commit(lambda: send_reject_email.delay(requisition.id, approval.id))  # type: ignore
 
     return requisition
+
+
+def reject_requisitions(rejections, timestamp):
+    """Set-based on_reject_requisition for a {requisition id: rejecting approval id} mapping."""
+    Requisition.objects.filter(id__in=list(rejections)).update(
+        status=RequisitionStatusChoices.REJECTED,
+        submitted_at=None,
+        rejected_at=timestamp,
+        updated_at=timestamp,
+    )
+
+    for requisition_id, approval_id in rejections.items():
+        transaction.on_commit(
+            lambda requisition_id=requisition_id, approval_id=approval_id: send_reject_email.delay(  # type: ignore
+                requisition_id, approval_id
+            )
+        )
@@ -0,0 +1,1122 @@
+from datetime import date, datetime
+from decimal import Decimal
+from io import StringIO
+
+from django.core.management import call_command
+from django.db import OperationalError, connection
+from django.db.models import F
+from django.test import modify_settings, override_settings
+from django.test.utils import CaptureQueriesContext
+from rest_framework import status
+from rest_framework.test import APIRequestFactory, APITestCase
+
+from purly.address.models import Address
+from purly.approval.models import Approval
+from purly.guard import guard_metric, query_canceled, read_guard_metrics, statement_timeout
+from purly.project.models import Project
+from purly.readers import compile_reader
+from purly.reference import address_cache, listener, project_cache, read_reference_metrics
+from purly.user.models import CustomUser
+
+from .models import Requisition, RequisitionLine, RequisitionStatusChoices
+from .serializers import (
+    RequisitionCreateSerializer,
+    RequisitionLineListSerializer,
+    RequisitionListSerializer,
+)
+
+factory = APIRequestFactory()
+
+
+def select_count(queries):
+    # Query profilers may interleave EXPLAINs of their own.
+    return sum(query["sql"].startswith("SELECT") for query in queries)
+
+
+class RequisitionCreateTests(APITestCase):
+    def setUp(self):
+        self.user = CustomUser.objects.create_user(username="test", password="test")  # noqa: S106
+        self.other = CustomUser.objects.create_user(username="other")
+
+        self.client.defaults["HTTP_USER_AGENT"] = "test"
+        self.client.force_login(user=self.user)
+
+        self.address = self.create_address(self.user)
+
+        self.url = "/api/v1/requisitions/"
+
+    def create_address(self, owner, **kwargs):
+        return Address.objects.create(
+            owner=owner,
+            name="test",
+            attention="test",
+            street1="test",
+            city="test",
+            state="test",
+            zip_code="test",
+            country="US",
+            **kwargs,
+        )
+
+    def payload(self, ship_to_ids):
+        return {
+            "name": "test",
+            "supplier": "test",
+            "justification": "test",
+            "currency": "usd",
+            "lines": [
+                {
+                    "line_number": line_number,
+                    "line_type": "service",
+                    "description": "test",
+                    "category": "test",
+                    "line_total": "10.00",
+                    "payment_term": "net_30",
+                    "ship_to": ship_to_id,
+                }
+                for line_number, ship_to_id in enumerate(ship_to_ids, start=1)
+            ],
+        }
+
+    # The profiler in local settings records every query, so it is left out of the count.
+    @modify_settings(MIDDLEWARE={"remove": "silk.middleware.SilkyMiddleware"})
+    def test_create_query_count_is_flat_in_line_count(self):
+        addresses = [self.address, self.create_address(self.user)]
+        query_counts = []
+
+        # Resolve the session's principal first, so no measured request loads the user.
+        self.client.get("/api/v1/requisitions/")
+
+        for line_count in (2, 50):
+            payload = self.payload([addresses[index % 2].id for index in range(line_count)])
+
+            # Both runs resolve their addresses from the database, not the reference cache.
+            address_cache.invalidate([address.id for address in addresses])
+
+            with CaptureQueriesContext(connection) as queries:
+                response = self.client.post(self.url, payload, format="json")
+
+            self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+            self.assertEqual(len(response.data["lines"]), line_count)
+
+            query_counts.append(len(queries))
+
+        self.assertEqual(query_counts[0], query_counts[1])
+
+    def test_create_rejects_unowned_deleted_and_missing_addresses(self):
+        unowned = self.create_address(self.other)
+        deleted = self.create_address(self.user, deleted=True)
+
+        request = factory.post(self.url)
+        request.user = self.user
+
+        serializer = RequisitionCreateSerializer(
+            data=self.payload([self.address.id, unowned.id, deleted.id, 0]),
+            context={"request": request},
+        )
+
+        self.assertFalse(serializer.is_valid())
+        self.assertEqual(
+            [error.get("ship_to") for error in serializer.errors["lines"]],
+            [
+                None,
+                [f"This address does not exist: {unowned.id}"],
+                [f"This address does not exist: {deleted.id}"],
+                ["This address does not exist: 0"],
+            ],
+        )
+
+    def test_create_rejects_addresses_deleted_behind_the_cache(self):
+        address_cache.get_many({self.address.id})
+
+        # A queryset update sends no signal, so the cached row still reads as active.
+        Address.objects.filter(pk=self.address.id).update(deleted=True)
+
+        response = self.client.post(self.url, self.payload([self.address.id]), format="json")
+
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+
+class RequisitionCursorPaginationTests(APITestCase):
+    def setUp(self):
+        self.user = CustomUser.objects.create_user(username="test", password="test")  # noqa: S106
+
+        self.client.defaults["HTTP_USER_AGENT"] = "test"
+        self.client.force_login(user=self.user)
+
+        address = Address.objects.create(
+            owner=self.user,
+            name="test",
+            attention="test",
+            street1="test",
+            city="test",
+            state="test",
+            zip_code="test",
+            country="US",
+        )
+
+        for index in range(7):
+            requisition = Requisition.objects.create(
+                name=f"test {index}",
+                owner=self.user,
+                supplier="test",
+                justification="test",
+                total_amount=Decimal(index % 3),
+            )
+
+            RequisitionLine.objects.create(
+                requisition=requisition,
+                line_number=1,
+                description="test",
+                category="test",
+                payment_term="net_30",
+                line_total=Decimal("1.00"),
+                need_by=None if index % 2 else date(2030, 1, index + 1),
+                ship_to=address,
+            )
+
+    def walk(self, url):
+        pages = []
+        previous = None
+
+        while url:
+            with CaptureQueriesContext(connection) as queries:
+                response = self.client.get(url)
+
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+            self.assertIsNone(response.data["count"])
+            self.assertFalse(any("COUNT(" in query["sql"] for query in queries))
+
+            pages.append([row["id"] for row in response.data["results"]])
+            previous = response.data["previous"]
+            url = response.data["next"]
+
+        return pages, previous
+
+    def assert_walk(self, url, expected):
+        pages, previous = self.walk(url)
+
+        self.assertEqual([row_id for page in pages for row_id in page], expected)
+
+        # Walking back from the last page returns the earlier pages in order.
+        backwards = self.walk_previous(previous)
+
+        self.assertEqual(backwards, pages[-2::-1])
+
+    def walk_previous(self, url):
+        pages = []
+
+        while url:
+            response = self.client.get(url)
+
+            pages.append([row["id"] for row in response.data["results"]])
+            url = response.data["previous"]
+
+        return pages
+
+    def test_requisition_cursor_with_ties(self):
+        expected = list(
+            Requisition.objects.order_by("-total_amount", "-id").values_list("id", flat=True)
+        )
+
+        self.assert_walk(
+            "/api/v1/requisitions/?cursor=&page_size=2&ordering=-total_amount", expected
+        )
+
+    def test_line_cursor_with_nulls(self):
+        expected = list(
+            RequisitionLine.objects.order_by(F("need_by").asc(nulls_last=True), "id").values_list(
+                "id", flat=True
+            )
+        )
+
+        self.assert_walk(
+            "/api/v1/requisitions/lines/?cursor=&page_size=3&ordering=need_by", expected
+        )
+
+    def test_tampered_cursor_is_rejected(self):
+        response = self.client.get("/api/v1/requisitions/?cursor=tampered")
+
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+
+class RequisitionEstimatedCountTests(APITestCase):
+    def setUp(self):
+        self.user = CustomUser.objects.create_user(username="test", password="test")  # noqa: S106
+
+        self.client.defaults["HTTP_USER_AGENT"] = "test"
+        self.client.force_login(user=self.user)
+
+        for index in range(3):
+            Requisition.objects.create(
+                name=f"test {index}", owner=self.user, supplier="test", justification="test"
+            )
+
+    def test_small_result_sets_are_counted_exactly(self):
+        response = self.client.get("/api/v1/requisitions/")
+
+        self.assertEqual(response.data["count"], 3)
+        self.assertTrue(response.data["count_exact"])
+
+    @override_settings(PAGINATION_ESTIMATED_COUNT_THRESHOLD=1)
+    def test_large_estimates_skip_the_count_query(self):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get("/api/v1/requisitions/")
+
+        self.assertFalse(response.data["count_exact"])
+        self.assertGreaterEqual(response.data["count"], 1)
+        self.assertFalse(any("COUNT(" in query["sql"] for query in queries))
+
+    @override_settings(PAGINATION_ESTIMATED_COUNT_THRESHOLD=1)
+    def test_small_tables_are_counted_without_a_plan(self):
+        self.user.is_staff = True
+        self.user.save()
+
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get("/api/v1/users/")
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertTrue(response.data["count_exact"])
+        self.assertFalse(any(query["sql"].startswith("EXPLAIN (FORMAT JSON)") for query in queries))
+
+
+class RequisitionSparseFieldsTests(APITestCase):
+    def setUp(self):
+        self.user = CustomUser.objects.create_user(username="test", password="test")  # noqa: S106
+
+        self.client.defaults["HTTP_USER_AGENT"] = "test"
+        self.client.force_login(user=self.user)
+
+        Requisition.objects.create(
+            name="test", owner=self.user, supplier="test", justification="test"
+        )
+
+    def requisition_queries(self, url):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(url)
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+        return response, [
+            query["sql"]
+            for query in queries
+            if query["sql"].startswith('SELECT "requisition"."id"')
+        ]
+
+    def test_fields_trim_output_and_columns(self):
+        response, queries = self.requisition_queries(
+            "/api/v1/requisitions/?fields=id,status,total_amount"
+        )
+
+        self.assertEqual(set(response.data["results"][0]), {"id", "status", "total_amount"})
+        self.assertEqual(len(queries), 1)
+        self.assertNotIn("JOIN", queries[0])
+        self.assertNotIn('"requisition"."justification"', queries[0])
+
+    def test_nested_fields_are_selected_related(self):
+        response, queries = self.requisition_queries("/api/v1/requisitions/?fields=id,owner")
+
+        self.assertEqual(response.data["results"][0]["owner"]["username"], "test")
+        self.assertEqual(len(queries), 1)
+        self.assertIn('JOIN "user"', queries[0])
+        self.assertNotIn('"user"."email"', queries[0])
+
+    def test_unknown_fields_are_rejected(self):
+        response = self.client.get("/api/v1/requisitions/?fields=id,secret")
+
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+
+class CompiledReaderTests(APITestCase):
+    def setUp(self):
+        self.user = CustomUser.objects.create_user(username="test", password="test")  # noqa: S106
+        address = Address.objects.create(
+            owner=self.user,
+            name="test",
+            attention="test",
+            street1="test",
+            city="test",
+            state="test",
+            zip_code="test",
+            country="US",
+        )
+        project = Project.objects.create(
+            name="test", project_code="test", start_date=date(2030, 1, 1)
+        )
+
+        # One row with every nullable relation empty, zeros and blanks; one fully populated.
+        for index, related in enumerate((None, self.user)):
+            requisition = Requisition.objects.create(
+                name=f"test {index}",
+                owner=self.user,
+                project=project if related else None,
+                supplier="test",
+                justification="test",
+                external_reference="" if related is None else "ref",
+                total_amount=Decimal(index * 10),
+                created_by=related,
+            )
+
+            RequisitionLine.objects.create(
+                requisition=requisition,
+                line_number=1,
+                description="test",
+                category="test",
+                payment_term="net_30",
+                line_total=Decimal(0),
+                need_by=None if related is None else date(2030, 1, 1),
+                ship_to=address,
+                created_by=related,
+                updated_by=related,
+            )
+
+    def assert_same_output(self, serializer_class, queryset, fields=None):
+        reader = compile_reader(serializer_class, fields)
+        expected = serializer_class(queryset, many=True, fields=fields).data
+
+        self.assertIsNotNone(reader)
+        self.assertEqual(reader(reader.rows(queryset)), expected)
+
+    def test_requisition_rows_match_the_serializer(self):
+        queryset = Requisition.objects.order_by("id")
+
+        self.assert_same_output(RequisitionListSerializer, queryset)
+        self.assert_same_output(RequisitionListSerializer, queryset, ("total_amount", "project"))
+
+    def test_line_rows_match_the_serializer(self):
+        queryset = RequisitionLine.objects.order_by("id")
+
+        self.assert_same_output(RequisitionLineListSerializer, queryset)
+
+    def test_list_renders_compiled_rows(self):
+        self.client.defaults["HTTP_USER_AGENT"] = "test"
+        self.client.force_login(user=self.user)
+
+        response = self.client.get("/api/v1/requisitions/?ordering=total_amount")
+
+        self.assertEqual(
+            response.data["results"],
+            RequisitionListSerializer(Requisition.objects.order_by("total_amount"), many=True).data,
+        )
+
+
+class RequisitionDetailLoaderTests(APITestCase):
+    def setUp(self):
+        self.user = CustomUser.objects.create_user(username="test", password="test")  # noqa: S106
+
+        self.client.defaults["HTTP_USER_AGENT"] = "test"
+        self.client.force_login(user=self.user)
+
+        self.addresses = [
+            Address.objects.create(
+                owner=self.user,
+                name=f"test {index}",
+                attention="test",
+                street1="test",
+                city="test",
+                state="test",
+                zip_code="test",
+                country="US",
+            )
+            for index in range(2)
+        ]
+        self.other = CustomUser.objects.create_user(username="other")
+
+    def create_requisition(self, line_count):
+        requisition = Requisition.objects.create(
+            name="test", owner=self.user, supplier="test", justification="test"
+        )
+
+        RequisitionLine.objects.bulk_create(
+            RequisitionLine(
+                requisition=requisition,
+                line_number=line_number,
+                description="test",
+                category="test",
+                payment_term="net_30",
+                line_total=Decimal("1.00"),
+                ship_to=self.addresses[line_number % 2],
+                created_by=self.user if line_number % 2 else self.other,
+            )
+            for line_number in range(1, line_count + 1)
+        )
+
+        return requisition
+
+    # The profiler in local settings records every query, so it is left out of the count.
+    @modify_settings(MIDDLEWARE={"remove": "silk.middleware.SilkyMiddleware"})
+    def test_detail_query_count_is_flat_in_line_count(self):
+        query_counts = []
+
+        # Resolve the session's principal first, so no measured request loads the user.
+        self.client.get("/api/v1/requisitions/")
+
+        for line_count in (1, 40):
+            requisition = self.create_requisition(line_count)
+
+            url = f"/api/v1/requisitions/{requisition.id}/"
+
+            for method, data in (("get", None), ("put", {"name": "new"})):
+                with CaptureQueriesContext(connection) as queries:
+                    response = getattr(self.client, method)(url, data, format="json")
+
+                self.assertEqual(response.status_code, status.HTTP_200_OK)
+                self.assertEqual(len(response.data["lines"]), line_count)
+                self.assertEqual(
+                    [line["line_number"] for line in response.data["lines"]],
+                    list(range(1, line_count + 1)),
+                )
+
+                query_counts.append((method, len(queries)))
+
+        self.assertEqual(query_counts[:2], query_counts[2:])
+
+    @modify_settings(MIDDLEWARE={"remove": "silk.middleware.SilkyMiddleware"})
+    def test_detail_loads_header_and_lines_in_two_queries(self):
+        requisition = self.create_requisition(10)
+
+        with CaptureQueriesContext(connection) as queries:
+            self.client.get(f"/api/v1/requisitions/{requisition.id}/")
+
+        requisition_queries = [
+            query["sql"]
+            for query in queries
+            if query["sql"].startswith("SELECT") and 'FROM "requisition' in query["sql"]
+        ]
+
+        self.assertEqual(len(requisition_queries), 2)
+        self.assertIn('JOIN "address"', requisition_queries[1])
+
+
+class RequisitionIncludeTests(APITestCase):
+    def setUp(self):
+        self.user = CustomUser.objects.create_user(username="test", password="test")  # noqa: S106
+        self.approver = CustomUser.objects.create_user(username="approver")
+
+        self.client.defaults["HTTP_USER_AGENT"] = "test"
+        self.client.force_login(user=self.user)
+
+        address = Address.objects.create(
+            owner=self.user,
+            name="test",
+            attention="test",
+            street1="test",
+            city="test",
+            state="test",
+            zip_code="test",
+            country="US",
+        )
+        project = Project.objects.create(name="test", project_code="test")
+
+        self.requisitions = []
+
+        for index in range(3):
+            requisition = Requisition.objects.create(
+                name=f"test {index}",
+                owner=self.user,
+                project=project,
+                supplier="test",
+                justification="test",
+            )
+
+            RequisitionLine.objects.bulk_create(
+                RequisitionLine(
+                    requisition=requisition,
+                    line_number=line_number,
+                    description="test",
+                    category="test",
+                    payment_term="net_30",
+                    line_total=Decimal("1.00"),
+                    ship_to=address,
+                )
+                for line_number in (1, 2)
+            )
+            Approval.objects.create(
+                requisition=requisition, approver=self.approver, sequence_number=1
+            )
+
+            self.requisitions.append(requisition)
+
+    # The profiler in local settings records every query, so it is left out of the count.
+    @modify_settings(MIDDLEWARE={"remove": "silk.middleware.SilkyMiddleware"})
+    def test_list_side_loads_deduplicated_resources(self):
+        url = "/api/v1/requisitions/?include=lines.ship_to,approvals.approver,project"
+
+        # Resolve the session's principal first, so no measured request loads the user.
+        self.client.get("/api/v1/requisitions/")
+
+        with CaptureQueriesContext(connection) as plain:
+            self.client.get("/api/v1/requisitions/")
+
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(url)
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+        included = response.data["included"]
+
+        self.assertEqual(len(included["lines"]), 6)
+        self.assertEqual(len(included["approvals"]), 3)
+        self.assertEqual(list(included["users"]), [self.approver.id])
+        self.assertEqual(len(included["addresses"]), 1)
+        self.assertEqual(len(included["projects"]), 1)
+
+        # One query per side-loaded resource type, however many requisitions share them.
+        self.assertEqual(select_count(queries) - select_count(plain), 5)
+
+    def test_retrieve_side_loads_approvals(self):
+        requisition = self.requisitions[0]
+
+        response = self.client.get(f"/api/v1/requisitions/{requisition.id}/?include=approvals")
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(set(response.data["included"]), {"approvals"})
+        self.assertEqual(
+            [
+                approval["requisition"]
+                for approval in response.data["included"]["approvals"].values()
+            ],
+            [requisition.id],
+        )
+
+    def test_unknown_includes_are_rejected(self):
+        response = self.client.get("/api/v1/requisitions/?include=lines,secrets")
+
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+
+class RequisitionSearchTests(APITestCase):
+    def setUp(self):
+        self.user = CustomUser.objects.create_user(username="test", password="test")  # noqa: S106
+
+        self.client.defaults["HTTP_USER_AGENT"] = "test"
+        self.client.force_login(user=self.user)
+
+        self.address = Address.objects.create(
+            owner=self.user,
+            name="test",
+            attention="test",
+            street1="test",
+            city="test",
+            state="test",
+            zip_code="test",
+            country="US",
+        )
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.named = self.create_requisition("Keyboards for support", "Cables")
+            self.lined = self.create_requisition("Office refresh", "Ergonomic keyboard")
+            self.other = self.create_requisition("Printer toner", "Toner cartridge")
+
+    def create_requisition(self, name, description):
+        requisition = Requisition.objects.create(
+            name=name, owner=self.user, supplier="test", justification="test"
+        )
+
+        RequisitionLine.objects.create(
+            requisition=requisition,
+            line_number=1,
+            description=description,
+            category="test",
+            payment_term="net_30",
+            line_total=Decimal("1.00"),
+            ship_to=self.address,
+        )
+
+        return requisition
+
+    def search(self, url):
+        response = self.client.get(url)
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+        return [row["id"] for row in response.data["results"]]
+
+    def test_header_matches_rank_above_line_matches(self):
+        self.assertEqual(
+            self.search("/api/v1/requisitions/?search=keyboard"), [self.named.id, self.lined.id]
+        )
+
+    def test_line_changes_update_the_requisition_vector(self):
+        line = self.other.lines.get()
+
+        with self.captureOnCommitCallbacks(execute=True):
+            line.description = "Wireless keyboard"
+            line.save()
+
+        self.assertIn(self.other.id, self.search("/api/v1/requisitions/?search=keyboard"))
+        self.assertEqual(
+            self.search("/api/v1/requisitions/lines/?search=toner"),
+            [],
+        )
+
+    def test_updates_are_deduplicated_per_transaction(self):
+        lines = list(RequisitionLine.objects.all())
+
+        with self.captureOnCommitCallbacks() as callbacks:
+            for line in lines:
+                line.category = "hardware"
+                line.save()
+
+        with CaptureQueriesContext(connection) as queries:
+            for callback in callbacks:
+                callback()
+
+        updates = [query["sql"] for query in queries if query["sql"].startswith("UPDATE")]
+
+        self.assertEqual(len(updates), 2)
+        self.assertEqual(
+            len(self.search("/api/v1/requisitions/lines/?search=hardware")), len(lines)
+        )
+
+    def test_header_saves_only_rebuild_changed_text(self):
+        requisition = Requisition.objects.get(pk=self.named.pk)
+
+        with self.captureOnCommitCallbacks() as callbacks:
+            requisition.status = RequisitionStatusChoices.APPROVED
+            requisition.save()
+
+        self.assertEqual(callbacks, [])
+
+        with self.captureOnCommitCallbacks() as callbacks:
+            requisition.supplier = "Keyboard Co"
+            requisition.save()
+
+        with CaptureQueriesContext(connection) as queries:
+            for callback in callbacks:
+                callback()
+
+        updates = [query["sql"] for query in queries if query["sql"].startswith("UPDATE")]
+
+        # Line vectors hold no header text, so only the requisition vector is rebuilt.
+        self.assertEqual(len(updates), 1)
+        self.assertTrue(updates[0].startswith('UPDATE "requisition" '))
+
+
+class RequisitionTrigramFilterTests(APITestCase):
+    def setUp(self):
+        self.user = CustomUser.objects.create_user(username="test", password="test")  # noqa: S106
+
+        self.client.defaults["HTTP_USER_AGENT"] = "test"
+        self.client.force_login(user=self.user)
+
+        for supplier in ("Acme Corp", "ACME 100% Steel", "Globex"):
+            Requisition.objects.create(
+                name="test", owner=self.user, supplier=supplier, justification="test"
+            )
+
+    def suppliers(self, query):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(f"/api/v1/requisitions/?{query}")
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertTrue(any("ILIKE" in query["sql"] for query in queries))
+
+        return sorted(row["supplier"] for row in response.data["results"])
+
+    def test_case_insensitive_lookups_are_rewritten_to_ilike(self):
+        self.assertEqual(self.suppliers("supplier__iexact=globex"), ["Globex"])
+        self.assertEqual(
+            self.suppliers("supplier__istartswith=acme"), ["ACME 100% Steel", "Acme Corp"]
+        )
+
+    def test_like_wildcards_in_values_are_escaped(self):
+        self.assertEqual(self.suppliers("supplier__icontains=100%25"), ["ACME 100% Steel"])
+        self.assertEqual(self.suppliers("supplier__iendswith=_"), [])
+
+    def test_report_lists_filters_without_an_index(self):
+        output = StringIO()
+
+        call_command("report_filter_indexes", stdout=output)
+
+        lines = output.getvalue().splitlines()
+        supplier = next(line for line in lines if line.startswith("requisitions supplier "))
+
+        self.assertNotIn("icontains", supplier)
+        self.assertTrue(any(line.startswith("requisitions justification ") for line in lines))
+
+
+@override_settings(TIME_ZONE="America/New_York")
+class RequisitionDateRangeFilterTests(APITestCase):
+    def setUp(self):
+        self.user = CustomUser.objects.create_user(username="test", password="test")  # noqa: S106
+
+        self.client.defaults["HTTP_USER_AGENT"] = "test"
+        self.client.force_login(user=self.user)
+
+        # Around the new year in New York, where UTC is already in the next year and week.
+        for timestamp in (
+            "2024-12-31T23:30:00-05:00",
+            "2025-01-01T04:30:00+00:00",
+            "2025-01-05T12:00:00-05:00",
+            "2025-03-31T23:59:59-04:00",
+            "2025-04-01T00:00:00-04:00",
+            "2025-12-29T10:00:00-05:00",
+            "2026-01-01T03:00:00+00:00",
+        ):
+            requisition = Requisition.objects.create(
+                name=timestamp, owner=self.user, supplier="test", justification="test"
+            )
+
+            Requisition.objects.filter(id=requisition.id).update(
+                created_at=datetime.fromisoformat(timestamp)
+            )
+
+    def assert_matches_extract(self, **lookups):
+        query = "&".join(f"created_at__{lookup}={value}" for lookup, value in lookups.items())
+
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(f"/api/v1/requisitions/?{query}&page_size=100")
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertFalse(any("EXTRACT" in query["sql"] for query in queries))
+        self.assertEqual(
+            sorted(row["id"] for row in response.data["results"]),
+            sorted(
+                Requisition.objects.filter(
+                    **{f"created_at__{lookup}": value for lookup, value in lookups.items()}
+                ).values_list("id", flat=True)
+            ),
+        )
+
+    def test_date_parts_with_a_year_become_ranges(self):
+        self.assert_matches_extract(year=2025)
+        self.assert_matches_extract(year=2025, quarter=1)
+        self.assert_matches_extract(year=2025, month=1, day=1)
+        self.assert_matches_extract(year=2024, month=12)
+
+    def test_iso_weeks_split_across_the_year(self):
+        self.assert_matches_extract(year=2025, week=1)
+        self.assert_matches_extract(year=2026, week=1)
+
+    def test_date_lookup_becomes_a_day_range(self):
+        self.assert_matches_extract(date="2024-12-31")
+
+    def test_parts_without_a_year_still_filter(self):
+        response = self.client.get("/api/v1/requisitions/?created_at__month=1")
+
+        self.assertEqual(
+            sorted(row["id"] for row in response.data["results"]),
+            sorted(Requisition.objects.filter(created_at__month=1).values_list("id", flat=True)),
+        )
+
+
+class RequisitionQueryGuardTests(APITestCase):
+    def setUp(self):
+        self.user = CustomUser.objects.create_user(username="test", password="test")  # noqa: S106
+
+        self.client.defaults["HTTP_USER_AGENT"] = "test"
+        self.client.force_login(user=self.user)
+
+        Requisition.objects.create(
+            name="test", owner=self.user, supplier="test", justification="test"
+        )
+
+        self.url = "/api/v1/requisitions/"
+
+    def counter(self, name):
+        return read_guard_metrics("RequisitionViewSet")[name]
+
+    @override_settings(QUERY_GUARD_MAX_IN_VALUES=3, QUERY_GUARD_MAX_REGEX_LENGTH=5)
+    def test_oversized_in_lists_and_regexes_are_rejected(self):
+        rejected = self.counter("rejected_filters")
+
+        response = self.client.get(f"{self.url}?id__in=1,2,3,4")
+
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn("id__in", response.data["errors"][0]["detail"])
+
+        response = self.client.get(f"{self.url}?supplier__regex=abcdef")
+
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(self.counter("rejected_filters"), rejected + 2)
+
+        # Repeating a parameter does not slip values past the limits.
+        for query in ("id__in=1,2&id__in=3,4", "supplier__regex=abcdef&supplier__regex=te.t"):
+            response = self.client.get(f"{self.url}?{query}")
+
+            self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+        response = self.client.get(f"{self.url}?id__in=1,2,3&supplier__regex=te.t")
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+    @override_settings(QUERY_GUARD_MAX_COST=0.001)
+    def test_plans_above_the_cost_ceiling_are_rejected(self):
+        rejected = self.counter("rejected_cost")
+
+        response = self.client.get(self.url)
+
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(self.counter("rejected_cost"), rejected + 1)
+
+    @override_settings(QUERY_GUARD_MAX_COST=10_000_000)
+    def test_plans_below_the_cost_ceiling_run(self):
+        response = self.client.get(self.url)
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data["count"], 1)
+
+    @override_settings(QUERY_GUARD_SLOW_SECONDS=0)
+    def test_slow_requests_are_counted(self):
+        slow = self.counter("slow")
+
+        self.client.get(self.url)
+
+        self.assertEqual(self.counter("slow"), slow + 1)
+
+    def test_statement_timeout_cancels_long_queries(self):
+        with (
+            self.assertRaises(OperationalError) as context,  # noqa: PT027
+            statement_timeout(10),
+            connection.cursor() as cursor,
+        ):
+            cursor.execute("SELECT pg_sleep(1)")
+
+        self.assertTrue(query_canceled(context.exception))
+
+    def test_report_lists_guarded_endpoints(self):
+        output = StringIO()
+
+        call_command("report_query_guard", stdout=output)
+
+        lines = output.getvalue().splitlines()
+
+        self.assertTrue(any(line.startswith("RequisitionViewSet (timeout ") for line in lines))
+        self.assertTrue(any(line.startswith("UserViewSet ") for line in lines))
+        self.assertEqual(guard_metric("UserViewSet", "slow"), "query_guard.UserViewSet.slow")
+
+
+@modify_settings(MIDDLEWARE={"remove": "silk.middleware.SilkyMiddleware"})
+class RequisitionConditionalGetTests(APITestCase):
+    def setUp(self):
+        self.user = CustomUser.objects.create_user(username="test", password="test")  # noqa: S106
+
+        self.client.defaults["HTTP_USER_AGENT"] = "test"
+        self.client.force_login(user=self.user)
+
+        self.address = Address.objects.create(
+            owner=self.user,
+            name="test",
+            attention="test",
+            street1="test",
+            city="test",
+            state="test",
+            zip_code="test",
+            country="US",
+        )
+        self.requisition = Requisition.objects.create(
+            name="test", owner=self.user, supplier="test", justification="test"
+        )
+        self.line = RequisitionLine.objects.create(
+            requisition=self.requisition,
+            line_number=1,
+            description="test",
+            category="test",
+            payment_term="net_30",
+            line_total=Decimal("1.00"),
+            need_by=date(2030, 1, 1),
+            ship_to=self.address,
+        )
+
+        self.url = "/api/v1/requisitions/"
+        self.detail_url = f"{self.url}{self.requisition.id}/"
+
+    def etag(self, url):
+        response = self.client.get(url)
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertTrue(response["ETag"].startswith('W/"'))
+
+        return response["ETag"]
+
+    def test_matching_etags_answer_not_modified_in_one_query(self):
+        for url in (self.url, self.detail_url):
+            etag = self.etag(url)
+
+            with CaptureQueriesContext(connection) as queries:
+                response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+
+            table = Requisition._meta.db_table
+
+            self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+            self.assertEqual(response["ETag"], etag)
+            self.assertEqual(
+                sum(
+                    f'"{table}"' in query["sql"]
+                    for query in queries
+                    if query["sql"].startswith("SELECT")
+                ),
+                1,
+            )
+
+    def test_writes_change_the_etags(self):
+        list_etag = self.etag(self.url)
+        detail_etag = self.etag(self.detail_url)
+
+        self.line.description = "changed"
+        self.line.save()
+
+        self.assertNotEqual(self.etag(self.detail_url), detail_etag)
+        self.assertEqual(self.etag(self.url), list_etag)
+
+        self.requisition.name = "changed"
+        self.requisition.save()
+
+        self.assertNotEqual(self.etag(self.url), list_etag)
+
+        list_etag = self.etag(self.url)
+        self.requisition.deleted = True
+        self.requisition.save()
+
+        self.assertNotEqual(self.etag(self.url), list_etag)
+
+    def test_query_strings_get_their_own_etags(self):
+        self.assertNotEqual(self.etag(self.url), self.etag(f"{self.url}?fields=id,name"))
+        self.assertNotEqual(self.etag(self.url), self.etag(f"{self.url}?include=lines"))
+
+    def test_if_modified_since_answers_not_modified(self):
+        response = self.client.get(self.detail_url)
+
+        response = self.client.get(
+            self.detail_url, HTTP_IF_MODIFIED_SINCE=response["Last-Modified"]
+        )
+
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+
+    def test_lists_send_no_last_modified_and_count_once(self):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(self.url)
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data["count"], 1)
+        self.assertNotIn("Last-Modified", response)
+        self.assertFalse(any('"__count"' in query["sql"] for query in queries))
+
+        self.assertEqual(
+            sum(query["sql"].startswith("EXPLAIN (FORMAT JSON)") for query in queries),
+            1,
+        )
+
+    def test_cursor_walks_are_not_fingerprinted(self):
+        response = self.client.get(f"{self.url}?cursor=")
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertNotIn("ETag", response)
+
+    def test_missing_objects_still_answer_not_found(self):
+        response = self.client.get(f"{self.url}0/", HTTP_IF_NONE_MATCH="*")
+
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+
+@override_settings(REFERENCE_CACHE_METRICS_BATCH=1)
+class RequisitionReferenceCacheTests(APITestCase):
+    def setUp(self):
+        self.user = CustomUser.objects.create_user(username="test", password="test")  # noqa: S106
+
+        self.address = Address.objects.create(
+            owner=self.user,
+            name="test",
+            attention="test",
+            street1="test",
+            city="test",
+            state="test",
+            zip_code="test",
+            country="US",
+        )
+        self.project = Project.objects.create(name="test", project_code="test")
+
+        address_cache.clear()
+        project_cache.clear()
+
+    def counter(self, name):
+        return read_reference_metrics("address.address")[name]
+
+    def validate(self, **data):
+        request = factory.post("/api/v1/requisitions/")
+        request.user = self.user
+
+        serializer = RequisitionCreateSerializer(
+            data={
+                "name": "test",
+                "supplier": "test",
+                "justification": "test",
+                "currency": "usd",
+                "lines": [
+                    {
+                        "line_number": 1,
+                        "line_type": "service",
+                        "description": "test",
+                        "category": "test",
+                        "line_total": "10.00",
+                        "payment_term": "net_30",
+                        "ship_to": self.address.id,
+                    }
+                ],
+                **data,
+            },
+            context={"request": request},
+        )
+        serializer.is_valid()
+
+        return serializer
+
+    def test_local_hits_skip_the_database(self):
+        misses = self.counter("misses")
+
+        self.assertEqual(self.validate(project=self.project.id).errors, {})
+        self.assertEqual(self.counter("misses"), misses + 1)
+
+        local_hits = self.counter("local_hits")
+
+        with CaptureQueriesContext(connection) as queries:
+            serializer = self.validate(project=self.project.id)
+
+        # Only the check that the user may still ship to the address reads the database.
+        self.assertEqual(
+            [
+                query["sql"].split(" FROM ")[1].split()[0]
+                for query in queries
+                if query["sql"].startswith("SELECT")
+            ],
+            ['"address"'],
+        )
+        self.assertEqual(serializer.validated_data["project"], self.project)
+        self.assertEqual(serializer.validated_data["lines"][0]["ship_to"], self.address)
+        self.assertEqual(self.counter("local_hits"), local_hits + 1)
+
+    def test_saves_invalidate_cached_rows(self):
+        self.validate()
+
+        invalidations = self.counter("invalidations")
+
+        self.address.deleted = True
+        self.address.save()
+
+        self.assertEqual(self.counter("invalidations"), invalidations + 1)
+        self.assertEqual(
+            self.validate().errors["lines"][0]["ship_to"],
+            [f"This address does not exist: {self.address.id}"],
+        )
+
+    def test_missing_projects_are_rejected(self):
+        self.assertEqual(
+            self.validate(project=0).errors["project"], ["This project does not exist: 0"]
+        )
+        self.assertIn("project", self.validate(project="test").errors)
+
+    def test_broadcasts_drop_local_rows(self):
+        address_cache.get(self.address.id)
+
+        listener.handle({"data": f'{{"model": "address.address", "ids": [{self.address.id}]}}'})
+
+        self.assertEqual(address_cache.read_local([self.address.id]), {})
+
+    def test_report_lists_reference_caches(self):
+        output = StringIO()
+
+        call_command("report_reference_cache", stdout=output)
+
+        self.assertIn("address.address: local_hits=", output.getvalue())
+        self.assertIn("project.project: local_hits=", output.getvalue())
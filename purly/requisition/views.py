@@ -1,17 +1,25 @@
 from django.db import transaction
 from django.http import Http404
-from django_filters.rest_framework import DjangoFilterBackend
 from drf_spectacular.utils import extend_schema
 from rest_framework import exceptions, filters, generics, status, viewsets
 from rest_framework.decorators import action
 from rest_framework.permissions import IsAuthenticated
 from rest_framework.response import Response
 
+from config.exceptions import BadRequest
+from purly.approval.routing import trace_routing
+from purly.base import SparseFieldsViewMixin
+from purly.conditional import ConditionalGetMixin
+from purly.filtering import IndexedFilterBackend
+from purly.guard import QueryGuardMixin
 from purly.permissions import IsOwnerOrAdmin
+from purly.readers import CompiledListMixin
 
 from .filters import REQUISITION_FILTER_FIELDS, REQUISITION_LINE_FILTER_FIELDS
+from .includes import IncludeViewMixin
 from .models import Requisition, RequisitionLine
 from .pagination import RequisitionLinePagination, RequisitionPagination
+from .search import FullTextSearchFilter
 from .serializers import (
     RequisitionCreateSerializer,
     RequisitionDetailSerializer,
@@ -32,26 +40,44 @@ REQUISITION_ORDERING = [
 REQUISITION_LINE_ORDERING = ["line_total", "need_by", "created_at", "updated_at"]
 
 
-class RequisitionViewSet(viewsets.ModelViewSet):
+class RequisitionViewSet(
+    QueryGuardMixin,
+    IncludeViewMixin,
+    ConditionalGetMixin,
+    CompiledListMixin,
+    SparseFieldsViewMixin,
+    viewsets.ModelViewSet,
+):
     http_method_names = ["get", "post", "put"]
     permission_classes = [IsOwnerOrAdmin]
-    queryset = (
-        Requisition.objects.active()  # type: ignore
-        .select_related("project", "owner", "created_by", "updated_by")
-        .prefetch_related("lines")
-    )
+    queryset = Requisition.objects.active()  # type: ignore
+    serializer_class = RequisitionListSerializer
     pagination_class = RequisitionPagination
-    filter_backends = [filters.OrderingFilter, DjangoFilterBackend]
+    filter_backends = [filters.OrderingFilter, IndexedFilterBackend, FullTextSearchFilter]
     filterset_fields = REQUISITION_FILTER_FIELDS
     ordering_fields = REQUISITION_ORDERING
 
     def get_queryset(self):
         user = self.request.user
+        queryset = self.queryset
+
+        # List rows are read by the compiled reader; every other action renders the detail.
+        if self.action != "list":
+            queryset = queryset.with_detail()
 
         if user.is_staff or user.is_superuser:
-            return self.queryset
+            return queryset
+
+        return queryset.filter(owner=user)
 
-        return self.queryset.filter(owner=user)
+    def get_etag_related(self):
+        related = super().get_etag_related()
+
+        # The detail body embeds the lines.
+        if self.action == "list":
+            return related
+
+        return list(dict.fromkeys(["lines", *related]))
 
     def get_object(self):
         try:
@@ -61,17 +87,7 @@ class RequisitionViewSet(viewsets.ModelViewSet):
 
     @extend_schema(summary="List requisitions", request=None, responses=RequisitionListSerializer)
     def list(self, request, *args, **kwargs):
-        queryset = self.filter_queryset(self.get_queryset())
-        page = self.paginate_queryset(queryset)
-
-        if page is not None:
-            serializer = RequisitionListSerializer(page, many=True)
-
-            return self.get_paginated_response(serializer.data)
-
-        serializer = self.get_serializer(queryset, many=True)
-
-        return Response(serializer.data)
+        return super().list(request, *args, **kwargs)
 
     @extend_schema(
         summary="Create requisition",
@@ -97,8 +113,17 @@ class RequisitionViewSet(viewsets.ModelViewSet):
         summary="Retrieve requisition", request=None, responses=RequisitionDetailSerializer
     )
     def retrieve(self, request, *args, **kwargs):
+        not_modified = self.not_modified()
+
+        if not_modified is not None:
+            return not_modified
+
         requisition = self.get_object()
         serializer = RequisitionDetailSerializer(requisition)
+        included = self.get_included([requisition])
+
+        if included is not None:
+            return Response({**serializer.data, "included": included})
 
         return Response(serializer.data)
 
@@ -125,12 +150,32 @@ class RequisitionViewSet(viewsets.ModelViewSet):
     @action(detail=True, methods=["post"])
     def submit(self, request, pk=None):
         requisition = self.get_object()
+        user = request.user
+        explain = request.query_params.get("explain") == "1" and (
+            user.is_staff or user.is_superuser
+        )
+
+        with trace_routing(enabled=explain) as trace:
+            try:
+                submit_withdraw_validation(self.request.user, requisition, "submit")
+            except BadRequest as exc:
+                if trace is None:
+                    raise
+
+                # A rejected submit is when the trace is wanted most, so it joins the 400.
+                transaction.set_rollback(True)
 
-        submit_withdraw_validation(self.request.user, requisition, "submit")
+                response = self.handle_exception(exc)
+                response.data["explain"] = trace.as_dict()
+
+                return response
 
         obj = on_submit(requisition, request_user=request.user)
         serializer = RequisitionDetailSerializer(obj)
 
+        if trace is not None:
+            return Response({**serializer.data, "explain": trace.as_dict()})
+
         return Response(serializer.data)
 
     @extend_schema(summary="Withdraw", request=None, responses=RequisitionDetailSerializer)
@@ -152,12 +197,19 @@ class RequisitionViewSet(viewsets.ModelViewSet):
     request=None,
     responses=RequisitionListSerializer,
 )
-class RequisitionMineListView(generics.ListAPIView):
+class RequisitionMineListView(
+    QueryGuardMixin,
+    IncludeViewMixin,
+    ConditionalGetMixin,
+    CompiledListMixin,
+    SparseFieldsViewMixin,
+    generics.ListAPIView,
+):
     http_method_names = ["get"]
     permission_classes = [IsAuthenticated]
     serializer_class = RequisitionListSerializer
     pagination_class = RequisitionPagination
-    filter_backends = [DjangoFilterBackend, filters.OrderingFilter]
+    filter_backends = [IndexedFilterBackend, filters.OrderingFilter, FullTextSearchFilter]
     filterset_fields = REQUISITION_FILTER_FIELDS
     ordering_fields = REQUISITION_ORDERING
 
@@ -165,7 +217,6 @@ class RequisitionMineListView(generics.ListAPIView):
         return (
             Requisition.objects.active()  # type: ignore
             .select_related("project", "owner", "created_by", "updated_by")
-            .prefetch_related("lines")
             .filter(owner=self.request.user)
         )
 
@@ -173,7 +224,13 @@ class RequisitionMineListView(generics.ListAPIView):
 @extend_schema(
     summary="List requisition lines", request=None, responses=RequisitionLineListSerializer
 )
-class RequisitionLineListView(generics.ListAPIView):
+class RequisitionLineListView(
+    QueryGuardMixin,
+    ConditionalGetMixin,
+    CompiledListMixin,
+    SparseFieldsViewMixin,
+    generics.ListAPIView,
+):
     http_method_names = ["get"]
     permission_classes = [IsOwnerOrAdmin]
     queryset = RequisitionLine.objects.active().select_related(  # type: ignore
@@ -181,7 +238,7 @@ class RequisitionLineListView(generics.ListAPIView):
     )
     serializer_class = RequisitionLineListSerializer
     pagination_class = RequisitionLinePagination
-    filter_backends = [DjangoFilterBackend, filters.OrderingFilter]
+    filter_backends = [IndexedFilterBackend, filters.OrderingFilter, FullTextSearchFilter]
     filterset_fields = REQUISITION_LINE_FILTER_FIELDS
     ordering_fields = REQUISITION_LINE_ORDERING
 
@@ -199,12 +256,18 @@ class RequisitionLineListView(generics.ListAPIView):
     request=None,
     responses=RequisitionListSerializer,
 )
-class RequisitionLineMineListView(generics.ListAPIView):
+class RequisitionLineMineListView(
+    QueryGuardMixin,
+    ConditionalGetMixin,
+    CompiledListMixin,
+    SparseFieldsViewMixin,
+    generics.ListAPIView,
+):
     http_method_names = ["get"]
     permission_classes = [IsAuthenticated]
     serializer_class = RequisitionLineListSerializer
     pagination_class = RequisitionLinePagination
-    filter_backends = [DjangoFilterBackend, filters.OrderingFilter]
+    filter_backends = [IndexedFilterBackend, filters.OrderingFilter, FullTextSearchFilter]
     filterset_fields = REQUISITION_LINE_FILTER_FIELDS
     ordering_fields = REQUISITION_LINE_ORDERING
 
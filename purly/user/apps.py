@@ -5,3 +5,13 @@ class UserConfig(AppConfig):
     default_auto_field = "django.db.models.BigAutoField"
     name = "purly.user"
     verbose_name = "User Management"
+
+    def ready(self):
+        from django.db.models.signals import post_delete, post_save
+
+        from purly.caching import invalidate_cached_responses
+
+        model = self.get_model("CustomUser")
+
+        post_save.connect(invalidate_cached_responses, sender=model)
+        post_delete.connect(invalidate_cached_responses, sender=model)
@@ -0,0 +1,52 @@
+from drf_spectacular.extensions import OpenApiAuthenticationExtension
+from drf_spectacular.plumbing import build_bearer_security_scheme_object
+from rest_framework import exceptions
+from rest_framework.authentication import BaseAuthentication, get_authorization_header
+from rest_framework.permissions import SAFE_METHODS
+
+
+class SignedTokenAuthentication(BaseAuthentication):
+    """Bearer tokens from `issue_token()`, checked without loading the user from the database.
+
+    The user is the principal signed into the token. The denylist costs one cache read per
+    token and process every API_TOKEN_DENYLIST_REFRESH seconds. Safe methods need the read
+    or write scope, other methods the write scope. Requests without a bearer token fall
+    through to the next authentication class.
+    """
+
+    keyword = "Bearer"
+
+    def authenticate(self, request):
+        # DRF loads authentication classes while config.exceptions, which models import, loads.
+        from .principal import build_principal
+        from .tokens import denylist, read_token
+
+        header = get_authorization_header(request).split()
+
+        if not header or header[0].lower() != self.keyword.lower().encode():
+            return None
+
+        if len(header) != 2:  # noqa: PLR2004
+            raise exceptions.AuthenticationFailed(detail="The token header is malformed.")
+
+        payload = read_token(header[1].decode(errors="replace"))
+
+        if payload is None or denylist.revoked(payload):
+            raise exceptions.AuthenticationFailed(detail="The token is invalid or expired.")
+
+        scopes = {"read", "write"} if request.method in SAFE_METHODS else {"write"}
+
+        if not scopes & set(payload["scopes"]):
+            raise exceptions.PermissionDenied(detail="The token does not allow this method.")
+
+        return build_principal(payload["user"]), payload
+
+
+class SignedTokenScheme(OpenApiAuthenticationExtension):
+    target_class = "purly.user.authentication.SignedTokenAuthentication"
+    name = "signedToken"
+
+    def get_security_definition(self, auto_schema):
+        return build_bearer_security_scheme_object(
+            header_name="Authorization", token_prefix=self.target.keyword
+        )
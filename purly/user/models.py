@@ -11,11 +11,11 @@ from allauth.account.signals import (
 from django.conf import settings
 from django.contrib.auth.models import AbstractUser
 from django.db import models
-from django.db.models.signals import post_save
+from django.db.models.signals import post_delete, post_save
 from django.dispatch import receiver
 
-from purly.approval.services import cancel_user_approvals
-from purly.base import ModelBase
+from purly.base import ModelBase, TrackedFieldsMixin
+from purly.filtering import trigram_index
 
 from .utils import get_ip_address, get_user_agent
 
@@ -31,23 +31,65 @@ class UserActivityActionChoices(models.TextChoices):
     EMAIL_REMOVE = ("email_remove", "email_remove")
 
 
-class CustomUser(AbstractUser):
+class CustomUser(TrackedFieldsMixin, AbstractUser):
+    # The principal signed into API tokens, whose tokens end when any of these change.
+    tracked_fields = ("username", "password", "is_staff", "is_superuser", "is_active")
+
     class Meta:
         db_table = "user"
         verbose_name = "user"
         verbose_name_plural = "users"
         ordering = ["-date_joined"]
+        indexes = [trigram_index("username", "user_username_trgm")]
 
     def __str__(self):
         return self.username
 
+    def refresh_from_db(self, using=None, fields=None, from_queryset=None):
+        # A cached principal defers every field it does not hold, so its first deferred read
+        # loads the whole row rather than one query per field.
+        if fields is not None and getattr(self, "_principal", False):
+            fields = {*fields, *self.get_deferred_fields()}
+            self._principal = False
+
+        super().refresh_from_db(using=using, fields=fields, from_queryset=from_queryset)
+
 
 @receiver(post_save, sender=settings.AUTH_USER_MODEL)
 def deactivate_approvals(sender, instance, **kwargs):
+    from purly.approval.services import cancel_user_approvals
+
     if instance.is_active is False:
         cancel_user_approvals(instance)
 
 
+@receiver(post_save, sender=settings.AUTH_USER_MODEL)
+def invalidate_user_principal(sender, instance, created, update_fields=None, **kwargs):
+    from .principal import invalidate_principal
+    from .tokens import revoke_user_tokens
+
+    # Logins only touch last_login, which the principal does not hold.
+    if update_fields is not None and set(update_fields) <= {"last_login"}:
+        return
+
+    invalidate_principal(instance.pk)
+
+    fields = update_fields if update_fields is not None else CustomUser.tracked_fields
+
+    # API tokens carry the principal they were issued with, so they end when it changes.
+    if not created and instance.changed_fields(set(fields) & set(CustomUser.tracked_fields)):
+        revoke_user_tokens(instance.pk)
+
+
+@receiver(post_delete, sender=settings.AUTH_USER_MODEL)
+def invalidate_deleted_user_principal(sender, instance, **kwargs):
+    from .principal import invalidate_principal
+    from .tokens import revoke_user_tokens
+
+    invalidate_principal(instance.pk)
+    revoke_user_tokens(instance.pk)
+
+
 class UserProfile(ModelBase):
     user = models.OneToOneField(
         settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name="profile"
@@ -144,7 +186,7 @@ def record_user_activity(  # noqa: PLR0913
         context=context,
         ip_address=ip_address,
         user_agent=user_agent,
-        session_key=request.session.session_key if request.session.session_key else "",
+        session_key=request.session.session_key or "",
     )
 
     new_activity.save()
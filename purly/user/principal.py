@@ -0,0 +1,74 @@
+from django.conf import settings
+from django.contrib import auth
+from django.core.cache import cache
+from django.db import DEFAULT_DB_ALIAS, transaction
+from django.utils.crypto import constant_time_compare
+
+from .models import CustomUser
+
+PRINCIPAL_CACHE_PREFIX = "principal:"
+
+# What permissions and queryset filters read from request.user, plus the username most
+# responses render for owners.
+PRINCIPAL_FIELDS = ("id", "username", "is_staff", "is_superuser", "is_active")
+
+
+def principal_key(user_id):
+    return f"{PRINCIPAL_CACHE_PREFIX}{user_id}"
+
+
+def build_principal(entry):
+    """Return a CustomUser loaded with the principal fields; the first other read loads the rest."""
+    # from_db() takes the values in the model's field order.
+    fields = [
+        field.attname
+        for field in CustomUser._meta.concrete_fields
+        if field.attname in PRINCIPAL_FIELDS
+    ]
+
+    user = CustomUser.from_db(DEFAULT_DB_ALIAS, fields, [entry[field] for field in fields])
+    user._principal = True
+
+    return user
+
+
+def get_principal(request):
+    """Return the session's user from the principal cache, or as `auth.get_user()` would.
+
+    A cached principal is only trusted when the session's auth hash matches the one cached
+    with it, so password changes and flushed sessions behave as they do without the cache.
+    """
+    session = request.session
+
+    try:
+        user_id = CustomUser._meta.pk.to_python(session[auth.SESSION_KEY])
+        backend_path = session[auth.BACKEND_SESSION_KEY]
+        session_hash = session[auth.HASH_SESSION_KEY]
+    except KeyError:
+        return auth.get_user(request)
+
+    entry = cache.get(principal_key(user_id))
+
+    if (
+        entry is not None
+        and backend_path in settings.AUTHENTICATION_BACKENDS
+        and constant_time_compare(session_hash, entry["session_hash"])
+    ):
+        return build_principal(entry)
+
+    user = auth.get_user(request)
+
+    if user.is_authenticated:
+        entry = {field: getattr(user, field) for field in PRINCIPAL_FIELDS}
+        entry["session_hash"] = user.get_session_auth_hash()
+
+        cache.set(principal_key(user.pk), entry, timeout=settings.PRINCIPAL_CACHE_TIMEOUT)
+
+    return user
+
+
+def invalidate_principal(user_id):
+    cache.delete(principal_key(user_id))
+
+    # Delete again once committed so no request caches the row read before the commit.
+    transaction.on_commit(lambda: cache.delete(principal_key(user_id)))
@@ -1,8 +1,10 @@
+from django.conf import settings
 from rest_framework import serializers
 
 from purly.base import CustomToRepresentation
 
 from .models import CustomUser
+from .tokens import TOKEN_SCOPES
 
 
 class UserDetailSerializer(CustomToRepresentation, serializers.ModelSerializer):
@@ -21,3 +23,16 @@ class UserListSerializer(CustomToRepresentation, serializers.ModelSerializer):
     class Meta:
         model = CustomUser
         fields = ["id", "username", "first_name", "last_name", "email", "is_active", "date_joined"]
+
+
+class UserTokenCreateSerializer(serializers.Serializer):
+    scopes = serializers.ListField(
+        child=serializers.ChoiceField(choices=TOKEN_SCOPES), allow_empty=False, default=["read"]
+    )
+    lifetime = serializers.IntegerField(
+        min_value=60, max_value=settings.API_TOKEN_MAX_LIFETIME, default=settings.API_TOKEN_LIFETIME
+    )
+
+
+class UserTokenRevokeSerializer(serializers.Serializer):
+    token = serializers.CharField()
@@ -0,0 +1,232 @@
+from django.core.cache import cache
+from django.db import connection
+from django.test import modify_settings
+from django.test.utils import CaptureQueriesContext
+from rest_framework import status
+from rest_framework.test import APIClient, APITestCase
+
+from .models import CustomUser
+from .principal import PRINCIPAL_FIELDS, build_principal, principal_key
+from .tokens import denylist, issue_token, revoke_token, revoked_token_key
+
+
+@modify_settings(MIDDLEWARE={"remove": "silk.middleware.SilkyMiddleware"})
+class UserPrincipalCacheTests(APITestCase):
+    def setUp(self):
+        self.user = CustomUser.objects.create_user(
+            username="test",
+            password="test",  # noqa: S106
+            email="test@example.com",
+        )
+
+        self.client.defaults["HTTP_USER_AGENT"] = "test"
+        self.client.force_login(user=self.user)
+
+        self.url = "/api/v1/projects/"
+
+    def user_queries(self):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(self.url)
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+        return [query for query in queries if 'FROM "user"' in query["sql"]]
+
+    def test_cached_principal_skips_the_user_query(self):
+        self.assertNotEqual(self.user_queries(), [])
+        self.assertIsNotNone(cache.get(principal_key(self.user.pk)))
+        self.assertEqual(self.user_queries(), [])
+
+    def test_saves_invalidate_the_principal(self):
+        self.client.get(self.url)
+
+        self.assertEqual(self.client.get("/api/v1/users/").status_code, status.HTTP_403_FORBIDDEN)
+
+        self.user.is_staff = True
+        self.user.save()
+
+        self.assertIsNone(cache.get(principal_key(self.user.pk)))
+
+        # Once from the database, then from the refreshed principal.
+        for _ in range(2):
+            self.assertEqual(self.client.get("/api/v1/users/").status_code, status.HTTP_200_OK)
+
+    def test_deactivated_users_are_signed_out(self):
+        self.client.get(self.url)
+
+        self.user.is_active = False
+        self.user.save()
+
+        self.assertEqual(self.client.get(self.url).status_code, status.HTTP_403_FORBIDDEN)
+
+    def test_password_changes_end_other_sessions(self):
+        self.client.get(self.url)
+
+        self.user.set_password("changed")
+        self.user.save()
+
+        self.assertEqual(self.client.get(self.url).status_code, status.HTTP_403_FORBIDDEN)
+
+    def test_logins_keep_the_principal(self):
+        self.client.get(self.url)
+
+        self.user.save(update_fields=["last_login"])
+
+        self.assertIsNotNone(cache.get(principal_key(self.user.pk)))
+
+    def test_me_renders_the_full_user(self):
+        self.client.get(self.url)
+
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get("/api/v1/users/me/")
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data["email"], "test@example.com")
+
+        # The deferred fields load together on the first read.
+        self.assertEqual(
+            len([query for query in queries if query["sql"].startswith('SELECT "user"')]), 1
+        )
+
+    def test_principals_load_deferred_fields_once(self):
+        principal = build_principal(
+            {field: getattr(self.user, field) for field in PRINCIPAL_FIELDS}
+        )
+
+        with CaptureQueriesContext(connection) as queries:
+            self.assertEqual(principal.email, "test@example.com")
+            self.assertEqual(principal.date_joined, self.user.date_joined)
+            self.assertEqual(principal.last_name, "")
+
+        self.assertEqual(len([query for query in queries if query["sql"].startswith("SELECT")]), 1)
+
+
+@modify_settings(MIDDLEWARE={"remove": "silk.middleware.SilkyMiddleware"})
+class UserApiTokenTests(APITestCase):
+    def setUp(self):
+        self.user = CustomUser.objects.create_user(username="test", password="test")  # noqa: S106
+
+        self.client.defaults["HTTP_USER_AGENT"] = "test"
+        self.client.force_login(user=self.user)
+
+        self.url = "/api/v1/projects/"
+
+    def issue(self, **data):
+        response = self.client.post("/api/v1/users/me/tokens/", data, format="json")
+
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+
+        return response.data["token"]
+
+    def bearer(self, token):
+        client = APIClient(HTTP_USER_AGENT="test")
+        client.credentials(HTTP_AUTHORIZATION=f"Bearer {token}")
+
+        return client
+
+    def test_tokens_authenticate_without_loading_the_user(self):
+        client = self.bearer(self.issue())
+
+        with CaptureQueriesContext(connection) as queries:
+            response = client.get(self.url)
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual([query for query in queries if 'FROM "user"' in query["sql"]], [])
+
+    def test_scopes_limit_methods(self):
+        read = self.bearer(self.issue())
+        write = self.bearer(self.issue(scopes=["write"]))
+
+        # Write requests past authentication fail validation on the empty body.
+        for client, expected in (
+            (read, status.HTTP_403_FORBIDDEN),
+            (write, status.HTTP_400_BAD_REQUEST),
+        ):
+            response = client.post("/api/v1/addresses/", {}, format="json")
+
+            self.assertEqual(response.status_code, expected)
+
+        self.assertEqual(write.get(self.url).status_code, status.HTTP_200_OK)
+
+        response = self.client.post(
+            "/api/v1/users/me/tokens/", {"scopes": ["admin"]}, format="json"
+        )
+
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_tampered_and_expired_tokens_are_rejected(self):
+        token = self.issue()
+        expired, _ = issue_token(self.user, ["read"], -1)
+
+        for value in (f"{token[:-1]}x", expired, "test"):
+            self.assertEqual(
+                self.bearer(value).get(self.url).status_code, status.HTTP_403_FORBIDDEN
+            )
+
+    def test_revoked_tokens_are_rejected(self):
+        token = self.issue()
+        other = self.issue()
+
+        response = self.client.post(
+            "/api/v1/users/me/tokens/revoke/", {"token": token}, format="json"
+        )
+
+        self.assertEqual(response.status_code, status.HTTP_204_NO_CONTENT)
+        self.assertEqual(self.bearer(token).get(self.url).status_code, status.HTTP_403_FORBIDDEN)
+        self.assertEqual(self.bearer(other).get(self.url).status_code, status.HTTP_200_OK)
+
+    def test_user_saves_revoke_their_tokens(self):
+        token = self.issue()
+
+        self.user.is_active = False
+        self.user.save()
+
+        self.assertEqual(self.bearer(token).get(self.url).status_code, status.HTTP_403_FORBIDDEN)
+
+    def test_saves_outside_the_principal_keep_tokens(self):
+        token = self.issue()
+
+        self.user.first_name = "changed"
+        self.user.email = "changed@example.com"
+        self.user.save()
+
+        self.assertEqual(self.bearer(token).get(self.url).status_code, status.HTTP_200_OK)
+
+        self.user.set_password("changed")
+        self.user.save()
+
+        self.assertEqual(self.bearer(token).get(self.url).status_code, status.HTTP_403_FORBIDDEN)
+
+    def test_tokens_issued_after_a_save_stay_valid(self):
+        self.user.first_name = "changed"
+        self.user.save()
+
+        token = self.issue()
+
+        self.assertEqual(self.bearer(token).get(self.url).status_code, status.HTTP_200_OK)
+
+    def test_deleted_users_lose_their_tokens(self):
+        token, _ = issue_token(self.user, ["read"], 60)
+
+        self.user.delete()
+
+        self.assertEqual(self.bearer(token).get(self.url).status_code, status.HTTP_403_FORBIDDEN)
+
+    def test_revocations_are_stored_separately(self):
+        first, first_payload = issue_token(self.user, ["read"], 60)
+        second, second_payload = issue_token(self.user, ["read"], 60)
+
+        revoke_token(first_payload)
+        revoke_token(second_payload)
+
+        # An evicted entry loses only its own revocation.
+        cache.delete(revoked_token_key(first_payload["jti"]))
+        denylist.checked.clear()
+
+        self.assertEqual(self.bearer(first).get(self.url).status_code, status.HTTP_200_OK)
+        self.assertEqual(self.bearer(second).get(self.url).status_code, status.HTTP_403_FORBIDDEN)
+
+    def test_tokens_cannot_issue_tokens(self):
+        response = self.bearer(self.issue()).post("/api/v1/users/me/tokens/", {}, format="json")
+
+        self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
@@ -0,0 +1,127 @@
+import math
+import time
+import uuid
+
+from django.conf import settings
+from django.core import signing
+from django.core.cache import cache
+
+from .principal import PRINCIPAL_FIELDS
+
+SIGNING_SALT = "purly.user.tokens"
+TOKEN_SCOPES = ("read", "write")
+
+REVOKED_TOKEN_PREFIX = "api_token:revoked:"  # noqa: S105
+REVOKED_USER_PREFIX = "api_token:revoked_user:"
+
+
+def revoked_token_key(jti):
+    return f"{REVOKED_TOKEN_PREFIX}{jti}"
+
+
+def revoked_user_key(user_id):
+    return f"{REVOKED_USER_PREFIX}{user_id}"
+
+
+def token_time():
+    """Return the time in seconds, at the resolution both iat and revocation times record."""
+    return round(time.time(), 6)
+
+
+def issue_token(user, scopes, lifetime):
+    """Return (token, payload) for a token acting as user, signed with SECRET_KEY."""
+    issued_at = token_time()
+    payload = {
+        "jti": uuid.uuid4().hex,
+        "user": {field: getattr(user, field) for field in PRINCIPAL_FIELDS},
+        "scopes": sorted(set(scopes)),
+        "iat": issued_at,
+        "exp": math.ceil(issued_at + lifetime),
+    }
+
+    return signing.dumps(payload, salt=SIGNING_SALT), payload
+
+
+def read_token(token):
+    """Return the payload of a valid, unexpired token, or None."""
+    try:
+        payload = signing.loads(token, salt=SIGNING_SALT)
+    except signing.BadSignature:
+        return None
+
+    if payload["exp"] <= time.time():
+        return None
+
+    return payload
+
+
+class TokenDenylist:
+    """Revocations stored as one cache entry each, read through a short per-process memo.
+
+    A revoked token id and a user's revocation time are separate entries expiring with the
+    tokens they deny, so concurrent revocations never overwrite each other and an evicted
+    entry loses only its own revocation. Each process reuses what it read for a token for
+    API_TOKEN_DENYLIST_REFRESH seconds, so checking a token costs at most one round-trip
+    per interval and a revocation reaches every process within it.
+    """
+
+    def __init__(self):
+        self.checked = {}
+        self.pruned_at = time.monotonic()
+
+    def current(self, payload):
+        """Return whether the token id is revoked and when its user's tokens were revoked."""
+        now = time.monotonic()
+        entry = self.checked.get(payload["jti"])
+
+        if entry is None or now - entry[0] >= settings.API_TOKEN_DENYLIST_REFRESH:
+            token_key = revoked_token_key(payload["jti"])
+            user_key = revoked_user_key(payload["user"]["id"])
+            entries = cache.get_many([token_key, user_key])
+
+            self.prune(now)
+
+            entry = (now, token_key in entries, entries.get(user_key))
+            self.checked[payload["jti"]] = entry
+
+        return entry[1:]
+
+    def prune(self, now):
+        if now - self.pruned_at < settings.API_TOKEN_DENYLIST_REFRESH:
+            return
+
+        self.checked = {
+            jti: entry
+            for jti, entry in self.checked.items()
+            if now - entry[0] < settings.API_TOKEN_DENYLIST_REFRESH
+        }
+        self.pruned_at = now
+
+    def revoked(self, payload):
+        token_revoked, revoked_at = self.current(payload)
+
+        return token_revoked or (revoked_at is not None and payload["iat"] <= revoked_at)
+
+    def add_token(self, jti, exp):
+        cache.set(revoked_token_key(jti), exp, timeout=max(math.ceil(exp - time.time()), 1))
+
+        self.checked.pop(jti, None)
+
+    def add_user(self, user_id, revoked_at):
+        # Tokens issued before revoked_at expire within the longest lifetime after it.
+        cache.set(
+            revoked_user_key(user_id), revoked_at, timeout=settings.API_TOKEN_MAX_LIFETIME + 1
+        )
+
+        self.checked.clear()
+
+
+denylist = TokenDenylist()
+
+
+def revoke_token(payload):
+    denylist.add_token(payload["jti"], payload["exp"])
+
+
+def revoke_user_tokens(user_id):
+    denylist.add_user(user_id, token_time())
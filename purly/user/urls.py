@@ -1,12 +1,21 @@
 from django.urls import path
 from rest_framework import routers
 
-from .views import UserMeRetrieveAPIView, UserViewSet
+from .views import (
+    UserMeRetrieveAPIView,
+    UserTokenCreateAPIView,
+    UserTokenRevokeAPIView,
+    UserViewSet,
+)
 
 router = routers.SimpleRouter()
 
 router.register(r"", UserViewSet, basename="users")
 
-urlpatterns = [path("me/", UserMeRetrieveAPIView.as_view())]
+urlpatterns = [
+    path("me/", UserMeRetrieveAPIView.as_view()),
+    path("me/tokens/", UserTokenCreateAPIView.as_view()),
+    path("me/tokens/revoke/", UserTokenRevokeAPIView.as_view()),
+]
 
 urlpatterns += router.urls
@@ -1,23 +1,33 @@
 from django.http import Http404
-from django_filters.rest_framework import DjangoFilterBackend
 from drf_spectacular.utils import extend_schema
-from rest_framework import exceptions, filters, generics, viewsets
+from rest_framework import exceptions, filters, generics, status, viewsets
+from rest_framework.authentication import SessionAuthentication
 from rest_framework.permissions import IsAdminUser, IsAuthenticated
 from rest_framework.response import Response
 
+from purly.filtering import IndexedFilterBackend
+from purly.guard import QueryGuardMixin
+from purly.readers import CompiledListMixin
+
 from .filters import USER_FILTER_FIELDS
 from .models import CustomUser
 from .pagination import UserPagination
-from .serializers import UserDetailSerializer, UserListSerializer
+from .serializers import (
+    UserDetailSerializer,
+    UserListSerializer,
+    UserTokenCreateSerializer,
+    UserTokenRevokeSerializer,
+)
+from .tokens import issue_token, read_token, revoke_token
 
 
-class UserViewSet(viewsets.ModelViewSet):
+class UserViewSet(QueryGuardMixin, CompiledListMixin, viewsets.ModelViewSet):
     http_method_names = ["get"]
     permission_classes = [IsAdminUser]
     queryset = CustomUser.objects.all()
     serializer_class = UserListSerializer
     pagination_class = UserPagination
-    filter_backends = [DjangoFilterBackend, filters.OrderingFilter]
+    filter_backends = [IndexedFilterBackend, filters.OrderingFilter]
     filterset_fields = USER_FILTER_FIELDS
     ordering_fields = ["date_joined"]
 
@@ -29,17 +39,7 @@ class UserViewSet(viewsets.ModelViewSet):
 
     @extend_schema(summary="List users", request=None, responses=UserListSerializer)
     def list(self, request, *args, **kwargs):
-        queryset = self.filter_queryset(self.get_queryset())
-        page = self.paginate_queryset(queryset)
-
-        if page is not None:
-            serializer = UserListSerializer(page, many=True)
-
-            return self.get_paginated_response(serializer.data)
-
-        serializer = self.get_serializer(queryset, many=True)
-
-        return Response(serializer.data)
+        return super().list(request, *args, **kwargs)
 
     @extend_schema(summary="Retrieve user", request=None, responses=UserDetailSerializer)
     def retrieve(self, request, *args, **kwargs):
@@ -56,4 +56,59 @@ class UserMeRetrieveAPIView(generics.RetrieveAPIView):
     serializer_class = UserDetailSerializer
 
     def get_object(self):  # type: ignore
+        # A cached principal loads the rest of its row once, on the first field it lacks.
         return self.request.user
+
+
+@extend_schema(summary="Issue API token", responses=dict)
+class UserTokenCreateAPIView(generics.GenericAPIView):
+    http_method_names = ["post"]
+    # Tokens cannot issue tokens, so a leaked one dies with its expiry.
+    authentication_classes = [SessionAuthentication]
+    permission_classes = [IsAuthenticated]
+    serializer_class = UserTokenCreateSerializer
+
+    def post(self, request, *args, **kwargs):
+        serializer = self.get_serializer(data=request.data)
+
+        serializer.is_valid(raise_exception=True)
+
+        token, payload = issue_token(
+            request.user,
+            serializer.validated_data["scopes"],
+            serializer.validated_data["lifetime"],
+        )
+
+        return Response(
+            {
+                "id": payload["jti"],
+                "token": token,
+                "scopes": payload["scopes"],
+                "expires_at": payload["exp"],
+            },
+            status=status.HTTP_201_CREATED,
+        )
+
+
+@extend_schema(summary="Revoke API token", responses=None)
+class UserTokenRevokeAPIView(generics.GenericAPIView):
+    http_method_names = ["post"]
+    permission_classes = [IsAuthenticated]
+    serializer_class = UserTokenRevokeSerializer
+
+    def post(self, request, *args, **kwargs):
+        serializer = self.get_serializer(data=request.data)
+
+        serializer.is_valid(raise_exception=True)
+
+        payload = read_token(serializer.validated_data["token"])
+        user = request.user
+
+        if payload is None or not (
+            payload["user"]["id"] == user.pk or user.is_staff or user.is_superuser
+        ):
+            raise exceptions.ValidationError({"token": ["This token is invalid or expired."]})
+
+        revoke_token(payload)
+
+        return Response(status=status.HTTP_204_NO_CONTENT)
@@ -2,7 +2,11 @@ from django.contrib import messages
 from django.db import transaction
 
 from purly.approval.models import ApprovalStatusChoices
-from purly.approval.services import check_fully_approved, notify_current_sequence
+from purly.approval.services import (
+    check_fully_approved,
+    notify_current_sequence,
+    sync_approval_sequence,
+)
 from purly.requisition.models import Requisition, RequisitionStatusChoices
 from purly.requisition.services import on_withdraw
 
@@ -46,7 +50,7 @@ def admin_action_delete(self, request, queryset, model_name):
 
     if model_name == "approvals" and requisitions:
         for requisition_id in requisitions:
-            requisition = Requisition.objects.get(pk=requisition_id)
+            requisition = sync_approval_sequence(Requisition.objects.get(pk=requisition_id))
 
             transaction.on_commit(
                 lambda requisition=requisition: notify_current_sequence(requisition)